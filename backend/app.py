@@ -9,17 +9,45 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, send_from_directory, jsonify, request
 from flask_cors import CORS
 from config import Config
-from database import init_db, seed_services, seed_gallery
+from json_provider import FastJSONProvider
+from rate_limit import init_rate_limiting
+from deadline import init_deadlines
+from compression import init_compression
+from warmup import ensure_database, warm_up, warm_up_in_background, is_ready, get_status
 
-# Import route blueprints
-from routes.bookings import bookings_bp
-from routes.contact import contact_bp
-from routes.gallery import gallery_bp
-from routes.services import services_bp
-from routes.intake import intake_bp
+
+def register_blueprints(app):
+    """Import and register the route blueprints."""
+    # Imported here so the app module stays cheap to import on its own;
+    # none of these pull in the email SDK until an email is actually sent.
+    from routes.bookings import bookings_bp
+    from routes.contact import contact_bp
+    from routes.gallery import gallery_bp
+    from routes.services import services_bp
+    from routes.intake import intake_bp
+    from routes.clients import clients_bp
+    from routes.stats import stats_bp
+    from routes.events import events_bp
+    from routes.changes import changes_bp
+    from routes.metrics import metrics_bp
+    from routes.schedule import schedule_bp
+    from routes.calendar import calendar_bp
+    
+    app.register_blueprint(bookings_bp)
+    app.register_blueprint(contact_bp)
+    app.register_blueprint(gallery_bp)
+    app.register_blueprint(services_bp)
+    app.register_blueprint(intake_bp)
+    app.register_blueprint(clients_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(changes_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(schedule_bp)
+    app.register_blueprint(calendar_bp)
 
 
 def create_app():
@@ -31,20 +59,44 @@ def create_app():
     # Load configuration
     app.config.from_object(Config)
     
+    # orjson-backed JSON (falls back to the stdlib encoder)
+    app.json = FastJSONProvider(app)
+    
     # Enable CORS
     CORS(app, origins=Config.CORS_ORIGINS)
     
+    # gzip/brotli bodies; registered first so it runs after every other hook
+    init_compression(app)
+    
     # Register blueprints
-    app.register_blueprint(bookings_bp)
-    app.register_blueprint(contact_bp)
-    app.register_blueprint(gallery_bp)
-    app.register_blueprint(services_bp)
-    app.register_blueprint(intake_bp)
+    register_blueprints(app)
+    
+    # Per-route time budgets, enforced on SQLite and email calls
+    init_deadlines(app)
+    
+    # Token buckets and admission control on form posts
+    init_rate_limiting(app)
     
     # Serve frontend pages
+    def serve_page(html_file):
+        """An HTML page with the catalogue data its scripts need embedded (see pages.py)."""
+        from pages import render_page
+        body, etag = render_page(Path(app.static_folder) / html_file)
+        response = app.response_class(body, mimetype='text/html')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'  # Revalidate: the embedded catalogue can change
+        return response.make_conditional(request)
+    
     @app.route('/')
     def serve_index():
-        return send_from_directory(app.static_folder, 'index.html')
+        return serve_page('index.html')
+    
+    @app.route('/<page>.html')
+    def serve_html(page):
+        # Ahead of the static route, which would send the file as-is
+        if not (Path(app.static_folder) / f'{page}.html').is_file():
+            return serve_page('index.html')
+        return serve_page(f'{page}.html')
     
     @app.route('/<path:filename>')
     def serve_static(filename):
@@ -57,8 +109,8 @@ def create_app():
             html_file = f"{filename}.html"
             html_path = Path(app.static_folder) / html_file
             if html_path.exists():
-                return send_from_directory(app.static_folder, html_file)
-        return send_from_directory(app.static_folder, 'index.html')
+                return serve_page(html_file)
+        return serve_page('index.html')
     
     # Health check endpoint
     @app.route('/api/health')
@@ -68,20 +120,32 @@ def create_app():
             'business': Config.BUSINESS_NAME
         })
     
+    # Readiness check - only reports ready once the worker has been warmed up
+    # (gunicorn runs warm_up in post_worker_init, see gunicorn.conf.py)
+    @app.route('/api/ready')
+    def readiness_check():
+        status = get_status()
+        if not is_ready():
+            # Outside gunicorn nothing else will warm us, so start it here
+            warm_up_in_background(app)
+            return jsonify({
+                'status': 'warming',
+                'error': status['error']
+            }), 503
+        return jsonify({
+            'status': 'ready',
+            'warmup_ms': status['duration_ms']
+        })
+    
     # Lazy database initialization (non-blocking startup)
-    # Database will be initialized on first request instead of at app startup
+    # Normally already done by warmup; this covers workers that skipped it
     @app.before_request
     def ensure_db_initialized():
         """Initialize database on first request (lazy loading)."""
-        if not hasattr(app, '_db_initialized'):
-            try:
-                init_db()
-                seed_services()
-                seed_gallery()
-                app._db_initialized = True
-                print("Database initialized on first request.")
-            except Exception as e:
-                print(f"Database initialization error: {e}")
+        try:
+            ensure_database()
+        except Exception as e:
+            print(f"Database initialization error: {e}")
     
     return app
 
@@ -90,17 +154,16 @@ def create_app():
 def setup_database():
     """Initialize database with tables and seed data."""
     print("Setting up database...")
-    init_db()
-    seed_services()
-    seed_gallery()
+    ensure_database()
 
 
 # Create app instance for gunicorn (must be at module level)
 app = create_app()
 
 if __name__ == '__main__':
-    # Setup database
+    # Setup database and warm caches before serving
     setup_database()
+    warm_up(app)
     
     # Create and run app
     print(f"\n{'='*50}")
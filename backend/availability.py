@@ -0,0 +1,200 @@
+"""
+Availability engine for InJoy Beauty.
+Slot and overlap checks shared by the available-times endpoint and the
+booking write path. Times are handled as minutes since midnight so a
+check never re-parses strings with strptime.
+
+Opening hours come from the business_hours table (one row per open
+weekday), minus blackout_dates and schedule_blocks (e.g. mobile visits).
+Each worker keeps them in memory as a WeeklyPlan with the slot grid of
+every weekday built once, and reloads it when the schedule generation in
+the shared cache moves on, so a request only looks up its date.
+"""
+import calendar
+import threading
+from bisect import bisect_right
+from datetime import date, timedelta
+from database import get_db_connection
+import shared_cache
+
+# Supported recurrence frequencies and the longest series we'll expand
+RECURRENCE_FREQUENCIES = ('weekly', 'biweekly', 'monthly')
+MAX_OCCURRENCES = 52
+
+
+def to_minutes(time_str):
+    """'HH:MM' (or 'HH:MM:SS') -> minutes since midnight."""
+    hours, minutes = time_str.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def to_time_str(minutes):
+    """Minutes since midnight -> 'HH:MM'."""
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+class DayPlan:
+    """Opening hours of one date: open/close minutes, slot starts and blocked intervals."""
+
+    __slots__ = ('open', 'close', 'slots', 'blocked')
+
+    def __init__(self, open_minute, close_minute, slots, blocked=()):
+        self.open = open_minute
+        self.close = close_minute
+        self.slots = slots
+        self.blocked = blocked
+
+
+class WeeklyPlan:
+    """Business hours, blackout dates and blocks as loaded from the database."""
+
+    def __init__(self, hours, blackouts, blocks):
+        # (open, close, slot minutes) -> slot starts, shared by weekdays with the same hours
+        grids = {}
+        self.weekdays = {}
+        for weekday, open_minute, close_minute, slot_minutes in hours:
+            key = (open_minute, close_minute, slot_minutes)
+            if key not in grids:
+                grids[key] = tuple(range(open_minute, close_minute, slot_minutes))
+            self.weekdays[weekday] = DayPlan(open_minute, close_minute, grids[key])
+        self.blackouts = blackouts  # [(start ISO date, end ISO date), ...]
+        self.blocks = blocks        # ISO date -> ((start, end), ...)
+        self._days = {}
+
+    def day(self, day):
+        """DayPlan for a date (ISO string or date), or None if closed that day."""
+        key = day if isinstance(day, str) else day.isoformat()
+        try:
+            return self._days[key]
+        except KeyError:
+            pass
+
+        plan = self.weekdays.get(date.fromisoformat(key).weekday())
+        if plan is not None and any(start <= key <= end for start, end in self.blackouts):
+            plan = None
+        if plan is not None and key in self.blocks:
+            plan = DayPlan(plan.open, plan.close, plan.slots, self.blocks[key])
+        if len(self._days) > MAX_CACHED_DAYS:
+            self._days.clear()
+        self._days[key] = plan
+        return plan
+
+
+# Dates whose DayPlan each WeeklyPlan remembers before starting over
+MAX_CACHED_DAYS = 1024
+
+_plan = None
+_plan_generation = None
+_plan_lock = threading.Lock()
+
+
+def load_plan():
+    """Read the schedule tables into a WeeklyPlan (blackouts and blocks from yesterday on)."""
+    since = (date.today() - timedelta(days=1)).isoformat()
+    conn = get_db_connection()
+    try:
+        hours = [tuple(row) for row in conn.execute(
+            'SELECT weekday, open_minute, close_minute, slot_minutes FROM business_hours'
+        )]
+        blackouts = [tuple(row) for row in conn.execute(
+            'SELECT start_date, end_date FROM blackout_dates WHERE end_date >= ?', (since,)
+        )]
+        blocks = {}
+        for block_date, start, end in conn.execute(
+            'SELECT block_date, start_minute, end_minute FROM schedule_blocks WHERE block_date >= ? ORDER BY start_minute',
+            (since,)
+        ):
+            blocks.setdefault(str(block_date), []).append((start, end))
+    finally:
+        conn.close()
+    return WeeklyPlan(hours, [(str(s), str(e)) for s, e in blackouts],
+                      {day: tuple(intervals) for day, intervals in blocks.items()})
+
+
+def current_plan():
+    """This worker's WeeklyPlan, reloaded after any worker changes the schedule."""
+    global _plan, _plan_generation
+    generation = shared_cache.generation(shared_cache.SCHEDULE)
+    if _plan is not None and _plan_generation == generation:
+        return _plan
+    with _plan_lock:
+        if _plan is None or _plan_generation != generation:
+            _plan, _plan_generation = load_plan(), generation
+        return _plan
+
+
+def booked_intervals(booked):
+    """[(booking_time, duration), ...] -> [(start_minute, end_minute), ...]."""
+    intervals = []
+    for booking_time, duration in booked:
+        start = to_minutes(booking_time)
+        intervals.append((start, start + duration))
+    return intervals
+
+
+def overlaps(start, end, intervals):
+    """True if [start, end) overlaps any of the booked intervals."""
+    for booked_start, booked_end in intervals:
+        if start < booked_end and end > booked_start:
+            return True
+    return False
+
+
+def available_slots(day, duration, booked):
+    """Slot start times ('HH:MM') on day that fit a service of `duration` minutes."""
+    plan = current_plan().day(day)
+    if plan is None:
+        return []
+    intervals = booked_intervals(booked) + list(plan.blocked)
+    # Grids are sorted, so the starts that still end by closing time are a prefix
+    fitting = plan.slots[:bisect_right(plan.slots, plan.close - duration)]
+    return [
+        to_time_str(start) for start in fitting
+        if not overlaps(start, start + duration, intervals)
+    ]
+
+
+def check_slot(day, booking_time, duration, booked):
+    """Why a booking can't take this slot on day, or None if it can.
+
+    Returns 'closed' (closed weekday or blackout date), 'outside_hours',
+    'blocked' (a schedule block such as a mobile visit) or 'overlap'.
+    """
+    plan = current_plan().day(day)
+    if plan is None:
+        return 'closed'
+    start = to_minutes(booking_time)
+    end = start + duration
+    if start < plan.open or end > plan.close:
+        return 'outside_hours'
+    if overlaps(start, end, plan.blocked):
+        return 'blocked'
+    if overlaps(start, end, booked_intervals(booked)):
+        return 'overlap'
+    return None
+
+
+def expand_recurrence(start_date, frequency, count, interval=1):
+    """Dates of a recurring series, starting with start_date.
+
+    weekly/biweekly step by 7/14 days times interval; monthly keeps the day
+    of month, clamped to the end of shorter months.
+    """
+    if frequency not in RECURRENCE_FREQUENCIES:
+        raise ValueError(f'Unsupported frequency: {frequency}')
+    if not 1 <= count <= MAX_OCCURRENCES:
+        raise ValueError(f'count must be between 1 and {MAX_OCCURRENCES}')
+    if interval < 1:
+        raise ValueError('interval must be at least 1')
+    
+    if frequency != 'monthly':
+        step = timedelta(days=(7 if frequency == 'weekly' else 14) * interval)
+        return [start_date + step * i for i in range(count)]
+    
+    dates = []
+    for i in range(count):
+        month_index = start_date.month - 1 + i * interval
+        year, month = start_date.year + month_index // 12, month_index % 12 + 1
+        day = min(start_date.day, calendar.monthrange(year, month)[1])
+        dates.append(start_date.replace(year=year, month=month, day=day))
+    return dates
@@ -0,0 +1,273 @@
+"""
+Online backups for InJoy Beauty.
+Copies the live database with SQLite's backup API a few pages at a time,
+so requests keep reading and writing between steps, then gzips the copy
+into BACKUP_DIR and keeps the newest BACKUP_KEEP snapshots. SQLite
+only: a PostgreSQL database is backed up with pg_dump.
+
+Runs on a background thread in each worker (one worker per interval
+actually takes the snapshot), or by hand:
+
+    python backend/backup.py create
+    python backend/backup.py list
+    python backend/backup.py restore salon-20260101-030000.db.gz
+"""
+import argparse
+import gzip
+import os
+import random
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from config import Config, DATABASE_PATH
+from database import get_db_connection, claim_run, create_table_sql
+from change_log import log_restore
+from storage import get_backend
+import shared_cache
+
+SNAPSHOT_PREFIX = 'salon-'
+SNAPSHOT_SUFFIX = '.db.gz'
+
+# How often the background thread checks whether a snapshot is due
+CHECK_INTERVAL_SECONDS = 900
+
+
+class BackupRestarted(Exception):
+    """Writes kept restarting a stepped copy."""
+
+
+def _stepped_copy(source, dest):
+    """Copy source into dest in BACKUP_PAGES_PER_STEP steps; returns restarts.
+
+    A write from another connection makes SQLite start the copy over. If
+    that happens more than BACKUP_MAX_RESTARTS times, the rest is copied
+    in a single step, which holds the read lock for the whole copy.
+    """
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > Config.BACKUP_MAX_RESTARTS:
+                raise BackupRestarted()
+        last_remaining = remaining
+
+    try:
+        source.backup(dest, pages=Config.BACKUP_PAGES_PER_STEP, progress=progress,
+                      sleep=Config.BACKUP_STEP_PAUSE_MS / 1000)
+    except BackupRestarted:
+        source.backup(dest, pages=-1)
+    return restarts
+
+
+def list_snapshots():
+    """Snapshot files in BACKUP_DIR, newest first."""
+    backup_dir = Path(Config.BACKUP_DIR)
+    if not backup_dir.exists():
+        return []
+    snapshots = backup_dir.glob(f'{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}')
+    return sorted(snapshots, key=lambda path: (path.stat().st_mtime, path.name), reverse=True)
+
+
+def rotate_snapshots(keep=None):
+    """Delete all but the newest `keep` snapshots; returns the deleted paths."""
+    keep = Config.BACKUP_KEEP if keep is None else keep
+    stale = list_snapshots()[keep:]
+    for path in stale:
+        path.unlink()
+    return stale
+
+
+def ship_snapshot(path):
+    """Run BACKUP_SHIP_COMMAND for a snapshot, if one is configured."""
+    if not Config.BACKUP_SHIP_COMMAND:
+        return False
+    args = [arg.replace('{path}', str(path)) for arg in shlex.split(Config.BACKUP_SHIP_COMMAND)]
+    result = subprocess.run(args, capture_output=True, text=True, timeout=600)
+    if result.returncode != 0:
+        print(f"Backup ship command failed ({result.returncode}): {result.stderr.strip()}")
+        return False
+    return True
+
+
+def create_snapshot():
+    """Take a consistent compressed snapshot of the database.
+
+    Returns a summary dict with the snapshot path, sizes, time taken and
+    how many times writes restarted the copy.
+    """
+    if not get_backend().supports('online_backup'):
+        raise RuntimeError(f'Snapshots use the SQLite backup API; back up {get_backend().name} with pg_dump')
+    started = time.perf_counter()
+    backup_dir = Path(Config.BACKUP_DIR)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = backup_dir / f'{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}'
+    # Two snapshots in the same second (e.g. restore's safety copy) get a counter
+    counter = 1
+    while path.exists():
+        path = backup_dir / f'{SNAPSHOT_PREFIX}{stamp}-{counter}{SNAPSHOT_SUFFIX}'
+        counter += 1
+    name = path.name
+
+    # Copy into a scratch file next to the snapshots, then check and compress it
+    fd, copy_path = tempfile.mkstemp(dir=backup_dir, prefix='.copy-', suffix='.db')
+    os.close(fd)
+    partial = path.with_name(f'.{name}.partial')
+    try:
+        # Own connections: pooled ones may carry a request deadline or an open transaction
+        source = sqlite3.connect(str(DATABASE_PATH), timeout=Config.DB_BUSY_TIMEOUT_MS / 1000)
+        dest = sqlite3.connect(copy_path)
+        try:
+            restarts = _stepped_copy(source, dest)
+            check = dest.execute('PRAGMA quick_check').fetchone()[0]
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f'Snapshot failed quick_check: {check}')
+        finally:
+            dest.close()
+            source.close()
+
+        with open(copy_path, 'rb') as raw, gzip.open(partial, 'wb', compresslevel=6) as compressed:
+            shutil.copyfileobj(raw, compressed, length=1024 * 1024)
+        os.replace(partial, path)
+        database_bytes = os.path.getsize(copy_path)
+    finally:
+        for leftover in (copy_path, partial):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    summary = {
+        'path': str(path),
+        'database_bytes': database_bytes,
+        'snapshot_bytes': path.stat().st_size,
+        'seconds': round(time.perf_counter() - started, 3),
+        'restarts': restarts,
+        'rotated': len(rotate_snapshots()),
+        'shipped': ship_snapshot(path),
+    }
+    print(f"Backup snapshot: {summary}")
+    return summary
+
+
+def restore_snapshot(snapshot):
+    """Replace the live database's contents with a snapshot.
+
+    The snapshot is written through the backup API into the live file, so
+    other processes' open connections see the restored data rather than
+    a swapped-out file. A snapshot of the current data is taken first.
+    Afterwards the change log restarts past every cursor handed out, so
+    live views and delta-sync clients reload, and the shared cache is
+    dropped and its generations bumped, so every worker's cached
+    responses, pages and calendar feed are rebuilt.
+    """
+    snapshot = Path(snapshot)
+    if not snapshot.is_absolute() and not snapshot.exists():
+        snapshot = Path(Config.BACKUP_DIR) / snapshot
+    if not get_backend().supports('online_backup'):
+        raise RuntimeError(f'Snapshots are SQLite files; restore {get_backend().name} with pg_restore')
+    if not snapshot.exists():
+        raise FileNotFoundError(f'No such snapshot: {snapshot}')
+
+    fd, copy_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        with gzip.open(snapshot, 'rb') as compressed, open(copy_path, 'wb') as raw:
+            shutil.copyfileobj(compressed, raw, length=1024 * 1024)
+        source = sqlite3.connect(copy_path)
+        try:
+            check = source.execute('PRAGMA quick_check').fetchone()[0]
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f'Snapshot failed quick_check: {check}')
+
+            safety = create_snapshot() if DATABASE_PATH.exists() else None
+            target = sqlite3.connect(str(DATABASE_PATH), timeout=30)
+            try:
+                after_seq = _last_change_seq(target)
+                source.backup(target)
+                # Snapshots from before the change log existed don't have it
+                target.execute(create_table_sql('change_log'))
+                log_restore(target, after_seq)
+                target.commit()
+            finally:
+                target.close()
+        finally:
+            source.close()
+    finally:
+        os.remove(copy_path)
+    shared_cache.invalidate_all()
+    return {'restored': str(snapshot), 'safety_snapshot': safety and safety['path']}
+
+
+def _last_change_seq(conn):
+    """Highest change-log seq ever handed out on conn's database (0 if none)."""
+    try:
+        return conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'change_log'"
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        # No AUTOINCREMENT table has been created yet
+        return 0
+
+
+def _backup_loop():
+    # Spread workers out so they don't all check at once after a deploy
+    time.sleep(random.uniform(60, 300))
+    while True:
+        try:
+            conn = get_db_connection()
+            try:
+                due = claim_run(conn, 'backup', Config.BACKUP_INTERVAL_HOURS * 3600)
+            finally:
+                conn.close()
+            if due:
+                create_snapshot()
+        except Exception as e:
+            print(f"Backup error: {e}")
+        time.sleep(CHECK_INTERVAL_SECONDS)
+
+
+def start_backup_thread():
+    """Take scheduled snapshots in the background for the life of this worker."""
+    if not Config.BACKUP_ENABLED or not get_backend().supports('online_backup'):
+        return None
+    thread = threading.Thread(target=_backup_loop, name='backup', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Back up or restore the InJoy Beauty database.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('create', help='take a snapshot now')
+    commands.add_parser('list', help='list snapshots, newest first')
+    restore = commands.add_parser('restore', help='restore a snapshot over the live database')
+    restore.add_argument('snapshot', help='snapshot file name (in BACKUP_DIR) or path')
+    restore.add_argument('--yes', action='store_true', help="don't ask for confirmation")
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        create_snapshot()
+    elif args.command == 'list':
+        for path in list_snapshots():
+            stat = path.stat()
+            taken = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M')
+            print(f'{path.name}  {stat.st_size / 1024:>10.0f} KB  {taken}')
+    else:
+        if not args.yes:
+            answer = input(f'Replace everything in {DATABASE_PATH} with {args.snapshot}? [y/N] ')
+            if answer.strip().lower() != 'y':
+                print('Restore cancelled.')
+                return
+        print(restore_snapshot(args.snapshot))
+
+
+if __name__ == '__main__':
+    main()
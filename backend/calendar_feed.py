@@ -0,0 +1,185 @@
+"""
+iCalendar feed of InJoy Beauty bookings.
+Jaymie subscribes to /api/calendar/<token>.ics from her phone's calendar
+app to see pending and confirmed bookings next to everything else.
+
+Each worker keeps the rendered VEVENT of every booking in the feed and the
+joined document with its ETag. A poll first compares the shared cache's
+availability generation (bumped by every booking write) with the one the
+document was built at; when nothing changed it is answered from memory,
+usually as a 304. Otherwise only the bookings named in the change log
+since the last refresh are re-read and their events replaced. The whole
+feed is rebuilt when the date moves on (old bookings drop out), the
+catalogue changes (service names and durations) or the change log no
+longer reaches back far enough.
+
+Times are floating local times (no TZID); the salon and its calendar share
+a time zone.
+"""
+import hashlib
+import threading
+import time
+from datetime import date, timedelta
+from config import Config
+from change_log import changes_since, log_bounds
+from models import Booking
+import shared_cache
+
+# Change-log entries read per refresh batch
+REFRESH_BATCH = 1000
+
+STATUS_MAP = {'pending': 'TENTATIVE', 'confirmed': 'CONFIRMED'}
+
+
+def _escape(text):
+    """TEXT value escaping (RFC 5545 3.3.11)."""
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces joined by CRLF + space."""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts, start = [], 0
+    while start < len(data):
+        end = min(start + (75 if not parts else 74), len(data))
+        # Don't cut a UTF-8 sequence in half
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode('utf-8'))
+        start = end
+    return '\r\n '.join(parts)
+
+
+def _digits(value):
+    """'2030-06-03' / '15:00:00' / datetime text -> '20300603' / '150000' ..."""
+    return ''.join(ch for ch in str(value) if ch.isdigit())
+
+
+def _utc_stamp(value):
+    """UTC timestamp text ('2030-06-03 14:05:00') -> '20300603T140500Z'."""
+    digits = (_digits(value) + '0' * 14)[:14]
+    return f'{digits[:8]}T{digits[8:]}Z'
+
+
+def render_event(booking):
+    """The VEVENT for one booking, CRLF-terminated."""
+    start = _digits(booking.booking_date)[:8] + 'T' + (_digits(booking.booking_time) + '00')[:6]
+    description = '\n'.join(part for part in (
+        f'Client: {booking.client_name}',
+        f'Email: {booking.client_email}',
+        f'Phone: {booking.client_phone}' if booking.client_phone else '',
+        f'Notes: {booking.notes}' if booking.notes else '',
+        f'Status: {booking.status}',
+    ) if part)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:booking-{booking.id}@injoy-beauty',
+        # created_at is UTC; fixed per booking, so unchanged bookings render identically
+        f'DTSTAMP:{_utc_stamp(booking.created_at)}',
+        f'DTSTART:{start}',
+        f'DURATION:PT{int(booking.duration)}M',
+        f'SUMMARY:{_escape(f"{booking.service_name} - {booking.client_name}")}',
+        f'DESCRIPTION:{_escape(description)}',
+        f'STATUS:{STATUS_MAP.get(booking.status, "TENTATIVE")}',
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+def _entry(booking):
+    """(sort key, VEVENT) for the events map."""
+    return (str(booking.booking_date), str(booking.booking_time), booking.id), render_event(booking)
+
+
+HEADER = ''.join(line + '\r\n' for line in (
+    'BEGIN:VCALENDAR',
+    'VERSION:2.0',
+    'PRODID:-//InJoy Beauty//Bookings//EN',
+    'CALSCALE:GREGORIAN',
+    'METHOD:PUBLISH',
+    'X-WR-CALNAME:InJoy Beauty bookings',
+    f'REFRESH-INTERVAL;VALUE=DURATION:PT{Config.CALENDAR_FEED_REFRESH_MINUTES}M',
+))
+FOOTER = 'END:VCALENDAR\r\n'
+
+
+class CalendarFeed:
+    """One worker's rendered feed and where in the change log it is up to."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events = {}          # booking id -> ((date, time, id), VEVENT text)
+        self.current = None       # (body bytes, etag), replaced as a whole
+        self.seq = 0              # Last change-log entry applied
+        self.window_start = None  # Oldest booking date included
+        self.generations = None   # (availability, catalogue) the document was built at
+        self.checked_at = 0.0     # Last look at the change log (monotonic)
+
+    def document(self):
+        """(body bytes, etag) of the feed, refreshed if bookings changed."""
+        generations = (shared_cache.generation(shared_cache.AVAILABILITY),
+                       shared_cache.generation(shared_cache.CATALOGUE))
+        window_start = (date.today() - timedelta(days=Config.CALENDAR_FEED_PAST_DAYS)).isoformat()
+        if self._is_current(generations, window_start):
+            return self.current
+
+        with self._lock:
+            if not self._is_current(generations, window_start):
+                self._refresh(generations, window_start)
+            return self.current
+
+    def _is_current(self, generations, window_start):
+        # Writes from other instances (PostgreSQL) don't bump this instance's
+        # generations, so look at the change log every so often regardless
+        return (self.current is not None and self.generations == generations
+                and self.window_start == window_start
+                and time.monotonic() - self.checked_at < Config.CALENDAR_FEED_RECHECK_SECONDS)
+
+    def _refresh(self, generations, window_start):
+        oldest, newest = log_bounds()
+        full = (self.current is None or self.window_start != window_start
+                or (self.generations and self.generations[1] != generations[1])
+                or self.seq > newest or (oldest is not None and self.seq < oldest - 1))
+        if full:
+            self._rebuild(window_start, newest)
+        else:
+            self._apply_changes(window_start)
+        self.generations = generations
+        self.window_start = window_start
+        self.checked_at = time.monotonic()
+
+    def _rebuild(self, window_start, newest):
+        # Read the log position first: anything committed after it is applied next time
+        self.seq = newest
+        self.events = {booking.id: _entry(booking) for booking in Booking.get_for_calendar(window_start)}
+        self._render()
+
+    def _apply_changes(self, window_start):
+        changed = set()
+        while True:
+            entries = changes_since(self.seq, REFRESH_BATCH)
+            changed.update(entry['id'] for entry in entries if entry['table'] == 'bookings')
+            if entries:
+                self.seq = entries[-1]['seq']
+            if len(entries) < REFRESH_BATCH:
+                break
+        if not changed:
+            return
+
+        for booking_id in changed:
+            self.events.pop(booking_id, None)
+        for booking in Booking.get_for_calendar(window_start, ids=sorted(changed)):
+            self.events[booking.id] = _entry(booking)
+        self._render()
+
+    def _render(self):
+        body = (HEADER + ''.join(text for _, text in sorted(self.events.values())) + FOOTER).encode('utf-8')
+        if self.current is None or body != self.current[0]:
+            # Content hash, so every worker gives the same document the same ETag
+            self.current = (body, 'cal-' + hashlib.sha1(body).hexdigest()[:20])
+
+
+feed = CalendarFeed()
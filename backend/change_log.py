@@ -0,0 +1,104 @@
+"""
+Change log for InJoy Beauty.
+Model writes append a compact row (table, row id, action, status) to
+change_log in the same transaction as the change itself, so seq numbers
+follow commit order. Admin views read it instead of re-fetching whole
+lists: /api/events pushes new entries as Server-Sent Events and
+/api/changes?since= returns the rows changed after a client's cursor.
+"""
+import time
+from config import Config
+from database import get_db_connection
+from storage import get_backend
+
+CREATED = 'created'
+STATUS_CHANGED = 'status_changed'
+UPDATED = 'updated'
+DELETED = 'deleted'
+RESTORED = 'restored'  # The whole database was replaced from a snapshot
+
+# Last cleanup of old entries in this worker (monotonic seconds)
+_last_purge = 0.0
+PURGE_INTERVAL = 3600
+
+
+def log_change(conn, table, row_id, action, status=None):
+    """Record a change to one row on conn, inside the caller's transaction."""
+    get_backend().serialize_writes(conn)
+    conn.execute(
+        'INSERT INTO change_log (table_name, row_id, action, status) VALUES (?, ?, ?, ?)',
+        (table, row_id, action, status)
+    )
+
+
+def log_changes(conn, table, row_ids, action):
+    """Record the same change to several rows of a table on conn."""
+    get_backend().serialize_writes(conn)
+    conn.executemany(
+        'INSERT INTO change_log (table_name, row_id, action) VALUES (?, ?, ?)',
+        [(table, row_id, action) for row_id in row_ids]
+    )
+
+
+def log_restore(conn, after_seq):
+    """Restart the log on conn after the database was restored from a snapshot.
+
+    The restored entries describe the snapshot's past, not what listeners
+    have seen since, so they are dropped and one RESTORED marker is written
+    two past after_seq (the highest seq handed out before the restore).
+    Every existing cursor then falls before the log's oldest entry, which
+    /api/events, /api/changes and the calendar feed treat as a reset.
+    """
+    restored = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'change_log'").fetchone()[0]
+    conn.execute('DELETE FROM change_log')
+    conn.execute(
+        'INSERT INTO change_log (seq, table_name, row_id, action) VALUES (?, ?, ?, ?)',
+        (max(after_seq, restored) + 2, 'database', 0, RESTORED)
+    )
+
+
+def log_bounds():
+    """(oldest seq still kept, newest seq), or (None, 0) when the log is empty."""
+    conn = get_db_connection()
+    try:
+        oldest, newest = conn.execute('SELECT MIN(seq), COALESCE(MAX(seq), 0) FROM change_log').fetchone()
+    finally:
+        conn.close()
+    return oldest, newest
+
+
+def changes_since(seq, limit):
+    """Up to limit entries after seq, oldest first, as dicts."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT seq, table_name, row_id, action, status, changed_at FROM change_log
+            WHERE seq > ? ORDER BY seq LIMIT ?
+        ''', (seq, limit)).fetchall()
+    finally:
+        conn.close()
+    return [
+        {'seq': row[0], 'table': row[1], 'id': row[2], 'action': row[3], 'status': row[4], 'at': row[5]}
+        for row in rows
+    ]
+
+
+def purge_old():
+    """Delete entries older than CHANGE_LOG_RETENTION_DAYS. Returns rows removed."""
+    cutoff = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - Config.CHANGE_LOG_RETENTION_DAYS * 86400))
+    conn = get_db_connection()
+    try:
+        removed = conn.execute('DELETE FROM change_log WHERE changed_at < ?', (cutoff,)).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return removed
+
+
+def maybe_purge():
+    """Run purge_old() at most once per PURGE_INTERVAL in this worker."""
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge >= PURGE_INTERVAL:
+        _last_purge = now
+        purge_old()
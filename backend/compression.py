@@ -0,0 +1,141 @@
+"""
+Response compression for InJoy Beauty.
+JSON, HTML, CSS and JavaScript responses above COMPRESSION_MIN_BYTES are
+sent brotli- or gzip-encoded, whichever the client prefers (brotli only
+when the optional Brotli package is installed). Images and other media
+are already compressed and go out as-is.
+
+Responses with an ETag (HTML pages, static files, the catalogue API) keep
+their compressed bodies in a small per-worker cache keyed by ETag and
+encoding, so a hot page is compressed once rather than on every request.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+from flask import request
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip is offered instead
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# (etag, encoding) -> compressed body, least recently used first
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+stats = {'compressed': 0, 'cache_hits': 0}
+
+
+def compress(data, encoding):
+    """data compressed with encoding ('br' or 'gzip')."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=Config.GZIP_LEVEL, mtime=0)
+
+
+def _cached(key):
+    with _cache_lock:
+        body = _cache.get(key)
+        if body is not None:
+            _cache.move_to_end(key)
+        return body
+
+
+def _store(key, body):
+    global _cache_bytes
+    if len(body) > Config.COMPRESSION_CACHE_MAX_BYTES // 4:
+        return
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = body
+        _cache_bytes += len(body)
+        while _cache_bytes > Config.COMPRESSION_CACHE_MAX_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+
+def clear_cache():
+    """Drop every cached compressed body in this worker."""
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def _is_compressible(response):
+    if response.mimetype not in Config.COMPRESSIBLE_MIMETYPES:
+        return False
+    if response.status_code in (206, 304):
+        return False
+    # Generators stay streamed; a static file (direct passthrough) is read in
+    if response.is_streamed and not response.direct_passthrough:
+        return False
+    if 'Content-Encoding' in response.headers or 'no-transform' in response.cache_control:
+        return False
+    length = response.content_length
+    if length is not None and not Config.COMPRESSION_MIN_BYTES <= length <= Config.COMPRESSION_MAX_BYTES:
+        return False
+    return True
+
+
+def cache_by_etag(response):
+    """after_request hook for GET routes whose bodies are worth caching.
+
+    Tags successful responses with a content hash ETag so browsers can
+    revalidate with If-None-Match, and the compressed body is cached.
+    """
+    if request.method == 'GET' and response.status_code == 200 and not response.is_streamed:
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        response = response.make_conditional(request)
+    return response
+
+
+def init_compression(app):
+    """Register the hook that compresses responses the client can decode."""
+
+    @app.after_request
+    def compress_response(response):
+        if not Config.COMPRESSION_ENABLED or not _is_compressible(response):
+            return response
+        # The body depends on Accept-Encoding even when it isn't compressed
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return response
+
+        etag, _ = response.get_etag()
+        key = (etag, encoding) if etag else None
+        body = _cached(key) if key else None
+        if body is not None:
+            stats['cache_hits'] += 1
+            if response.direct_passthrough:
+                # send_from_directory handed over an open file we won't read
+                response.direct_passthrough = False
+                response.response.close()
+        else:
+            if response.direct_passthrough:
+                # send_from_directory hands over the open file; read it in
+                response.direct_passthrough = False
+                response.make_sequence()
+            data = response.get_data()
+            if len(data) < Config.COMPRESSION_MIN_BYTES:
+                return response
+            body = compress(data, encoding)
+            stats['compressed'] += 1
+            if key:
+                _store(key, body)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Accept-Ranges', None)
+        if etag:
+            # A different encoding of the same resource: If-None-Match
+            # still matches it, since conditional requests compare weakly
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,14 +1,15 @@
 """
 Configuration settings for InJoy Beauty backend.
 """
+import hashlib
 import os
 from pathlib import Path
 
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Database
-DATABASE_PATH = BASE_DIR / 'database' / 'salon.db'
+# Database (DATABASE_PATH can point benchmarks or tooling at another file)
+DATABASE_PATH = Path(os.environ.get('DATABASE_PATH', BASE_DIR / 'database' / 'salon.db'))
 
 # Flask settings
 class Config:
@@ -17,6 +18,36 @@ class Config:
     
     # Database
     DATABASE = str(DATABASE_PATH)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '4'))  # Connections kept open per worker
+    DB_BUSY_TIMEOUT_MS = 5000  # Longest wait for SQLite's write lock (less if the request deadline is closer)
+    # A postgres:// URL switches storage to PostgreSQL so several instances can share it (see storage.py).
+    # EXPERIMENTAL: not yet run in production; startup refuses it unless POSTGRES_EXPERIMENTAL=true
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    POSTGRES_EXPERIMENTAL = os.environ.get('POSTGRES_EXPERIMENTAL', 'False').lower() == 'true'
+    PG_POOL_MIN_SIZE = int(os.environ.get('PG_POOL_MIN_SIZE', '2'))   # Connections opened per worker at warmup
+    PG_POOL_MAX_SIZE = int(os.environ.get('PG_POOL_MAX_SIZE', '8'))   # Keep workers x this under max_connections
+    PG_POOL_TIMEOUT_SECONDS = 5  # How long a request waits for a free connection
+    # Executions of a query before psycopg prepares it server-side (0 = first run);
+    # behind PgBouncer in transaction mode, set PG_PREPARE_THRESHOLD=-1 to turn it off
+    PG_PREPARE_THRESHOLD = int(os.environ.get('PG_PREPARE_THRESHOLD', '0'))
+    
+    # Request deadlines, kept well inside gunicorn's --timeout 30 (see deadline.py)
+    REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', '10'))
+    # endpoint -> seconds, for routes that need a different budget
+    ROUTE_DEADLINES = {
+        'intake.submit_intake_form': 20,
+        'contact.submit_contact': 20,
+        'bookings.submit_inquiry': 20,
+        'bookings.create_booking_series': 15,
+        'intake.test_send_email': 20,
+    }
+    EMAIL_TIMEOUT_SECONDS = 8  # How long a request waits on Resend before leaving the email queued
+    
+    # Group-commit write queue for contact/intake inserts (see write_queue.py)
+    WRITE_QUEUE_ENABLED = os.environ.get('WRITE_QUEUE_ENABLED', 'False').lower() == 'true'
+    WRITE_QUEUE_MAX_BATCH = int(os.environ.get('WRITE_QUEUE_MAX_BATCH', '64'))   # Jobs per transaction
+    WRITE_QUEUE_WINDOW_MS = float(os.environ.get('WRITE_QUEUE_WINDOW_MS', '2'))  # How long a batch collects
+    WRITE_QUEUE_TIMEOUT_SECONDS = 10  # How long a request waits for its batch to commit
     
     # CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:5000,http://127.0.0.1:5000').split(',')
@@ -29,11 +60,103 @@ class Config:
     BUSINESS_LOCATION = "Bourget, Ontario"
     BUSINESS_INSTAGRAM = "https://www.instagram.com/injoy_beautyy"
     
-    # Booking settings
+    # Booking settings: the hours every weekday starts with; after that they
+    # live in the business_hours table (see availability.py and /api/schedule)
     BOOKING_START_HOUR = 15   # 3 PM
     BOOKING_END_HOUR = 20     # 8 PM
     TIME_SLOT_DURATION = 30   # minutes
     
+    # Idempotency-Key support on form posts
+    IDEMPOTENCY_TTL_HOURS = 24        # How long a stored response can be replayed
+    IDEMPOTENCY_WAIT_SECONDS = 5      # How long a duplicate waits for the original to finish
+    
+    # Live admin updates from the change log (see change_log.py and routes/events.py)
+    CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', '14'))
+    SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', '3000'))  # Browser reconnect delay between event batches
+    SSE_BATCH_LIMIT = 100  # Events sent per response
+    # How long a response may wait for the next event before closing (0 = answer at once).
+    # A waiting listener holds a request thread, so at most SSE_MAX_WAITING per worker do.
+    SSE_HOLD_SECONDS = float(os.environ.get('SSE_HOLD_SECONDS', '0'))
+    SSE_MAX_WAITING = 1
+    SSE_POLL_MS = 500  # change_log poll interval while waiting
+    
+    # iCalendar feed of bookings at /api/calendar/<token>.ics (see calendar_feed.py).
+    # No default: the feed is off until a long random token is set in Render.
+    CALENDAR_FEED_TOKEN = os.environ.get('CALENDAR_FEED_TOKEN')
+    CALENDAR_FEED_PAST_DAYS = int(os.environ.get('CALENDAR_FEED_PAST_DAYS', '30'))  # Past bookings kept in the feed
+    CALENDAR_FEED_REFRESH_MINUTES = 5    # Poll interval suggested to calendar apps
+    CALENDAR_FEED_RECHECK_SECONDS = 60   # Longest a worker answers from memory without checking the change log
+    # Bearer token for changing business hours, blackouts and blocks; unset = changes refused
+    SCHEDULE_ADMIN_TOKEN = os.environ.get('SCHEDULE_ADMIN_TOKEN')
+    
+    # Response compression (see compression.py)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_BYTES = 1024        # Smaller bodies gain less than the encoding costs
+    COMPRESSION_MAX_BYTES = 2 * 1024 * 1024  # Larger bodies (big static files) go out as-is
+    COMPRESSIBLE_MIMETYPES = (
+        'text/html', 'text/css', 'text/plain', 'text/javascript',
+        'application/javascript', 'application/json', 'image/svg+xml', 'text/calendar',
+    )
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 5                  # 11 is far slower for a few percent more
+    COMPRESSION_CACHE_MAX_BYTES = 8 * 1024 * 1024  # Compressed bodies kept per worker
+    
+    # Cache shared by the workers on an instance (see shared_cache.py); /dev/shm is RAM-backed
+    SHARED_CACHE_ENABLED = os.environ.get('SHARED_CACHE_ENABLED', 'True').lower() == 'true'
+    SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH', str(
+        Path('/dev/shm') / f'injoy-cache-{hashlib.sha1(str(DATABASE_PATH.resolve()).encode()).hexdigest()[:12]}.db'
+        if Path('/dev/shm').is_dir()
+        else DATABASE_PATH.with_name('shared-cache.db')
+    ))
+    SHARED_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    SHARED_CACHE_MMAP_BYTES = 64 * 1024 * 1024  # Reads come straight from the mapped file
+    SHARED_CACHE_DEFAULT_TTL_SECONDS = 300
+    # Per namespace; bumps invalidate sooner, the TTL bounds what another instance's writes leave stale
+    SHARED_CACHE_TTL_SECONDS = {
+        'catalogue': 3600,
+        'availability': 60,
+    }
+    
+    # Rate limiting on write endpoints (see rate_limit.py)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_DB_PATH = os.environ.get('RATE_LIMIT_DB_PATH', str(DATABASE_PATH.with_name('ratelimit.db')))
+    RATE_LIMITED_METHODS = ('POST',)  # Public form posts; the PATCH status updates are Jaymie's
+    # blueprint name -> (burst, seconds to refill the whole burst), per client IP and endpoint
+    RATE_LIMITS = {
+        'contact': (5, 600),
+        'intake': (5, 600),
+        'bookings': (10, 600),
+    }
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', '1'))  # Render's load balancer
+    # Concurrent write requests per worker; the rest get 429 so reads keep a thread.
+    # Unset: gunicorn's --threads minus one (see rate_limit.size_admission)
+    MAX_CONCURRENT_WRITES = int(os.environ['MAX_CONCURRENT_WRITES']) if os.environ.get('MAX_CONCURRENT_WRITES') else None
+    WRITE_ADMISSION_WAIT_MS = 200  # How long a write may queue for a slot before being shed
+    
+    # Retention: old messages and forms move to an archive database (see retention.py)
+    RETENTION_ENABLED = os.environ.get('RETENTION_ENABLED', 'True').lower() == 'true'
+    ARCHIVE_DATABASE_PATH = os.environ.get('ARCHIVE_DATABASE_PATH', str(DATABASE_PATH.with_name('archive.db')))
+    MESSAGE_RETENTION_DAYS = int(os.environ.get('MESSAGE_RETENTION_DAYS', '365'))  # Read messages only
+    INTAKE_RETENTION_DAYS = int(os.environ.get('INTAKE_RETENTION_DAYS', '730'))
+    INTAKE_TERMINAL_STATUSES = ('archived', 'completed')  # Archived sooner, once untouched for the grace period
+    INTAKE_TERMINAL_GRACE_DAYS = int(os.environ.get('INTAKE_TERMINAL_GRACE_DAYS', '90'))
+    RETENTION_INTERVAL_HOURS = 24   # How often one worker runs the job
+    RETENTION_BATCH_SIZE = 200      # Rows moved per transaction
+    RETENTION_BATCH_PAUSE_MS = 50   # Pause between batches so requests get the write lock
+    VACUUM_PAGES_PER_STEP = 256     # Free pages returned per incremental_vacuum step
+    
+    # Online backups: compressed snapshots of the database (see backup.py)
+    BACKUP_ENABLED = os.environ.get('BACKUP_ENABLED', 'True').lower() == 'true'
+    BACKUP_DIR = os.environ.get('BACKUP_DIR', str(DATABASE_PATH.parent / 'backups'))
+    BACKUP_INTERVAL_HOURS = float(os.environ.get('BACKUP_INTERVAL_HOURS', '24'))
+    BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', '7'))  # Snapshots kept; older ones are deleted
+    BACKUP_PAGES_PER_STEP = 256     # Pages copied per step; writers only wait for one step
+    BACKUP_STEP_PAUSE_MS = 10       # Pause between steps
+    BACKUP_MAX_RESTARTS = 3         # Writes restart a stepped copy; after this many, copy in one step
+    # Optional command run after each snapshot to ship it off the instance; {path} is the
+    # snapshot file, e.g. "rclone copy {path} remote:injoy-backups"
+    BACKUP_SHIP_COMMAND = os.environ.get('BACKUP_SHIP_COMMAND')
+    
     # Email settings (using Resend - 3,000 free emails/month)
     # Note: API key must be set via RESEND_API_KEY environment variable in Render
     # No default fallback for security - ensures production always uses Render env var
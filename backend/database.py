@@ -1,138 +1,620 @@
 """
 Database initialization and helper functions for Jamie's Beauty Studio.
 """
+import re
 import sqlite3
-from pathlib import Path
-from config import DATABASE_PATH
+import time
+from config import Config
+from storage import get_backend
+import flags
+import shared_cache
 
 
 def get_db_connection():
-    """Create and return a database connection."""
-    # Ensure the database directory exists
-    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    """Return a pooled database connection. Call close() to give it back."""
+    return get_backend().connect()
+
+
+class RawJSON:
+    """UTF-8 JSON that has already been serialized (by SQLite).
+    
+    The app's JSON provider embeds data verbatim; row_count is the number
+    of rows in the array.
+    """
+    
+    __slots__ = ('data', 'row_count')
+    
+    def __init__(self, data, row_count=0):
+        self.data = data
+        self.row_count = row_count
+
+
+# SELECT statement -> json_object() wrapper built from its column names
+_json_queries = {}
+
+
+def query_json(sql, params=()):
+    """Run a SELECT and return its rows as a RawJSON array of objects.
+    
+    Each row is turned into a JSON object by SQLite's json_object(), so no
+    per-row dict or per-value Python objects are created. PostgreSQL builds
+    the whole array with json_agg() instead.
+    """
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        if not get_backend().supports('json_object'):
+            data, count = conn.execute(
+                f"SELECT COALESCE(json_agg(q), '[]')::text, COUNT(*) FROM ({sql}) q", params
+            ).fetchone()
+            return RawJSON(data.encode(), count)
+        
+        json_sql = _json_queries.get(sql)
+        if json_sql is None:
+            cursor = conn.execute(f'SELECT * FROM ({sql}) LIMIT 0', params)
+            pairs = ', '.join(f"'{col[0]}', \"{col[0]}\"" for col in cursor.description)
+            json_sql = f'SELECT CAST(json_object({pairs}) AS BLOB) FROM ({sql})'
+            _json_queries[sql] = json_sql
+        
+        objects = [row[0] for row in conn.execute(json_sql, params)]
+    finally:
+        conn.close()
+    
+    if not objects:
+        return RawJSON(b'[]')
+    # Bracket the first and last rows so the join is the only full-size copy
+    objects[0] = b'[' + objects[0]
+    objects[-1] += b']'
+    return RawJSON(b','.join(objects), len(objects))
+
+
+# Table definitions: table -> [(column, declaration), ...] in column order.
+# init_db() builds the CREATE TABLE statements from these and records.py
+# builds the typed row records from them.
+SCHEMA = {
+    'services': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        ('category', 'TEXT NOT NULL'),
+        ('name', 'TEXT NOT NULL'),
+        ('description', 'TEXT'),
+        ('duration', 'INTEGER NOT NULL'),
+        ('price', 'REAL NOT NULL'),
+        ('is_active', 'BOOLEAN DEFAULT 1'),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+    ],
+    'bookings': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        ('service_id', 'INTEGER NOT NULL'),
+        ('client_name', 'TEXT NOT NULL'),
+        ('client_email', 'TEXT NOT NULL'),
+        ('client_phone', 'TEXT'),
+        ('booking_date', 'DATE NOT NULL'),
+        ('booking_time', 'TIME NOT NULL'),
+        ('notes', 'TEXT'),
+        ('status', "TEXT DEFAULT 'pending'"),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+        ('client_id', 'INTEGER REFERENCES clients (id)'),
+    ],
+    'contact_messages': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        ('name', 'TEXT NOT NULL'),
+        ('email', 'TEXT NOT NULL'),
+        ('subject', 'TEXT'),
+        ('message', 'TEXT NOT NULL'),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+        ('is_read', 'BOOLEAN DEFAULT 0'),
+        ('client_id', 'INTEGER REFERENCES clients (id)'),
+    ],
+    'gallery_images': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        ('filename', 'TEXT NOT NULL'),
+        ('alt_text', 'TEXT'),
+        ('category', 'TEXT'),
+        ('is_featured', 'BOOLEAN DEFAULT 0'),
+        ('sort_order', 'INTEGER DEFAULT 0'),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+    ],
+    # Client intake forms
+    'intake_forms': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        
+        # Client Information
+        ('client_name', 'TEXT NOT NULL'),
+        ('phone', 'TEXT'),
+        ('email', 'TEXT NOT NULL'),
+        ('client_type', "TEXT DEFAULT 'adult'"),
+        
+        # Service Location
+        ('service_location', "TEXT DEFAULT 'in-salon'"),
+        ('address', 'TEXT'),
+        
+        # Service Requested
+        ('service_requested', 'TEXT'),
+        
+        # Haircut Details
+        ('hair_length', 'TEXT'),
+        ('desired_style', 'TEXT'),
+        ('desired_style_other', 'TEXT'),
+        ('hair_type', 'TEXT'),
+        
+        # Sensory & Support Needs
+        ('sensitive_to_noise', 'BOOLEAN DEFAULT 0'),
+        ('sensitive_to_touch', 'BOOLEAN DEFAULT 0'),
+        ('does_not_like_water', 'BOOLEAN DEFAULT 0'),
+        ('nervous_anxious', 'BOOLEAN DEFAULT 0'),
+        ('enjoys_fidget_toys', 'BOOLEAN DEFAULT 0'),
+        ('needs_weighted_cape', 'BOOLEAN DEFAULT 0'),
+        ('requires_quiet_environment', 'BOOLEAN DEFAULT 0'),
+        ('other_sensory_needs', 'TEXT'),
+        
+        # Mobility & Safety
+        ('uses_wheelchair', 'BOOLEAN DEFAULT 0'),
+        ('limited_mobility', 'BOOLEAN DEFAULT 0'),
+        ('has_behaviours', 'BOOLEAN DEFAULT 0'),
+        ('behaviour_notes', 'TEXT'),
+        
+        # Additional Notes
+        ('additional_notes', 'TEXT'),
+        
+        # Meta
+        ('status', "TEXT DEFAULT 'new'"),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+        ('updated_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+        ('client_id', 'INTEGER REFERENCES clients (id)'),
+        ('support_flags', 'INTEGER NOT NULL DEFAULT 0'),  # Bitmask of the flags above, see flags.py
+    ],
+    # One row per person, keyed by lower-cased email; the tables above point here
+    'clients': [
+        ('id', 'INTEGER PRIMARY KEY'),  # No AUTOINCREMENT: upserts would burn ids
+        ('email', 'TEXT NOT NULL UNIQUE'),
+        ('name', 'TEXT'),
+        ('phone', 'TEXT'),  # Digits only, see normalize_phone()
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+        ('updated_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+    ],
+    # Recurring client inquiries from the booking page
+    'inquiries': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        ('first_name', 'TEXT NOT NULL'),
+        ('last_name', 'TEXT NOT NULL'),
+        ('email', 'TEXT NOT NULL'),
+        ('phone', 'TEXT'),
+        ('inquiry_type', 'TEXT'),
+        ('message', 'TEXT NOT NULL'),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+        ('client_id', 'INTEGER REFERENCES clients (id)'),
+    ],
+    # Dashboard aggregates, kept current by STAT_TRIGGERS
+    'stat_counters': [
+        ('metric', 'TEXT NOT NULL'),  # intake_status, unread_messages, booking_status, bookings_day, bookings_week
+        ('bucket', 'TEXT NOT NULL'),  # Status, date or week start ('' for single counters)
+        ('count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('amount', 'REAL NOT NULL DEFAULT 0'),  # Revenue from services.price
+    ],
+    # Holds a row while retention archives, inside its transaction, so the
+    # DELETE stat triggers leave the archived rows' counts in place
+    'stats_paused': [
+        ('reason', 'TEXT PRIMARY KEY'),
+    ],
+    # Last run of periodic jobs shared by all workers (retention, ...)
+    'maintenance_runs': [
+        ('task', 'TEXT PRIMARY KEY'),
+        ('last_run', 'REAL NOT NULL'),  # Unix time
+    ],
+    # Ordered log of model writes for live admin views, see change_log.py
+    'change_log': [
+        ('seq', 'INTEGER PRIMARY KEY AUTOINCREMENT'),  # Never reused, so clients can resume after it
+        ('table_name', 'TEXT NOT NULL'),
+        ('row_id', 'INTEGER NOT NULL'),
+        ('action', 'TEXT NOT NULL'),  # created, status_changed, updated, deleted
+        ('status', 'TEXT'),  # The row's status after the change
+        ('changed_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+    ],
+    # Weekly opening hours, one row per open weekday; see availability.py
+    'business_hours': [
+        ('weekday', 'INTEGER PRIMARY KEY'),  # 0 = Monday ... 6 = Sunday
+        ('open_minute', 'INTEGER NOT NULL'),  # Minutes since midnight
+        ('close_minute', 'INTEGER NOT NULL'),
+        ('slot_minutes', 'INTEGER NOT NULL'),  # Spacing of offered start times
+    ],
+    # Days off and holidays (inclusive ranges); no bookings on them
+    'blackout_dates': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        ('start_date', 'DATE NOT NULL'),
+        ('end_date', 'DATE NOT NULL'),
+        ('reason', 'TEXT'),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+    ],
+    # Time taken out of a single day, e.g. for a mobile visit
+    'schedule_blocks': [
+        ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+        ('block_date', 'DATE NOT NULL'),
+        ('start_minute', 'INTEGER NOT NULL'),
+        ('end_minute', 'INTEGER NOT NULL'),
+        ('kind', "TEXT DEFAULT 'mobile'"),
+        ('notes', 'TEXT'),
+        ('created_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP'),
+    ],
+    # Stored responses for Idempotency-Key retries, see idempotency.py
+    'idempotency_keys': [
+        ('scope', 'TEXT NOT NULL'),  # Endpoint name
+        ('idempotency_key', 'TEXT NOT NULL'),
+        ('request_hash', 'TEXT NOT NULL'),
+        ('status_code', 'INTEGER'),  # NULL while the first request is in flight
+        ('content_type', 'TEXT'),
+        ('response_body', 'BLOB'),
+        ('created_at', 'REAL NOT NULL'),  # Unix time, for TTL cleanup
+    ],
+}
+
+# Table-level constraints, appended after the column definitions
+TABLE_CONSTRAINTS = {
+    'bookings': ['FOREIGN KEY (service_id) REFERENCES services (id)'],
+    'idempotency_keys': ['PRIMARY KEY (scope, idempotency_key)'],
+    'stat_counters': ['PRIMARY KEY (metric, bucket)'],
+}
+
+
+# Secondary indexes: (name, table, columns[, partial index WHERE clause])
+INDEXES = [
+    # Schedule views: date range, optionally filtered by status, in time order
+    ('idx_bookings_date_status_time', 'bookings', 'booking_date, status, booking_time'),
+    # Client 360 lookups and a client's booking history
+    ('idx_bookings_client_id', 'bookings', 'client_id, booking_date'),
+    ('idx_intake_forms_client_id', 'intake_forms', 'client_id, created_at'),
+    ('idx_contact_messages_client_id', 'contact_messages', 'client_id, created_at'),
+    ('idx_inquiries_client_id', 'inquiries', 'client_id, created_at'),
+    # TTL cleanup of stored idempotent responses
+    ('idx_idempotency_keys_created', 'idempotency_keys', 'created_at'),
+    # Support-needs filtering; only forms with at least one flag are indexed
+    ('idx_intake_forms_support_flags', 'intake_forms', 'support_flags, client_id', 'support_flags != 0'),
+    # Change log cleanup by age
+    ('idx_change_log_changed_at', 'change_log', 'changed_at'),
+    # Upcoming blackouts and blocks, loaded into each worker's weekly plan
+    ('idx_blackout_dates_end', 'blackout_dates', 'end_date'),
+    ('idx_schedule_blocks_date', 'schedule_blocks', 'block_date, start_minute'),
+]
+
+# Indexes no query uses any more, dropped from existing databases
+RETIRED_INDEXES = [
+    # Booking history now goes through client_id (idx_bookings_client_id)
+    'idx_bookings_client_date',
+]
+
+
+# Monday of a booking date's week, as 'YYYY-MM-DD'
+WEEK_START_SQL = "date({}, 'weekday 0', '-6 days')"
+
+
+def _bump_stat(metric, bucket, count, amount='0', where='1'):
+    """Trigger statement adding count/amount to one stat_counters row."""
+    return f"""
+        INSERT INTO stat_counters (metric, bucket, count, amount)
+        SELECT '{metric}', {bucket}, {count}, {amount} WHERE {where}
+        ON CONFLICT (metric, bucket) DO UPDATE SET
+            count = count + excluded.count, amount = amount + excluded.amount;"""
+
+
+def _booking_stats(row, sign):
+    """Add (sign 1) or remove (sign -1) a booking row's share of the stats.
+    
+    Cancelled bookings count toward their status only, not toward the
+    per-day/per-week bookings and revenue.
+    """
+    active = f"COALESCE({row}.status, '') != 'cancelled'"
+    revenue = f"{sign} * COALESCE((SELECT price FROM services WHERE id = {row}.service_id), 0)"
+    return [
+        _bump_stat('booking_status', f"COALESCE({row}.status, 'pending')", sign),
+        _bump_stat('bookings_day', f'{row}.booking_date', sign, revenue, active),
+        _bump_stat('bookings_week', WEEK_START_SQL.format(f'{row}.booking_date'), sign, revenue, active),
+    ]
+
+
+def _service_price_stats(period, bucket):
+    """Re-price the revenue of a service's bookings after its price changes."""
+    return f"""
+        INSERT INTO stat_counters (metric, bucket, count, amount)
+        SELECT '{period}', {bucket}, 0, (NEW.price - OLD.price) * COUNT(*) FROM bookings
+        WHERE service_id = NEW.id AND COALESCE(status, '') != 'cancelled'
+        GROUP BY 2
+        ON CONFLICT (metric, bucket) DO UPDATE SET amount = amount + excluded.amount;"""
+
+
+# Deletes made while archiving (see retention.py) keep their counts: the
+# dashboard's intake and message figures cover archived rows too
+STATS_NOT_PAUSED = 'NOT EXISTS (SELECT 1 FROM stats_paused)'
+
+# Triggers keeping stat_counters in step with the tables they summarize:
+# (name, table, event, WHEN condition or None, [statements])
+STAT_TRIGGERS = [
+    ('trg_stats_intake_insert', 'intake_forms', 'INSERT', None,
+     [_bump_stat('intake_status', "COALESCE(NEW.status, 'new')", 1)]),
+    ('trg_stats_intake_status', 'intake_forms', 'UPDATE OF status', 'OLD.status IS NOT NEW.status',
+     [_bump_stat('intake_status', "COALESCE(OLD.status, 'new')", -1),
+      _bump_stat('intake_status', "COALESCE(NEW.status, 'new')", 1)]),
+    ('trg_stats_intake_delete', 'intake_forms', 'DELETE', STATS_NOT_PAUSED,
+     [_bump_stat('intake_status', "COALESCE(OLD.status, 'new')", -1)]),
+    
+    ('trg_stats_message_insert', 'contact_messages', 'INSERT', 'NOT COALESCE(NEW.is_read, 0)',
+     [_bump_stat('unread_messages', "''", 1)]),
+    ('trg_stats_message_read', 'contact_messages', 'UPDATE OF is_read',
+     'COALESCE(OLD.is_read, 0) != COALESCE(NEW.is_read, 0)',
+     [_bump_stat('unread_messages', "''", 'CASE WHEN NEW.is_read THEN -1 ELSE 1 END')]),
+    ('trg_stats_message_delete', 'contact_messages', 'DELETE',
+     f'NOT COALESCE(OLD.is_read, 0) AND {STATS_NOT_PAUSED}',
+     [_bump_stat('unread_messages', "''", -1)]),
+    
+    ('trg_stats_booking_insert', 'bookings', 'INSERT', None, _booking_stats('NEW', 1)),
+    ('trg_stats_booking_update', 'bookings', 'UPDATE OF status, booking_date, service_id', None,
+     _booking_stats('OLD', -1) + _booking_stats('NEW', 1)),
+    ('trg_stats_booking_delete', 'bookings', 'DELETE', None, _booking_stats('OLD', -1)),
+    
+    ('trg_stats_service_price', 'services', 'UPDATE OF price', 'OLD.price IS NOT NEW.price',
+     [_service_price_stats('bookings_day', 'booking_date'),
+      _service_price_stats('bookings_week', WEEK_START_SQL.format('booking_date'))]),
+]
+
+
+def create_trigger_sql(name, table, event, when, statements):
+    """Build the CREATE TRIGGER statement for an entry of STAT_TRIGGERS."""
+    condition = f' WHEN {when}' if when else ''
+    body = ''.join(statements)
+    return f'CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}{condition}\nBEGIN{body}\nEND'
+
+
+def column_names(table):
+    """Column names of a table, in SCHEMA order."""
+    return [name for name, _ in SCHEMA[table]]
+
+
+def create_table_sql(table, schema=None, extra_columns=()):
+    """Build the CREATE TABLE statement for a table in SCHEMA.
+    
+    schema names an attached database to create it in (e.g. 'archive');
+    extra_columns are (name, declaration) pairs appended after SCHEMA's.
+    """
+    backend = get_backend()
+    definitions = [
+        f'{name} {backend.column_declaration(declaration)}'
+        for name, declaration in SCHEMA[table] + list(extra_columns)
+    ]
+    definitions += TABLE_CONSTRAINTS.get(table, [])
+    body = ',\n    '.join(definitions)
+    qualified = f'{schema}.{table}' if schema else table
+    return f'CREATE TABLE IF NOT EXISTS {qualified} (\n    {body}\n)'
+
+
+def add_missing_columns(cursor, table, schema=None, extra_columns=()):
+    """ALTER an existing table to add any SCHEMA columns it doesn't have yet."""
+    backend = get_backend()
+    qualified = f'{schema}.{table}' if schema else table
+    existing = backend.existing_columns(cursor.connection, table, schema)
+    for name, declaration in SCHEMA[table] + list(extra_columns):
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {qualified} ADD COLUMN {name} {backend.column_declaration(declaration)}')
+
+
+def normalize_email(email):
+    """Canonical form of an email address for client matching."""
+    return (email or '').strip().lower() or None
+
+
+def normalize_phone(phone):
+    """Digits-only phone number, without a leading North American 1."""
+    digits = ''.join(ch for ch in (phone or '') if ch.isdigit())
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits or None
+
+
+def upsert_client(conn, email, name=None, phone=None):
+    """Find or create the client for an email on conn; returns its id.
+    
+    Runs inside the caller's transaction. Name and phone are filled in or
+    refreshed when given. Returns None when there is no email.
+    """
+    email = normalize_email(email)
+    if not email:
+        return None
+    row = conn.execute('''
+        INSERT INTO clients (email, name, phone) VALUES (?, ?, ?)
+        ON CONFLICT (email) DO UPDATE SET
+            name = COALESCE(excluded.name, clients.name),
+            phone = COALESCE(excluded.phone, clients.phone),
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING id
+    ''', (email, (name or '').strip() or None, normalize_phone(phone))).fetchone()
+    return row[0]
+
+
+def _backfill_clients(conn):
+    """Create clients for existing rows and link the rows to them."""
+    sources = [
+        ('bookings', 'client_email', 'client_name', 'client_phone'),
+        ('intake_forms', 'email', 'client_name', 'phone'),
+        ('contact_messages', 'email', 'name', 'NULL'),
+    ]
+    for table, email_col, name_col, phone_col in sources:
+        rows = conn.execute(
+            f'SELECT id, {email_col}, {name_col}, {phone_col} FROM {table} WHERE client_id IS NULL ORDER BY id'
+        ).fetchall()
+        links = [(upsert_client(conn, email, name, phone), row_id) for row_id, email, name, phone in rows]
+        conn.executemany(f'UPDATE {table} SET client_id = ? WHERE id = ?', links)
+
+
+def _rebuild_stats(conn):
+    """Recompute stat_counters from scratch; the triggers keep it current after."""
+    if not get_backend().supports('triggers'):
+        return  # Stats.get_summary() reads the tables directly
+    conn.execute('DELETE FROM stat_counters')
+    conn.execute('''
+        INSERT INTO stat_counters (metric, bucket, count)
+        SELECT 'intake_status', COALESCE(status, 'new'), COUNT(*) FROM intake_forms GROUP BY 2
+    ''')
+    conn.execute('''
+        INSERT INTO stat_counters (metric, bucket, count)
+        SELECT 'unread_messages', '', COUNT(*) FROM contact_messages WHERE NOT COALESCE(is_read, 0)
+    ''')
+    conn.execute('''
+        INSERT INTO stat_counters (metric, bucket, count)
+        SELECT 'booking_status', COALESCE(status, 'pending'), COUNT(*) FROM bookings GROUP BY 2
+    ''')
+    for period, bucket in (('bookings_day', 'b.booking_date'),
+                           ('bookings_week', WEEK_START_SQL.format('b.booking_date'))):
+        conn.execute(f'''
+            INSERT INTO stat_counters (metric, bucket, count, amount)
+            SELECT '{period}', {bucket}, COUNT(*), COALESCE(SUM(s.price), 0)
+            FROM bookings b LEFT JOIN services s ON s.id = b.service_id
+            WHERE COALESCE(b.status, '') != 'cancelled'
+            GROUP BY 2
+        ''')
+
+
+def _backfill_support_flags(conn):
+    """Encode existing intake forms' BOOLEAN flag columns into support_flags."""
+    conn.execute(f'UPDATE intake_forms SET support_flags = {flags.backfill_sql()}')
+
+
+def _seed_business_hours(conn):
+    """Open every weekday with the hours that used to be fixed in Config."""
+    conn.executemany(
+        'INSERT INTO business_hours (weekday, open_minute, close_minute, slot_minutes) VALUES (?, ?, ?, ?) '
+        'ON CONFLICT (weekday) DO NOTHING',
+        [(weekday, Config.BOOKING_START_HOUR * 60, Config.BOOKING_END_HOUR * 60, Config.TIME_SLOT_DURATION)
+         for weekday in range(7)]
+    )
+
+
+def _recreate_delete_stat_triggers(conn):
+    """Replace the DELETE stat triggers with the versions that skip archiving."""
+    if not get_backend().supports('triggers'):
+        return
+    for trigger in STAT_TRIGGERS:
+        if trigger[0] in ('trg_stats_intake_delete', 'trg_stats_message_delete'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {trigger[0]}')
+            conn.execute(create_trigger_sql(*trigger))
+
+
+# Data migrations, applied in order and tracked with PRAGMA user_version
+# (a schema_version table on PostgreSQL).
+# New tables, columns and indexes come from SCHEMA/INDEXES in init_db();
+# migrations move or backfill data, and replace triggers whose definition
+# changed (init_db() only creates missing ones).
+MIGRATIONS = [
+    (1, _backfill_clients),
+    (2, _rebuild_stats),
+    (3, _backfill_support_flags),
+    (4, _seed_business_hours),
+    (5, _recreate_delete_stat_triggers),
+]
+
+
+def run_migrations(conn):
+    """Apply pending MIGRATIONS, each in its own IMMEDIATE transaction."""
+    backend = get_backend()
+    for version, migrate in MIGRATIONS:
+        conn.execute('BEGIN IMMEDIATE')
+        # Re-read under the write lock; another worker may have just done it
+        if backend.get_version(conn) >= version:
+            conn.rollback()
+            continue
+        migrate(conn)
+        backend.set_version(conn, version)
+        conn.commit()
+        print(f"Applied database migration {version} ({migrate.__name__}).")
+
+
+def enable_incremental_vacuum(conn, schema='main'):
+    """Switch a database to auto_vacuum=INCREMENTAL.
     
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    conn.row_factory = sqlite3.Row  # Enable column access by name
-    return conn
+    Free pages can then be handed back to the filesystem a few at a time
+    with PRAGMA incremental_vacuum (see retention.py). An existing file
+    needs one full VACUUM for the setting to take effect; that is skipped,
+    and retried on the next start, if another connection is busy.
+    """
+    if conn.execute(f'PRAGMA {schema}.auto_vacuum').fetchone()[0] == 2:
+        return
+    conn.execute(f'PRAGMA {schema}.auto_vacuum = INCREMENTAL')
+    if not conn.execute(f'SELECT COUNT(*) FROM {schema}.sqlite_master').fetchone()[0]:
+        return  # Empty database: the setting applies as tables are created
+    try:
+        conn.execute(f'VACUUM {schema}')
+        print(f"Enabled incremental vacuum on the {schema} database.")
+    except sqlite3.OperationalError as e:
+        print(f"Could not enable incremental vacuum yet: {e}")
+
+
+def claim_run(conn, task, interval_seconds):
+    """True if this process should run task now, recording the run for the others."""
+    now = time.time()
+    claimed = conn.execute('''
+        INSERT INTO maintenance_runs (task, last_run) VALUES (?, ?)
+        ON CONFLICT (task) DO UPDATE SET last_run = excluded.last_run
+        WHERE last_run <= ?
+        RETURNING 1
+    ''', (task, now, now - interval_seconds)).fetchone()
+    conn.commit()
+    return claimed is not None
+
+
+def table_order():
+    """SCHEMA's tables with every table after the ones it references.
+    
+    SQLite accepts forward references; PostgreSQL needs the target to exist.
+    """
+    ordered = []
+    
+    def visit(table):
+        if table in ordered:
+            return
+        definitions = [declaration for _, declaration in SCHEMA[table]] + TABLE_CONSTRAINTS.get(table, [])
+        for definition in definitions:
+            for target in re.findall(r'REFERENCES (\w+)', definition):
+                if target != table:
+                    visit(target)
+        ordered.append(table)
+    
+    for table in SCHEMA:
+        visit(table)
+    return ordered
 
 
 def init_db():
     """Initialize the database with all required tables."""
+    backend = get_backend()
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # Create services table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS services (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            category TEXT NOT NULL,
-            name TEXT NOT NULL,
-            description TEXT,
-            duration INTEGER NOT NULL,
-            price REAL NOT NULL,
-            is_active BOOLEAN DEFAULT 1,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create bookings table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            service_id INTEGER NOT NULL,
-            client_name TEXT NOT NULL,
-            client_email TEXT NOT NULL,
-            client_phone TEXT,
-            booking_date DATE NOT NULL,
-            booking_time TIME NOT NULL,
-            notes TEXT,
-            status TEXT DEFAULT 'pending',
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (service_id) REFERENCES services (id)
-        )
-    ''')
+    if backend.supports('pragmas'):
+        enable_incremental_vacuum(conn)
     
-    # Create contact_messages table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS contact_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            subject TEXT,
-            message TEXT NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            is_read BOOLEAN DEFAULT 0
-        )
-    ''')
+    for table in table_order():
+        cursor.execute(create_table_sql(table))
+        add_missing_columns(cursor, table)
     
-    # Create gallery_images table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gallery_images (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            filename TEXT NOT NULL,
-            alt_text TEXT,
-            category TEXT,
-            is_featured BOOLEAN DEFAULT 0,
-            sort_order INTEGER DEFAULT 0,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    for name, table, columns, *where in INDEXES:
+        partial = f' WHERE {where[0]}' if where else ''
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns}){partial}')
+    for name in RETIRED_INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
     
-    # Create intake_forms table for client intake
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS intake_forms (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            
-            -- Client Information
-            client_name TEXT NOT NULL,
-            phone TEXT,
-            email TEXT NOT NULL,
-            client_type TEXT DEFAULT 'adult',
-            
-            -- Service Location
-            service_location TEXT DEFAULT 'in-salon',
-            address TEXT,
-            
-            -- Service Requested
-            service_requested TEXT,
-            
-            -- Haircut Details
-            hair_length TEXT,
-            desired_style TEXT,
-            desired_style_other TEXT,
-            hair_type TEXT,
-            
-            -- Sensory & Support Needs (stored as comma-separated or JSON)
-            sensitive_to_noise BOOLEAN DEFAULT 0,
-            sensitive_to_touch BOOLEAN DEFAULT 0,
-            does_not_like_water BOOLEAN DEFAULT 0,
-            nervous_anxious BOOLEAN DEFAULT 0,
-            enjoys_fidget_toys BOOLEAN DEFAULT 0,
-            needs_weighted_cape BOOLEAN DEFAULT 0,
-            requires_quiet_environment BOOLEAN DEFAULT 0,
-            other_sensory_needs TEXT,
-            
-            -- Mobility & Safety
-            uses_wheelchair BOOLEAN DEFAULT 0,
-            limited_mobility BOOLEAN DEFAULT 0,
-            has_behaviours BOOLEAN DEFAULT 0,
-            behaviour_notes TEXT,
-            
-            -- Additional Notes
-            additional_notes TEXT,
-            
-            -- Meta
-            status TEXT DEFAULT 'new',
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    # PostgreSQL has no stat triggers; Stats.get_summary() aggregates the tables there
+    if backend.supports('triggers'):
+        for trigger in STAT_TRIGGERS:
+            cursor.execute(create_trigger_sql(*trigger))
     
     conn.commit()
+    run_migrations(conn)
     conn.close()
     print("Database initialized successfully!")
 
 
+def _log_seeded(conn, table):
+    """Add a freshly seeded table's rows to the change log."""
+    from change_log import log_changes, CREATED  # change_log imports this module
+    log_changes(conn, table, [row[0] for row in conn.execute(f'SELECT id FROM {table} ORDER BY id')], CREATED)
+
+
 def seed_services():
     """Seed the database with initial services."""
     conn = get_db_connection()
@@ -178,9 +660,11 @@ def seed_services():
         INSERT INTO services (category, name, description, duration, price)
         VALUES (?, ?, ?, ?, ?)
     ''', services)
+    _log_seeded(conn, 'services')
     
     conn.commit()
     conn.close()
+    shared_cache.bump(shared_cache.CATALOGUE)
     print(f"Seeded {len(services)} services successfully!")
 
 
@@ -215,9 +699,11 @@ def seed_gallery():
         INSERT INTO gallery_images (filename, alt_text, category, is_featured, sort_order)
         VALUES (?, ?, ?, ?, ?)
     ''', images)
+    _log_seeded(conn, 'gallery_images')
     
     conn.commit()
     conn.close()
+    shared_cache.bump(shared_cache.CATALOGUE)
     print(f"Seeded {len(images)} gallery images successfully!")
 
 
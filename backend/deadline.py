@@ -0,0 +1,64 @@
+"""
+Per-request deadlines for InJoy Beauty.
+Each request gets a time budget (Config.ROUTE_DEADLINES, falling back to
+REQUEST_DEADLINE_SECONDS) well inside gunicorn's 30 second worker timeout.
+Pooled SQLite connections stop work past the deadline through their
+progress handler and busy_timeout, and email sends stop waiting on
+Resend, so a stalled dependency ends in a quick 503 or a queued email
+instead of the worker being killed mid-request.
+"""
+import time
+from contextvars import ContextVar
+from flask import request, jsonify, g
+from config import Config
+
+# time.monotonic() the current request must finish by, or None outside requests
+_deadline = ContextVar('request_deadline', default=None)
+
+
+def remaining():
+    """Seconds left in the current request's budget, or None if unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def expired():
+    """True once the current request has used up its budget."""
+    deadline = _deadline.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def timeout_for(seconds):
+    """`seconds`, shortened to what is left of the request's budget."""
+    left = remaining()
+    return seconds if left is None else min(seconds, left)
+
+
+def init_deadlines(app):
+    """Register the hooks that start, enforce and clear request deadlines."""
+
+    @app.before_request
+    def start_deadline():
+        budget = Config.ROUTE_DEADLINES.get(request.endpoint, Config.REQUEST_DEADLINE_SECONDS)
+        g.deadline_token = _deadline.set(time.monotonic() + budget)
+
+    @app.after_request
+    def report_deadline(response):
+        # Routes turn any exception into a 500; if it was the deadline
+        # cutting a query or lock wait short, tell the client to retry.
+        if response.status_code >= 500 and expired():
+            response = jsonify({
+                'success': False,
+                'error': 'The server is busy right now - please try again in a moment.'
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = '2'
+        return response
+
+    @app.teardown_request
+    def clear_deadline(_exc):
+        token = g.pop('deadline_token', None)
+        if token is not None:
+            _deadline.reset(token)
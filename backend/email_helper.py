@@ -2,40 +2,54 @@
 Email helper for sending notifications from InJoy Beauty.
 Uses Resend for reliable email delivery.
 """
-import resend
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from config import Config
+import deadline
+import flags
+import rate_limit
 
-# Initialize Resend
-resend.api_key = Config.RESEND_API_KEY
+# The Resend SDK pulls in requests and its HTTP stack, so it is imported on
+# first use (or during worker warmup) instead of at app import.
+_resend = None
+
+
+def load_resend():
+    """Import and configure the Resend SDK once, returning the module."""
+    global _resend
+    if _resend is None:
+        import resend
+        resend.api_key = Config.RESEND_API_KEY
+        _resend = resend
+    return _resend
+
+
+# Sends run here so a request can stop waiting on a stalled Resend call;
+# a send that outlives the wait finishes in the background ("queued").
+_send_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='email')
+EMAIL_QUEUED = 'queued'
+
+
+def send_email(params):
+    """Send params through Resend, waiting at most EMAIL_TIMEOUT_SECONDS.
+
+    Returns Resend's response, or None if the send is still in flight when
+    the wait (capped by the request deadline) runs out.
+    """
+    # The form is saved by now; don't hold a write slot while Resend is slow
+    rate_limit.release_write_slot()
+    future = _send_executor.submit(lambda: load_resend().Emails.send(params))
+    try:
+        return future.result(timeout=deadline.timeout_for(Config.EMAIL_TIMEOUT_SECONDS))
+    except TimeoutError:
+        return None
 
 
 def generate_email_html(form_data):
     """Generate HTML email content for intake form."""
-    # Build sensory needs list
-    sensory_needs = []
-    if form_data.get('sensitive_to_noise'):
-        sensory_needs.append("Sensitive to loud noise")
-    if form_data.get('sensitive_to_touch'):
-        sensory_needs.append("Sensitive to touch")
-    if form_data.get('does_not_like_water'):
-        sensory_needs.append("Does not like water")
-    if form_data.get('nervous_anxious'):
-        sensory_needs.append("Nervous/anxious during appointments")
-    if form_data.get('enjoys_fidget_toys'):
-        sensory_needs.append("Enjoys fidget toys")
-    if form_data.get('needs_weighted_cape'):
-        sensory_needs.append("Would benefit from weighted cape")
-    if form_data.get('requires_quiet_environment'):
-        sensory_needs.append("Requires quiet/low-sensory environment")
-    
-    # Build mobility list
-    mobility_needs = []
-    if form_data.get('uses_wheelchair'):
-        mobility_needs.append("Uses wheelchair")
-    if form_data.get('limited_mobility'):
-        mobility_needs.append("Limited mobility")
-    if form_data.get('has_behaviours'):
-        mobility_needs.append("May have behaviours (see notes)")
+    # Build the sensory and mobility lists from the flag registry
+    support_flags = flags.encode(form_data)
+    sensory_needs = flags.labels(support_flags, 'sensory')
+    mobility_needs = flags.labels(support_flags, 'mobility')
     
     # HTML email body - clean headers without emojis for better compatibility
     html_body = f"""
@@ -104,7 +118,8 @@ def generate_email_html(form_data):
 def send_intake_notification(form_data, override_email=None):
     """
     Send email notification when a new intake form is submitted.
-    Returns True if sent, False if failed.
+    Returns True if sent, False if failed, or EMAIL_QUEUED if Resend was slow
+    and the send is finishing in the background.
     
     Args:
         form_data: Dictionary containing the form submission data
@@ -128,7 +143,10 @@ def send_intake_notification(form_data, override_email=None):
             "reply_to": form_data.get('email')
         }
         
-        response = resend.Emails.send(params)
+        response = send_email(params)
+        if response is None:
+            print(f"Email to {recipient} is taking a while - left sending in the background")
+            return EMAIL_QUEUED
         print(f"Email sent successfully to {recipient}! ID: {response.get('id')}")
         return True
         
@@ -191,7 +209,7 @@ def generate_inquiry_email_html(inquiry_data):
             <h2 style="color: #D4A5A5; margin-top: 0; font-size: 18px;">Client Information</h2>
             <p><strong>Name:</strong> {inquiry_data.get('firstName', '')} {inquiry_data.get('lastName', '')}</p>
             <p><strong>Email:</strong> <a href="mailto:{inquiry_data.get('email', '')}">{inquiry_data.get('email', 'N/A')}</a></p>
-            {f"<p><strong>Phone:</strong> <a href=\"tel:{inquiry_data.get('phone', '')}\">{inquiry_data.get('phone', 'Not provided')}</a></p>" if inquiry_data.get('phone') else ""}
+            {f"<p><strong>Phone:</strong> <a href='tel:{inquiry_data.get('phone', '')}'>{inquiry_data.get('phone', 'Not provided')}</a></p>" if inquiry_data.get('phone') else ""}
             <p><strong>Inquiry Type:</strong> {inquiry_data.get('inquiryType', 'Not specified').replace('-', ' ').title()}</p>
         </div>
         
@@ -213,7 +231,8 @@ def generate_inquiry_email_html(inquiry_data):
 def send_contact_notification(contact_data, override_email=None):
     """
     Send email notification when a contact form is submitted.
-    Returns True if sent, False if failed.
+    Returns True if sent, False if failed, or EMAIL_QUEUED if Resend was slow
+    and the send is finishing in the background.
     """
     if not Config.RESEND_API_KEY:
         print("Email not configured - RESEND_API_KEY not set.")
@@ -232,7 +251,10 @@ def send_contact_notification(contact_data, override_email=None):
             "reply_to": contact_data.get('email')
         }
         
-        response = resend.Emails.send(params)
+        response = send_email(params)
+        if response is None:
+            print(f"Email to {recipient} is taking a while - left sending in the background")
+            return EMAIL_QUEUED
         print(f"Contact email sent successfully to {recipient}! ID: {response.get('id')}")
         return True
         
@@ -244,7 +266,8 @@ def send_contact_notification(contact_data, override_email=None):
 def send_inquiry_notification(inquiry_data, override_email=None):
     """
     Send email notification when a recurring client inquiry is submitted.
-    Returns True if sent, False if failed.
+    Returns True if sent, False if failed, or EMAIL_QUEUED if Resend was slow
+    and the send is finishing in the background.
     """
     if not Config.RESEND_API_KEY:
         print("Email not configured - RESEND_API_KEY not set.")
@@ -264,7 +287,10 @@ def send_inquiry_notification(inquiry_data, override_email=None):
             "reply_to": inquiry_data.get('email')
         }
         
-        response = resend.Emails.send(params)
+        response = send_email(params)
+        if response is None:
+            print(f"Email to {recipient} is taking a while - left sending in the background")
+            return EMAIL_QUEUED
         print(f"Inquiry email sent successfully to {recipient}! ID: {response.get('id')}")
         return True
         
@@ -0,0 +1,58 @@
+"""
+Sensory and mobility support flags for InJoy Beauty intake forms.
+One registry of the yes/no questions on the intake form, each with a bit
+in intake_forms.support_flags. Form saving, the notification email and
+the support-needs filter all read it, so adding a question means adding
+one line here (plus its BOOLEAN column in database.SCHEMA).
+"""
+
+# (column, bit, group, label shown in the email), in the order they appear on the form
+SUPPORT_FLAGS = [
+    ('sensitive_to_noise', 1 << 0, 'sensory', 'Sensitive to loud noise'),
+    ('sensitive_to_touch', 1 << 1, 'sensory', 'Sensitive to touch'),
+    ('does_not_like_water', 1 << 2, 'sensory', 'Does not like water'),
+    ('nervous_anxious', 1 << 3, 'sensory', 'Nervous/anxious during appointments'),
+    ('enjoys_fidget_toys', 1 << 4, 'sensory', 'Enjoys fidget toys'),
+    ('needs_weighted_cape', 1 << 5, 'sensory', 'Would benefit from weighted cape'),
+    ('requires_quiet_environment', 1 << 6, 'sensory', 'Requires quiet/low-sensory environment'),
+    ('uses_wheelchair', 1 << 7, 'mobility', 'Uses wheelchair'),
+    ('limited_mobility', 1 << 8, 'mobility', 'Limited mobility'),
+    ('has_behaviours', 1 << 9, 'mobility', 'May have behaviours (see notes)'),
+]
+
+FLAG_COLUMNS = [column for column, _, _, _ in SUPPORT_FLAGS]
+FLAG_BITS = {column: bit for column, bit, _, _ in SUPPORT_FLAGS}
+
+
+def encode(data):
+    """Bitmask of the flags that are truthy in a form dict."""
+    mask = 0
+    for column, bit, _, _ in SUPPORT_FLAGS:
+        if data.get(column):
+            mask |= bit
+    return mask
+
+
+def column_values(mask):
+    """0/1 per flag column, in FLAG_COLUMNS order, for a bitmask."""
+    return [1 if mask & bit else 0 for _, bit, _, _ in SUPPORT_FLAGS]
+
+
+def labels(mask, group):
+    """Email labels of the flags set in mask that belong to group."""
+    return [label for _, bit, flag_group, label in SUPPORT_FLAGS if mask & bit and flag_group == group]
+
+
+def mask_for(names):
+    """Bitmask for a list of flag column names; raises ValueError on unknown names."""
+    mask = 0
+    for name in names:
+        if name not in FLAG_BITS:
+            raise ValueError(f'Unknown support flag: {name}')
+        mask |= FLAG_BITS[name]
+    return mask
+
+
+def backfill_sql():
+    """Expression rebuilding support_flags from the BOOLEAN (0/1) columns."""
+    return ' | '.join(f'(CASE WHEN {column} != 0 THEN {bit} ELSE 0 END)' for column, bit, _, _ in SUPPORT_FLAGS)
@@ -0,0 +1,212 @@
+"""
+Idempotency-Key support for InJoy Beauty's form posts.
+A retried POST carrying the same key gets the stored response back instead
+of inserting another row and sending another email.
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from flask import request, jsonify, make_response
+from config import Config
+from database import get_db_connection
+import deadline
+
+# In-flight keys in this worker -> Event set when the first request finishes.
+# Duplicates arriving on the same worker wait on it instead of polling SQLite.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Last TTL cleanup in this worker (monotonic seconds)
+_last_purge = 0.0
+PURGE_INTERVAL = 600
+
+
+def _ttl_seconds():
+    return Config.IDEMPOTENCY_TTL_HOURS * 3600
+
+
+def claim_key(scope, key, request_hash):
+    """Try to become the request that executes for (scope, key).
+
+    Returns ('new', None) if we claimed it, otherwise ('done', row) with
+    the stored response, ('pending', row) if the original is still running,
+    or ('mismatch', row) if the key was used for a different request body.
+    """
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        # An expired key is free to be reused
+        conn.execute(
+            'DELETE FROM idempotency_keys WHERE scope = ? AND idempotency_key = ? AND created_at < ?',
+            (scope, key, now - _ttl_seconds())
+        )
+        claimed = conn.execute('''
+            INSERT INTO idempotency_keys (scope, idempotency_key, request_hash, created_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT DO NOTHING
+            RETURNING 1
+        ''', (scope, key, request_hash, now)).fetchone()
+        row = None
+        if not claimed:
+            row = conn.execute('''
+                SELECT request_hash, status_code, content_type, response_body
+                FROM idempotency_keys WHERE scope = ? AND idempotency_key = ?
+            ''', (scope, key)).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+
+    if claimed:
+        return 'new', None
+    if row['request_hash'] != request_hash:
+        return 'mismatch', row
+    if row['status_code'] is None:
+        return 'pending', row
+    return 'done', row
+
+
+def is_known_key(scope, key):
+    """Whether (scope, key) is already claimed and unexpired.
+
+    A request carrying such a key is a retry: it is answered from the
+    stored response (or waits for the original), so it writes nothing new.
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            'SELECT 1 FROM idempotency_keys WHERE scope = ? AND idempotency_key = ? AND created_at >= ?',
+            (scope, key, time.time() - _ttl_seconds())
+        ).fetchone()
+    finally:
+        conn.close()
+    return row is not None
+
+
+def store_response(scope, key, response):
+    """Save the finished response so retries can replay it."""
+    conn = get_db_connection()
+    conn.execute('''
+        UPDATE idempotency_keys SET status_code = ?, content_type = ?, response_body = ?
+        WHERE scope = ? AND idempotency_key = ?
+    ''', (response.status_code, response.content_type, response.get_data(), scope, key))
+    conn.commit()
+    conn.close()
+
+
+def release_key(scope, key):
+    """Forget a claim whose request failed, so a retry runs it again."""
+    conn = get_db_connection()
+    conn.execute(
+        'DELETE FROM idempotency_keys WHERE scope = ? AND idempotency_key = ? AND status_code IS NULL',
+        (scope, key)
+    )
+    conn.commit()
+    conn.close()
+
+
+def purge_expired():
+    """Delete stored responses older than the TTL. Returns rows removed."""
+    conn = get_db_connection()
+    removed = conn.execute(
+        'DELETE FROM idempotency_keys WHERE created_at < ?',
+        (time.time() - _ttl_seconds(),)
+    ).rowcount
+    conn.commit()
+    conn.close()
+    return removed
+
+
+def _maybe_purge():
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge >= PURGE_INTERVAL:
+        _last_purge = now
+        purge_expired()
+
+
+def _replay(row):
+    response = make_response(row['response_body'], row['status_code'])
+    response.content_type = row['content_type']
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _wait_for_original(scope, key, request_hash, local_event):
+    """Wait for the request holding the key to finish, then replay it."""
+    wait_until = time.monotonic() + deadline.timeout_for(Config.IDEMPOTENCY_WAIT_SECONDS)
+    delay = 0.05
+    while time.monotonic() < wait_until:
+        if local_event is not None:
+            local_event.wait(max(0, wait_until - time.monotonic()))
+        else:
+            # Held by another worker - back off while polling
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        state, row = claim_key(scope, key, request_hash)
+        if state == 'done':
+            return _replay(row)
+        if state == 'new':
+            # The original failed and released the key; we run it now
+            return None
+        local_event = None
+
+    response = jsonify({'error': 'A request with this Idempotency-Key is still being processed'})
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def idempotent(view):
+    """Route decorator adding Idempotency-Key handling to a POST view.
+
+    Requests without the header run as before. Responses below 500 are
+    stored for Config.IDEMPOTENCY_TTL_HOURS and replayed for retries with
+    the same key and body; server errors release the key.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key', '').strip()
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+
+        _maybe_purge()
+        scope = request.endpoint
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        state, row = claim_key(scope, key, request_hash)
+        if state == 'mismatch':
+            return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+        if state == 'done':
+            return _replay(row)
+        if state == 'pending':
+            with _inflight_lock:
+                local_event = _inflight.get((scope, key))
+            replayed = _wait_for_original(scope, key, request_hash, local_event)
+            if replayed is not None:
+                return replayed
+
+        event = threading.Event()
+        with _inflight_lock:
+            _inflight[(scope, key)] = event
+        try:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code < 500:
+                store_response(scope, key, response)
+            else:
+                release_key(scope, key)
+            return response
+        except Exception:
+            release_key(scope, key)
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop((scope, key), None)
+            event.set()
+
+    return wrapper
@@ -0,0 +1,73 @@
+"""
+JSON provider for InJoy Beauty.
+Serializes with orjson when it is installed, falling back to Flask's
+default json-based provider, and embeds RawJSON produced by the model
+layer without decoding it first.
+"""
+from flask.json.provider import DefaultJSONProvider
+from database import RawJSON
+
+try:
+    import orjson
+except ImportError:  # Optional - the stdlib encoder is used instead
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson with a stdlib fallback."""
+
+    # Keys come out in insertion (column) order; sorting only costs time
+    sort_keys = False
+    ensure_ascii = False
+
+    def _encode(self, obj, indent=False):
+        """Serialize obj to UTF-8 bytes."""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            # Datetimes go through self.default so output matches Flask's provider
+            return orjson.dumps(obj, default=self.default, option=option)
+        if indent:
+            return super().dumps(obj, indent=2).encode('utf-8')
+        return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def _encode_with_raw(self, obj, indent=False, suffix=b''):
+        """Serialize obj, splicing in any top-level RawJSON values verbatim."""
+        if isinstance(obj, RawJSON):
+            return obj.data + suffix
+        if not isinstance(obj, dict) or not any(isinstance(v, RawJSON) for v in obj.values()):
+            return self._encode(obj, indent) + suffix
+
+        plain = {k: v for k, v in obj.items() if not isinstance(v, RawJSON)}
+        body = self._encode(plain, indent).rstrip()
+        parts = [body[:-1]]
+        for key, value in obj.items():
+            if isinstance(value, RawJSON):
+                if len(parts) > 1 or plain:
+                    parts.append(b',')
+                parts += [self._encode(key), b':', value.data]
+        parts.append(b'}' + suffix)
+        # One join, so the embedded rows are copied exactly once
+        return b''.join(parts)
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as a JSON string."""
+        if kwargs.keys() - {'indent', 'separators'}:
+            # Caller asked for json.dumps options we don't translate
+            return super().dumps(obj, **kwargs)
+        return self._encode_with_raw(obj, bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize JSON from a string or bytes."""
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response without a str round trip of the body."""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._encode_with_raw(obj, indent, b'\n'), mimetype=self.mimetype
+        )
@@ -1,8 +1,23 @@
 """
 Data models and database query helpers for Jamie's Beauty Studio.
 """
-from database import get_db_connection
-from datetime import datetime, date
+from database import get_db_connection, query_json, normalize_email, upsert_client
+from storage import get_backend
+from change_log import log_change, changes_since, log_bounds, CREATED, STATUS_CHANGED, UPDATED
+from availability import check_slot, to_time_str
+from write_queue import run_write
+import shared_cache
+import flags
+from records import (
+    ServiceRecord, BookingRecord, ContactMessageRecord, GalleryImageRecord, IntakeFormRecord,
+    ClientRecord, InquiryRecord,
+    SERVICE_COLUMNS, BOOKING_COLUMNS, CONTACT_MESSAGE_COLUMNS, GALLERY_IMAGE_COLUMNS,
+    INTAKE_FORM_COLUMNS, BOOKING_INSERT_COLUMNS, CLIENT_COLUMNS, INQUIRY_COLUMNS, record_cursor
+)
+from datetime import datetime, date, timedelta
+
+# The BOOLEAN flag columns, kept in step with support_flags on insert
+FLAG_COLUMN_LIST = ', '.join(flags.FLAG_COLUMNS)
 
 
 class Service:
@@ -12,14 +27,14 @@ class Service:
     def get_all(active_only=True):
         """Get all services, optionally filtered by active status."""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = record_cursor(conn, ServiceRecord)
         
         if active_only:
-            cursor.execute('SELECT * FROM services WHERE is_active = 1 ORDER BY category, name')
+            cursor.execute(f'SELECT {SERVICE_COLUMNS} FROM services WHERE is_active = 1 ORDER BY category, name')
         else:
-            cursor.execute('SELECT * FROM services ORDER BY category, name')
+            cursor.execute(f'SELECT {SERVICE_COLUMNS} FROM services ORDER BY category, name')
         
-        services = [dict(row) for row in cursor.fetchall()]
+        services = cursor.fetchall()
         conn.close()
         return services
     
@@ -27,22 +42,22 @@ class Service:
     def get_by_id(service_id):
         """Get a single service by ID."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM services WHERE id = ?', (service_id,))
-        row = cursor.fetchone()
+        cursor = record_cursor(conn, ServiceRecord)
+        cursor.execute(f'SELECT {SERVICE_COLUMNS} FROM services WHERE id = ?', (service_id,))
+        service = cursor.fetchone()
         conn.close()
-        return dict(row) if row else None
+        return service
     
     @staticmethod
     def get_by_category(category):
         """Get all services in a category."""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = record_cursor(conn, ServiceRecord)
         cursor.execute(
-            'SELECT * FROM services WHERE category = ? AND is_active = 1 ORDER BY name',
+            f'SELECT {SERVICE_COLUMNS} FROM services WHERE category = ? AND is_active = 1 ORDER BY name',
             (category,)
         )
-        services = [dict(row) for row in cursor.fetchall()]
+        services = cursor.fetchall()
         conn.close()
         return services
     
@@ -57,53 +72,240 @@ class Service:
         return categories
 
 
+class BookingError(Exception):
+    """A booking request that can't be accepted as submitted."""
+
+
+class BookingConflict(BookingError):
+    """The requested slot is taken or outside booking hours."""
+    
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason
+
+
+class SeriesConflict(BookingConflict):
+    """One or more occurrences of a recurring series can't be booked."""
+    
+    def __init__(self, message, conflicts):
+        super().__init__(message, 'series_conflict')
+        self.conflicts = conflicts
+
+
 class Booking:
     """Booking model for appointments."""
     
     @staticmethod
-    def create(service_id, client_name, client_email, client_phone, booking_date, booking_time, notes=None):
-        """Create a new booking."""
+    def create_checked(service_id, client_name, client_email, client_phone, booking_date, booking_time, notes=None):
+        """Create a booking if its slot is free, in one transaction on one connection.
+        
+        BEGIN IMMEDIATE takes the write lock before the overlap check, so two
+        clients racing for the same slot can't both pass it. Returns the new
+        BookingRecord; raises BookingError / BookingConflict.
+        """
         conn = get_db_connection()
-        cursor = conn.cursor()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            
+            service = conn.execute(
+                'SELECT name, duration, price FROM services WHERE id = ? AND is_active = 1',
+                (service_id,)
+            ).fetchone()
+            if not service:
+                raise BookingError('Invalid service selected')
+            
+            booked = conn.execute('''
+                SELECT booking_time, s.duration
+                FROM bookings b
+                JOIN services s ON b.service_id = s.id
+                WHERE booking_date = ? AND status != 'cancelled'
+            ''', (booking_date,)).fetchall()
+            reason = check_slot(booking_date, booking_time, service['duration'], booked)
+            if reason == 'closed':
+                raise BookingConflict("We're not taking bookings on that day", reason)
+            if reason == 'outside_hours':
+                raise BookingConflict('That time is outside booking hours', reason)
+            if reason in ('blocked', 'overlap'):
+                raise BookingConflict('That time slot is no longer available', reason)
+            
+            client_id = upsert_client(conn, client_email, client_name, client_phone)
+            row = conn.execute(f'''
+                INSERT INTO bookings (service_id, client_name, client_email, client_phone, booking_date, booking_time, notes, client_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING {BOOKING_INSERT_COLUMNS}
+            ''', (service_id, client_name, client_email, client_phone, booking_date, booking_time, notes, client_id)).fetchone()
+            log_change(conn, 'bookings', row['id'], CREATED, row['status'])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        cursor.execute('''
-            INSERT INTO bookings (service_id, client_name, client_email, client_phone, booking_date, booking_time, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (service_id, client_name, client_email, client_phone, booking_date, booking_time, notes))
+        shared_cache.bump(shared_cache.AVAILABILITY)
+        # The service columns were read in the same transaction, so no JOIN round trip
+        return BookingRecord(*row, service['name'], service['duration'], service['price'])
+    
+    @staticmethod
+    def create_series(service_id, client_name, client_email, client_phone, booking_time, dates,
+                      notes=None, skip_conflicts=False):
+        """Book the same service and time on each of `dates` in one transaction.
         
-        booking_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return booking_id
+        Existing bookings for the whole span are read with one range query
+        and every occurrence is checked against them before the inserts.
+        Returns (bookings, conflicts) where conflicts is a list of
+        {'date', 'reason'}; unless skip_conflicts is set, any conflict
+        raises SeriesConflict and nothing is inserted.
+        """
+        dates = sorted(dates)
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            
+            service = conn.execute(
+                'SELECT duration FROM services WHERE id = ? AND is_active = 1',
+                (service_id,)
+            ).fetchone()
+            if not service:
+                raise BookingError('Invalid service selected')
+            
+            booked_by_date = {}
+            for row in conn.execute('''
+                SELECT booking_date, booking_time, s.duration
+                FROM bookings b
+                JOIN services s ON b.service_id = s.id
+                WHERE booking_date BETWEEN ? AND ? AND status != 'cancelled'
+            ''', (dates[0], dates[-1])):
+                booked_by_date.setdefault(row['booking_date'], []).append((row['booking_time'], row['duration']))
+            
+            free, conflicts = [], []
+            for booking_date in dates:
+                reason = check_slot(booking_date, booking_time, service['duration'], booked_by_date.get(booking_date, ()))
+                if reason:
+                    conflicts.append({'date': booking_date, 'reason': reason})
+                else:
+                    free.append(booking_date)
+            
+            if conflicts and not skip_conflicts:
+                raise SeriesConflict('Some dates in the series are not available', conflicts)
+            if not free:
+                raise SeriesConflict('None of the dates in the series are available', conflicts)
+            
+            # Ids come back from each INSERT; PostgreSQL hands out sequence
+            # values outside the write lock, so "ids above MAX(id)" could
+            # include another transaction's rows
+            client_id = upsert_client(conn, client_email, client_name, client_phone)
+            ids = [
+                conn.execute('''
+                    INSERT INTO bookings (service_id, client_name, client_email, client_phone, booking_date, booking_time, notes, client_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    RETURNING id
+                ''', (service_id, client_name, client_email, client_phone, booking_date, booking_time, notes, client_id)).fetchone()[0]
+                for booking_date in free
+            ]
+            
+            cursor = record_cursor(conn, BookingRecord)
+            cursor.execute(f'''
+                SELECT {BOOKING_COLUMNS}
+                FROM bookings b
+                JOIN services s ON b.service_id = s.id
+                WHERE b.id IN ({', '.join('?' * len(ids))})
+                ORDER BY b.booking_date
+            ''', ids)
+            bookings = cursor.fetchall()
+            for booking in bookings:
+                log_change(conn, 'bookings', booking.id, CREATED, booking.status)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        if bookings:
+            shared_cache.bump(shared_cache.AVAILABILITY)
+        return bookings, conflicts
     
     @staticmethod
     def get_by_id(booking_id):
         """Get a booking by ID."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT b.*, s.name as service_name, s.duration, s.price
+        cursor = record_cursor(conn, BookingRecord)
+        cursor.execute(f'''
+            SELECT {BOOKING_COLUMNS}
             FROM bookings b
             JOIN services s ON b.service_id = s.id
             WHERE b.id = ?
         ''', (booking_id,))
-        row = cursor.fetchone()
+        booking = cursor.fetchone()
         conn.close()
-        return dict(row) if row else None
+        return booking
     
     @staticmethod
     def get_by_date(booking_date):
         """Get all bookings for a specific date."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT b.*, s.name as service_name, s.duration
+        cursor = record_cursor(conn, BookingRecord)
+        cursor.execute(f'''
+            SELECT {BOOKING_COLUMNS}
             FROM bookings b
             JOIN services s ON b.service_id = s.id
             WHERE b.booking_date = ? AND b.status != 'cancelled'
             ORDER BY b.booking_time
         ''', (booking_date,))
-        bookings = [dict(row) for row in cursor.fetchall()]
+        bookings = cursor.fetchall()
+        conn.close()
+        return bookings
+    
+    @staticmethod
+    def get_range(start_date, end_date, status=None, limit=50, offset=0):
+        """Get bookings between two dates (inclusive), in schedule order.
+        
+        Served by idx_bookings_date_status_time.
+        """
+        conn = get_db_connection()
+        cursor = record_cursor(conn, BookingRecord)
+        if status:
+            cursor.execute(f'''
+                SELECT {BOOKING_COLUMNS}
+                FROM bookings b
+                JOIN services s ON b.service_id = s.id
+                WHERE b.booking_date BETWEEN ? AND ? AND b.status = ?
+                ORDER BY b.booking_date, b.booking_time
+                LIMIT ? OFFSET ?
+            ''', (start_date, end_date, status, limit, offset))
+        else:
+            cursor.execute(f'''
+                SELECT {BOOKING_COLUMNS}
+                FROM bookings b
+                JOIN services s ON b.service_id = s.id
+                WHERE b.booking_date BETWEEN ? AND ?
+                ORDER BY b.booking_date, b.booking_time
+                LIMIT ? OFFSET ?
+            ''', (start_date, end_date, limit, offset))
+        bookings = cursor.fetchall()
+        conn.close()
+        return bookings
+    
+    @staticmethod
+    def get_by_client(client_email, limit=50, offset=0):
+        """Get a client's bookings, most recent first.
+        
+        Matched on the normalized email through clients, so any casing of
+        the address finds the same history. Served by idx_bookings_client_id.
+        """
+        conn = get_db_connection()
+        cursor = record_cursor(conn, BookingRecord)
+        cursor.execute(f'''
+            SELECT {BOOKING_COLUMNS}
+            FROM bookings b
+            JOIN clients c ON b.client_id = c.id
+            JOIN services s ON b.service_id = s.id
+            WHERE c.email = ?
+            ORDER BY b.booking_date DESC, b.booking_time DESC
+            LIMIT ? OFFSET ?
+        ''', (normalize_email(client_email), limit, offset))
+        bookings = cursor.fetchall()
         conn.close()
         return bookings
     
@@ -116,8 +318,37 @@ class Booking:
             'UPDATE bookings SET status = ? WHERE id = ?',
             (status, booking_id)
         )
+        changed = cursor.rowcount
+        if changed:
+            log_change(conn, 'bookings', booking_id, STATUS_CHANGED, status)
         conn.commit()
         conn.close()
+        if changed:
+            shared_cache.bump(shared_cache.AVAILABILITY)
+    
+    @staticmethod
+    def get_for_calendar(from_date, ids=None):
+        """Pending and confirmed bookings on or after from_date, in time order.
+        
+        With ids, only those bookings (any that no longer qualify are left
+        out) - the calendar feed's incremental refresh.
+        """
+        where, params = "b.booking_date >= ? AND b.status IN ('pending', 'confirmed')", [from_date]
+        if ids is not None:
+            where += f" AND b.id IN ({', '.join('?' * len(ids))})"
+            params += list(ids)
+        conn = get_db_connection()
+        cursor = record_cursor(conn, BookingRecord)
+        cursor.execute(f'''
+            SELECT {BOOKING_COLUMNS}
+            FROM bookings b
+            JOIN services s ON b.service_id = s.id
+            WHERE {where}
+            ORDER BY b.booking_date, b.booking_time, b.id
+        ''', params)
+        bookings = cursor.fetchall()
+        conn.close()
+        return bookings
     
     @staticmethod
     def get_booked_times(booking_date):
@@ -141,40 +372,48 @@ class ContactMessage:
     @staticmethod
     def create(name, email, subject, message):
         """Create a new contact message."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO contact_messages (name, email, subject, message)
-            VALUES (?, ?, ?, ?)
-        ''', (name, email, subject, message))
+        def insert(conn):
+            client_id = upsert_client(conn, email, name)
+            message_id = conn.execute('''
+                INSERT INTO contact_messages (name, email, subject, message, client_id)
+                VALUES (?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (name, email, subject, message, client_id)).fetchone()[0]
+            log_change(conn, 'contact_messages', message_id, CREATED)
+            return message_id
         
-        message_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return message_id
+        return run_write(insert)
     
     @staticmethod
     def get_all(unread_only=False):
         """Get all contact messages."""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = record_cursor(conn, ContactMessageRecord)
         
         if unread_only:
-            cursor.execute('SELECT * FROM contact_messages WHERE is_read = 0 ORDER BY created_at DESC')
+            cursor.execute(f'SELECT {CONTACT_MESSAGE_COLUMNS} FROM contact_messages WHERE is_read = 0 ORDER BY created_at DESC')
         else:
-            cursor.execute('SELECT * FROM contact_messages ORDER BY created_at DESC')
+            cursor.execute(f'SELECT {CONTACT_MESSAGE_COLUMNS} FROM contact_messages ORDER BY created_at DESC')
         
-        messages = [dict(row) for row in cursor.fetchall()]
+        messages = cursor.fetchall()
         conn.close()
         return messages
     
+    @staticmethod
+    def get_all_json(unread_only=False):
+        """Get all contact messages as a JSON array serialized by SQLite."""
+        if unread_only:
+            return query_json(f'SELECT {CONTACT_MESSAGE_COLUMNS} FROM contact_messages WHERE is_read = 0 ORDER BY created_at DESC')
+        return query_json(f'SELECT {CONTACT_MESSAGE_COLUMNS} FROM contact_messages ORDER BY created_at DESC')
+    
     @staticmethod
     def mark_as_read(message_id):
         """Mark a message as read."""
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('UPDATE contact_messages SET is_read = 1 WHERE id = ?', (message_id,))
+        if cursor.rowcount:
+            log_change(conn, 'contact_messages', message_id, UPDATED)
         conn.commit()
         conn.close()
 
@@ -186,9 +425,9 @@ class GalleryImage:
     def get_all():
         """Get all gallery images."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM gallery_images ORDER BY sort_order')
-        images = [dict(row) for row in cursor.fetchall()]
+        cursor = record_cursor(conn, GalleryImageRecord)
+        cursor.execute(f'SELECT {GALLERY_IMAGE_COLUMNS} FROM gallery_images ORDER BY sort_order')
+        images = cursor.fetchall()
         conn.close()
         return images
     
@@ -196,9 +435,9 @@ class GalleryImage:
     def get_featured():
         """Get featured gallery images."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM gallery_images WHERE is_featured = 1 ORDER BY sort_order LIMIT 4')
-        images = [dict(row) for row in cursor.fetchall()]
+        cursor = record_cursor(conn, GalleryImageRecord)
+        cursor.execute(f'SELECT {GALLERY_IMAGE_COLUMNS} FROM gallery_images WHERE is_featured = 1 ORDER BY sort_order LIMIT 4')
+        images = cursor.fetchall()
         conn.close()
         return images
     
@@ -206,12 +445,12 @@ class GalleryImage:
     def get_by_category(category):
         """Get gallery images by category."""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = record_cursor(conn, GalleryImageRecord)
         cursor.execute(
-            'SELECT * FROM gallery_images WHERE category = ? ORDER BY sort_order',
+            f'SELECT {GALLERY_IMAGE_COLUMNS} FROM gallery_images WHERE category = ? ORDER BY sort_order',
             (category,)
         )
-        images = [dict(row) for row in cursor.fetchall()]
+        images = cursor.fetchall()
         conn.close()
         return images
 
@@ -222,76 +461,74 @@ class IntakeForm:
     @staticmethod
     def create(data):
         """Create a new intake form submission."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        support_flags = flags.encode(data)
         
-        cursor.execute('''
-            INSERT INTO intake_forms (
-                client_name, phone, email, client_type,
-                service_location, address, service_requested,
-                hair_length, desired_style, desired_style_other, hair_type,
-                sensitive_to_noise, sensitive_to_touch, does_not_like_water,
-                nervous_anxious, enjoys_fidget_toys, needs_weighted_cape,
-                requires_quiet_environment, other_sensory_needs,
-                uses_wheelchair, limited_mobility, has_behaviours, behaviour_notes,
-                additional_notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('client_name'),
-            data.get('phone'),
-            data.get('email'),
-            data.get('client_type', 'adult'),
-            data.get('service_location', 'in-salon'),
-            data.get('address'),
-            data.get('service_requested'),
-            data.get('hair_length'),
-            data.get('desired_style'),
-            data.get('desired_style_other'),
-            data.get('hair_type'),
-            1 if data.get('sensitive_to_noise') else 0,
-            1 if data.get('sensitive_to_touch') else 0,
-            1 if data.get('does_not_like_water') else 0,
-            1 if data.get('nervous_anxious') else 0,
-            1 if data.get('enjoys_fidget_toys') else 0,
-            1 if data.get('needs_weighted_cape') else 0,
-            1 if data.get('requires_quiet_environment') else 0,
-            data.get('other_sensory_needs'),
-            1 if data.get('uses_wheelchair') else 0,
-            1 if data.get('limited_mobility') else 0,
-            1 if data.get('has_behaviours') else 0,
-            data.get('behaviour_notes'),
-            data.get('additional_notes')
-        ))
+        def insert(conn):
+            client_id = upsert_client(conn, data.get('email'), data.get('client_name'), data.get('phone'))
+            form_id, status = conn.execute(f'''
+                INSERT INTO intake_forms (
+                    client_name, phone, email, client_type,
+                    service_location, address, service_requested,
+                    hair_length, desired_style, desired_style_other, hair_type,
+                    other_sensory_needs, behaviour_notes,
+                    additional_notes, client_id, support_flags, {FLAG_COLUMN_LIST}
+                ) VALUES ({', '.join('?' * (16 + len(flags.FLAG_COLUMNS)))})
+                RETURNING id, status
+            ''', (
+                data.get('client_name'),
+                data.get('phone'),
+                data.get('email'),
+                data.get('client_type', 'adult'),
+                data.get('service_location', 'in-salon'),
+                data.get('address'),
+                data.get('service_requested'),
+                data.get('hair_length'),
+                data.get('desired_style'),
+                data.get('desired_style_other'),
+                data.get('hair_type'),
+                data.get('other_sensory_needs'),
+                data.get('behaviour_notes'),
+                data.get('additional_notes'),
+                client_id,
+                support_flags,
+                *flags.column_values(support_flags)
+            )).fetchone()
+            log_change(conn, 'intake_forms', form_id, CREATED, status)
+            return form_id
         
-        form_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return form_id
+        return run_write(insert)
     
     @staticmethod
     def get_all(status=None):
         """Get all intake forms, optionally filtered by status."""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = record_cursor(conn, IntakeFormRecord)
         
         if status:
-            cursor.execute('SELECT * FROM intake_forms WHERE status = ? ORDER BY created_at DESC', (status,))
+            cursor.execute(f'SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms WHERE status = ? ORDER BY created_at DESC', (status,))
         else:
-            cursor.execute('SELECT * FROM intake_forms ORDER BY created_at DESC')
+            cursor.execute(f'SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms ORDER BY created_at DESC')
         
-        forms = [dict(row) for row in cursor.fetchall()]
+        forms = cursor.fetchall()
         conn.close()
         return forms
     
+    @staticmethod
+    def get_all_json(status=None):
+        """Get all intake forms as a JSON array serialized by SQLite."""
+        if status:
+            return query_json(f'SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms WHERE status = ? ORDER BY created_at DESC', (status,))
+        return query_json(f'SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms ORDER BY created_at DESC')
+    
     @staticmethod
     def get_by_id(form_id):
         """Get a single intake form by ID."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM intake_forms WHERE id = ?', (form_id,))
-        row = cursor.fetchone()
+        cursor = record_cursor(conn, IntakeFormRecord)
+        cursor.execute(f'SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms WHERE id = ?', (form_id,))
+        form = cursor.fetchone()
         conn.close()
-        return dict(row) if row else None
+        return form
     
     @staticmethod
     def update_status(form_id, status):
@@ -302,6 +539,8 @@ class IntakeForm:
             'UPDATE intake_forms SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
             (status, form_id)
         )
+        if cursor.rowcount:
+            log_change(conn, 'intake_forms', form_id, STATUS_CHANGED, status)
         conn.commit()
         conn.close()
     
@@ -309,8 +548,395 @@ class IntakeForm:
     def get_by_email(email):
         """Get all intake forms for a specific email."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM intake_forms WHERE email = ? ORDER BY created_at DESC', (email,))
-        forms = [dict(row) for row in cursor.fetchall()]
+        cursor = record_cursor(conn, IntakeFormRecord)
+        # Through the client index rather than a scan of intake_forms.email
+        cursor.execute(f'''
+            SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms
+            WHERE client_id = (SELECT id FROM clients WHERE email = ?)
+            ORDER BY created_at DESC
+        ''', (normalize_email(email),))
+        forms = cursor.fetchall()
+        conn.close()
+        return forms
+    
+    @staticmethod
+    def filter_by_flags(any_mask=0, all_mask=0, upcoming_from=None, limit=100):
+        """Intake forms with any of any_mask's flags and all of all_mask's flags.
+        
+        With upcoming_from (a date), only forms of clients with a booking on
+        or after that date that isn't cancelled. Reads the partial
+        support_flags index, which holds only forms with a flag set.
+        """
+        sql = f'''
+            SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms
+            WHERE support_flags != 0
+              AND (support_flags & :any != 0 OR :any = 0)
+              AND support_flags & :all = :all
+        '''
+        if upcoming_from is not None:
+            sql += '''
+              AND client_id IN (
+                  SELECT client_id FROM bookings
+                  WHERE booking_date >= :upcoming AND status != 'cancelled'
+              )
+            '''
+        sql += ' ORDER BY created_at DESC LIMIT :limit'
+        
+        conn = get_db_connection()
+        cursor = record_cursor(conn, IntakeFormRecord)
+        cursor.execute(sql, {
+            'any': any_mask, 'all': all_mask, 'limit': limit,
+            'upcoming': upcoming_from.isoformat() if upcoming_from else None
+        })
+        forms = cursor.fetchall()
         conn.close()
         return forms
+
+
+class Inquiry:
+    """Recurring client inquiry model."""
+    
+    @staticmethod
+    def create(data):
+        """Store a recurring client inquiry."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        name = f"{data.get('firstName', '').strip()} {data.get('lastName', '').strip()}".strip()
+        client_id = upsert_client(conn, data.get('email'), name, data.get('phone'))
+        cursor.execute('''
+            INSERT INTO inquiries (first_name, last_name, email, phone, inquiry_type, message, client_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            RETURNING id
+        ''', (
+            data.get('firstName', '').strip(),
+            data.get('lastName', '').strip(),
+            data.get('email', '').strip(),
+            data.get('phone'),
+            data.get('inquiryType'),
+            data.get('message', '').strip(),
+            client_id
+        ))
+        
+        inquiry_id = cursor.fetchone()[0]
+        conn.commit()
+        conn.close()
+        return inquiry_id
+
+
+class Client:
+    """Client model - one row per person across bookings, forms and messages."""
+    
+    @staticmethod
+    def get_by_email(email):
+        """Get a client by email (any case)."""
+        conn = get_db_connection()
+        cursor = record_cursor(conn, ClientRecord)
+        cursor.execute(f'SELECT {CLIENT_COLUMNS} FROM clients WHERE email = ?', (normalize_email(email),))
+        client = cursor.fetchone()
+        conn.close()
+        return client
+    
+    @staticmethod
+    def get_overview(email):
+        """Everything on file for a client, or None if the email is unknown.
+        
+        One connection, one unique-index lookup for the client and one
+        client_id index lookup per table.
+        """
+        conn = get_db_connection()
+        try:
+            client = record_cursor(conn, ClientRecord).execute(
+                f'SELECT {CLIENT_COLUMNS} FROM clients WHERE email = ?', (normalize_email(email),)
+            ).fetchone()
+            if not client:
+                return None
+            
+            return {
+                'client': client,
+                'intake_forms': record_cursor(conn, IntakeFormRecord).execute(
+                    f'SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms WHERE client_id = ? ORDER BY created_at DESC',
+                    (client.id,)
+                ).fetchall(),
+                'bookings': record_cursor(conn, BookingRecord).execute(f'''
+                    SELECT {BOOKING_COLUMNS}
+                    FROM bookings b
+                    JOIN services s ON b.service_id = s.id
+                    WHERE b.client_id = ?
+                    ORDER BY b.booking_date DESC, b.booking_time DESC
+                ''', (client.id,)).fetchall(),
+                'messages': record_cursor(conn, ContactMessageRecord).execute(
+                    f'SELECT {CONTACT_MESSAGE_COLUMNS} FROM contact_messages WHERE client_id = ? ORDER BY created_at DESC',
+                    (client.id,)
+                ).fetchall(),
+                'inquiries': record_cursor(conn, InquiryRecord).execute(
+                    f'SELECT {INQUIRY_COLUMNS} FROM inquiries WHERE client_id = ? ORDER BY created_at DESC',
+                    (client.id,)
+                ).fetchall(),
+            }
+        finally:
+            conn.close()
+
+
+class Stats:
+    """Dashboard counts read from stat_counters (maintained by triggers).
+    
+    Intake forms and messages moved to the archive by retention.py still
+    count; only real deletes take a row out of the figures.
+    """
+    
+    @staticmethod
+    def get_summary(start_date, end_date):
+        """Status counts plus bookings and revenue per day and week in a date range.
+        
+        Every figure is a primary-key lookup on stat_counters, so the cost
+        doesn't grow with the number of forms, messages or bookings on file.
+        Backends without triggers aggregate the tables instead.
+        """
+        if not get_backend().supports('triggers'):
+            return Stats._summary_from_tables(start_date, end_date)
+        
+        conn = get_db_connection()
+        try:
+            counters = conn.execute('''
+                SELECT metric, bucket, count FROM stat_counters
+                WHERE metric IN ('intake_status', 'booking_status', 'unread_messages') AND count != 0
+            ''').fetchall()
+            by_metric = {'intake_status': {}, 'booking_status': {}, 'unread_messages': {}}
+            for row in counters:
+                by_metric[row['metric']][row['bucket']] = row['count']
+            
+            def periods(metric, start, key):
+                return [
+                    {key: row['bucket'], 'count': row['count'], 'revenue': round(row['amount'], 2)}
+                    for row in conn.execute('''
+                        SELECT bucket, count, amount FROM stat_counters
+                        WHERE metric = ? AND bucket BETWEEN ? AND ? AND count != 0
+                        ORDER BY bucket
+                    ''', (metric, start, end_date.isoformat()))
+                ]
+            
+            week_start = start_date - timedelta(days=start_date.weekday())
+            return {
+                'intake_forms': by_metric['intake_status'],
+                'unread_messages': by_metric['unread_messages'].get('', 0),
+                'bookings': {
+                    'by_status': by_metric['booking_status'],
+                    'by_day': periods('bookings_day', start_date.isoformat(), 'date'),
+                    'by_week': periods('bookings_week', week_start.isoformat(), 'week_start'),
+                },
+            }
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _summary_from_tables(start_date, end_date):
+        """get_summary() computed with GROUP BY queries, for PostgreSQL."""
+        week_start = start_date - timedelta(days=start_date.weekday())
+        # The last week is counted whole, as its stat_counters bucket would be
+        last_day = end_date - timedelta(days=end_date.weekday()) + timedelta(days=6)
+        
+        conn = get_db_connection()
+        try:
+            intake = {row[0]: row[1] for row in conn.execute(
+                "SELECT COALESCE(status, 'new'), COUNT(*) FROM intake_forms GROUP BY 1"
+            )}
+            by_status = {row[0]: row[1] for row in conn.execute(
+                "SELECT COALESCE(status, 'pending'), COUNT(*) FROM bookings GROUP BY 1"
+            )}
+            unread = conn.execute(
+                'SELECT COUNT(*) FROM contact_messages WHERE COALESCE(is_read, 0) = 0'
+            ).fetchone()[0]
+            days = conn.execute('''
+                SELECT b.booking_date, COUNT(*), COALESCE(SUM(s.price), 0)
+                FROM bookings b LEFT JOIN services s ON s.id = b.service_id
+                WHERE b.booking_date BETWEEN ? AND ? AND COALESCE(b.status, '') != 'cancelled'
+                GROUP BY b.booking_date
+                ORDER BY b.booking_date
+            ''', (week_start.isoformat(), last_day.isoformat())).fetchall()
+        finally:
+            conn.close()
+        
+        by_day, weeks = [], {}
+        for day, count, amount in days:
+            booked_on = date.fromisoformat(day)
+            if start_date <= booked_on <= end_date:
+                by_day.append({'date': day, 'count': count, 'revenue': round(amount, 2)})
+            week = (booked_on - timedelta(days=booked_on.weekday())).isoformat()
+            totals = weeks.setdefault(week, [0, 0])
+            totals[0] += count
+            totals[1] += amount
+        
+        return {
+            'intake_forms': intake,
+            'unread_messages': unread,
+            'bookings': {
+                'by_status': by_status,
+                'by_day': by_day,
+                'by_week': [
+                    {'week_start': week, 'count': count, 'revenue': round(amount, 2)}
+                    for week, (count, amount) in sorted(weeks.items())
+                ],
+            },
+        }
+
+
+class Changes:
+    """Delta sync for admin clients, read from change_log."""
+    
+    # Tables clients can sync -> (record, SELECT of current rows by id)
+    SYNC_TABLES = {
+        'bookings': (BookingRecord, f'''
+            SELECT {BOOKING_COLUMNS}
+            FROM bookings b
+            JOIN services s ON b.service_id = s.id
+            WHERE b.id IN ({{ids}})
+        '''),
+        'intake_forms': (IntakeFormRecord, f'SELECT {INTAKE_FORM_COLUMNS} FROM intake_forms WHERE id IN ({{ids}})'),
+        'contact_messages': (ContactMessageRecord, f'SELECT {CONTACT_MESSAGE_COLUMNS} FROM contact_messages WHERE id IN ({{ids}})'),
+        'services': (ServiceRecord, f'SELECT {SERVICE_COLUMNS} FROM services WHERE id IN ({{ids}})'),
+        'gallery_images': (GalleryImageRecord, f'SELECT {GALLERY_IMAGE_COLUMNS} FROM gallery_images WHERE id IN ({{ids}})'),
+    }
+    
+    @staticmethod
+    def since(seq, limit=500):
+        """Rows changed after change-log position seq, in their current state.
+        
+        Reads up to limit log entries and returns {'next': cursor for the
+        next call, 'has_more', 'reset', 'changes': {table: {'upserted':
+        [records], 'deleted': [ids]}}}. Several changes to one row come back
+        once. reset means entries after seq were purged and the client must
+        reload its lists from next.
+        """
+        oldest, newest = log_bounds()
+        if seq > newest or (oldest is not None and seq < oldest - 1):
+            return {'next': newest, 'has_more': False, 'reset': True, 'changes': {}}
+        
+        entries = changes_since(seq, limit) if seq < newest else []
+        changed = {}
+        for entry in entries:
+            if entry['table'] in Changes.SYNC_TABLES:
+                changed.setdefault(entry['table'], {})[entry['id']] = None
+        
+        changes = {}
+        conn = get_db_connection()
+        try:
+            for table, row_ids in changed.items():
+                record, sql = Changes.SYNC_TABLES[table]
+                ids = list(row_ids)
+                rows = record_cursor(conn, record).execute(sql.format(ids=', '.join('?' * len(ids))), ids).fetchall()
+                present = {row.id for row in rows}
+                changes[table] = {'upserted': rows, 'deleted': [row_id for row_id in ids if row_id not in present]}
+        finally:
+            conn.close()
+        
+        return {
+            'next': entries[-1]['seq'] if entries else seq,
+            'has_more': len(entries) == limit,
+            'reset': False,
+            'changes': changes,
+        }
+
+
+class Schedule:
+    """Business hours, blackout dates and schedule blocks behind availability.
+    
+    Times are stored as minutes since midnight and shown as 'HH:MM'.
+    Every write invalidates each worker's weekly plan and the cached
+    available times through the shared cache.
+    """
+    
+    @staticmethod
+    def _changed():
+        shared_cache.bump(shared_cache.SCHEDULE)
+        shared_cache.bump(shared_cache.AVAILABILITY)
+    
+    @staticmethod
+    def get_overview(from_date):
+        """Weekly hours plus the blackouts and blocks that end on or after from_date."""
+        conn = get_db_connection()
+        try:
+            hours = [
+                {'weekday': row['weekday'], 'open': to_time_str(row['open_minute']),
+                 'close': to_time_str(row['close_minute']), 'slot_minutes': row['slot_minutes']}
+                for row in conn.execute(
+                    'SELECT weekday, open_minute, close_minute, slot_minutes FROM business_hours ORDER BY weekday'
+                )
+            ]
+            blackouts = [dict(row) for row in conn.execute(
+                'SELECT id, start_date, end_date, reason FROM blackout_dates WHERE end_date >= ? ORDER BY start_date',
+                (from_date,)
+            )]
+            blocks = [
+                {'id': row['id'], 'date': row['block_date'], 'start': to_time_str(row['start_minute']),
+                 'end': to_time_str(row['end_minute']), 'kind': row['kind'], 'notes': row['notes']}
+                for row in conn.execute('''
+                    SELECT id, block_date, start_minute, end_minute, kind, notes FROM schedule_blocks
+                    WHERE block_date >= ? ORDER BY block_date, start_minute
+                ''', (from_date,))
+            ]
+        finally:
+            conn.close()
+        return {'hours': hours, 'blackouts': blackouts, 'blocks': blocks}
+    
+    @staticmethod
+    def set_hours(hours):
+        """Replace the weekly hours with [(weekday, open_minute, close_minute, slot_minutes), ...].
+        
+        Weekdays left out are closed.
+        """
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM business_hours')
+            conn.executemany(
+                'INSERT INTO business_hours (weekday, open_minute, close_minute, slot_minutes) VALUES (?, ?, ?, ?)',
+                hours
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        Schedule._changed()
+    
+    @staticmethod
+    def add_blackout(start_date, end_date, reason=None):
+        """Close the salon from start_date to end_date inclusive. Returns the new id."""
+        conn = get_db_connection()
+        blackout_id = conn.execute(
+            'INSERT INTO blackout_dates (start_date, end_date, reason) VALUES (?, ?, ?) RETURNING id',
+            (start_date, end_date, reason)
+        ).fetchone()[0]
+        conn.commit()
+        conn.close()
+        Schedule._changed()
+        return blackout_id
+    
+    @staticmethod
+    def add_block(block_date, start_minute, end_minute, kind='mobile', notes=None):
+        """Take start_minute-end_minute on block_date out of the bookable hours. Returns the new id."""
+        conn = get_db_connection()
+        block_id = conn.execute('''
+            INSERT INTO schedule_blocks (block_date, start_minute, end_minute, kind, notes)
+            VALUES (?, ?, ?, ?, ?)
+            RETURNING id
+        ''', (block_date, start_minute, end_minute, kind, notes)).fetchone()[0]
+        conn.commit()
+        conn.close()
+        Schedule._changed()
+        return block_id
+    
+    @staticmethod
+    def delete(table, row_id):
+        """Remove a blackout ('blackout_dates') or block ('schedule_blocks'). Returns True if it existed."""
+        if table not in ('blackout_dates', 'schedule_blocks'):
+            raise ValueError(f'Not a schedule table: {table}')
+        conn = get_db_connection()
+        deleted = conn.execute(f'DELETE FROM {table} WHERE id = ?', (row_id,)).rowcount
+        conn.commit()
+        conn.close()
+        if deleted:
+            Schedule._changed()
+        return bool(deleted)
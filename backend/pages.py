@@ -0,0 +1,62 @@
+"""
+Server-side catalogue embedding for InJoy Beauty's HTML pages.
+Pages whose scripts would fetch catalogue JSON after loading (the homepage
+gallery preview, the services list, the gallery grid) get that JSON
+inlined in a <script type="application/json"> block instead, so the
+scripts render straight away and skip a round trip. Rendered pages are
+kept in the shared cache (so one render serves every worker) and in a
+per-worker copy, and rebuilt when the catalogue generation or the HTML
+file changes.
+"""
+import threading
+from pathlib import Path
+from flask import current_app
+from models import Service, GalleryImage
+import shared_cache
+
+# (key in the embedded data, element id the page's script renders into, loader)
+CATALOGUE_DATA = [
+    ('service_categories', 'services-preview', Service.get_categories),
+    ('gallery_featured', 'gallery-preview', GalleryImage.get_featured),
+    ('services', 'services-container', Service.get_all),
+    ('gallery', 'gallery-grid', GalleryImage.get_all),
+]
+
+DATA_ELEMENT_ID = 'page-data'
+
+# filename -> ((mtime_ns, catalogue generation), body, etag)
+_rendered = {}
+_lock = threading.Lock()
+
+
+def _embed(html):
+    """Insert the catalogue data the page's elements need before </head>."""
+    data = {key: load() for key, element_id, load in CATALOGUE_DATA if f'id="{element_id}"' in html}
+    if not data:
+        return html
+    # '</' would end the script element early
+    payload = current_app.json.dumps(data).replace('</', '<\\/')
+    block = f'    <script id="{DATA_ELEMENT_ID}" type="application/json">{payload}</script>\n'
+    return html.replace('</head>', block + '</head>', 1)
+
+
+def render_page(path):
+    """(body bytes, etag) for an HTML page with its catalogue data embedded."""
+    path = Path(path)
+    key = (path.stat().st_mtime_ns, shared_cache.generation(shared_cache.CATALOGUE))
+    cached = _rendered.get(path.name)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+
+    with _lock:
+        cached = _rendered.get(path.name)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+        body = shared_cache.get_or_set(
+            shared_cache.CATALOGUE, f'page:{path.name}:{key[0]}',
+            lambda: _embed(path.read_text(encoding='utf-8')).encode('utf-8'),
+            gen=key[1]
+        )
+        etag = f'{path.stem}-{key[0]:x}-{key[1]}'
+        _rendered[path.name] = (key, body, etag)
+    return body, etag
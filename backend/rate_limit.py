@@ -0,0 +1,182 @@
+"""
+Rate limiting and admission control for InJoy Beauty's write endpoints.
+Token buckets keyed by client IP and endpoint live in a small SQLite file
+of their own, so every gunicorn worker sees the same counts without
+touching the salon database's write lock. A per-worker admission limit
+sheds writes beyond MAX_CONCURRENT_WRITES so form posts can't occupy every
+request thread and starve catalogue and availability reads; a post gives
+its slot back once its database write is done, before the notification
+email goes out.
+With the PostgreSQL backend each instance keeps its own bucket file, so
+the limits apply per instance.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from flask import request, jsonify, g, has_request_context
+from config import Config
+from idempotency import is_known_key
+
+# One connection per thread to the bucket store, tagged with the owning pid
+_local = threading.local()
+
+# Buckets untouched this long are dropped; checked at most every PURGE_INTERVAL
+STALE_SECONDS = 24 * 3600
+PURGE_INTERVAL = 600
+_last_purge = 0.0
+
+# Refill, spend one token if there is one, and report whether we did
+TAKE_TOKEN_SQL = '''
+    INSERT INTO buckets (key, tokens, updated_at, allowed)
+    VALUES (:key, :capacity - 1, :now, 1)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = CASE
+            WHEN min(:capacity, tokens + (:now - updated_at) * :rate) >= 1
+            THEN min(:capacity, tokens + (:now - updated_at) * :rate) - 1
+            ELSE min(:capacity, tokens + (:now - updated_at) * :rate)
+        END,
+        allowed = min(:capacity, tokens + (:now - updated_at) * :rate) >= 1,
+        updated_at = :now
+    RETURNING tokens, allowed
+'''
+
+
+def _bucket_db():
+    """This thread's connection to the bucket store."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+
+    path = Path(Config.RATE_LIMIT_DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit; every check is a single statement
+    conn = sqlite3.connect(str(path), timeout=1, isolation_level=None, check_same_thread=False)
+    # Buckets are disposable - trade durability for speed
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            allowed INTEGER NOT NULL
+        )
+    ''')
+    _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def take_token(key, capacity, per_seconds):
+    """Spend a token from key's bucket.
+
+    The bucket holds up to `capacity` tokens and refills at
+    capacity / per_seconds tokens a second. Returns (allowed, retry_after)
+    where retry_after is the seconds until a token is available.
+    """
+    rate = capacity / per_seconds
+    tokens, allowed = _bucket_db().execute(TAKE_TOKEN_SQL, {
+        'key': key, 'capacity': capacity, 'rate': rate, 'now': time.time()
+    }).fetchone()
+    if allowed:
+        return True, 0
+    return False, max(1, math.ceil((1 - tokens) / rate))
+
+
+def purge_stale():
+    """Drop buckets that haven't been used for STALE_SECONDS."""
+    return _bucket_db().execute(
+        'DELETE FROM buckets WHERE updated_at < ?', (time.time() - STALE_SECONDS,)
+    ).rowcount
+
+
+def _maybe_purge():
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge >= PURGE_INTERVAL:
+        _last_purge = now
+        purge_stale()
+
+
+def client_ip():
+    """The caller's IP address.
+
+    Behind Render's proxy the client is the entry the last trusted proxy
+    appended to X-Forwarded-For; anything before it can be spoofed.
+    """
+    route = request.access_route
+    if Config.TRUSTED_PROXY_COUNT and request.headers.get('X-Forwarded-For'):
+        return route[max(0, len(route) - Config.TRUSTED_PROXY_COUNT)]
+    return request.remote_addr or 'unknown'
+
+
+def _too_many(message, retry_after):
+    response = jsonify({'success': False, 'error': message})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+# Write requests in flight in this worker; resized by size_admission()
+_admission = threading.BoundedSemaphore(Config.MAX_CONCURRENT_WRITES or 1)
+
+
+def size_admission(threads):
+    """Size the admission limit for a worker with `threads` request threads.
+
+    Leaves one thread for reads. Called from gunicorn's post_worker_init,
+    before the worker takes requests; an explicit MAX_CONCURRENT_WRITES
+    wins.
+    """
+    global _admission
+    if Config.MAX_CONCURRENT_WRITES is None:
+        _admission = threading.BoundedSemaphore(max(1, threads - 1))
+
+
+def release_write_slot():
+    """Give the current request's admission slot back, if it holds one.
+
+    Form posts call this (through email_helper.send_email) once their
+    database write is done, so a slow email send doesn't shed the next
+    customer's post. Safe to call more than once.
+    """
+    if has_request_context() and g.pop('write_admitted', False):
+        _admission.release()
+
+
+def init_rate_limiting(app):
+    """Register the limiter's request hooks on app."""
+
+    @app.before_request
+    def limit_writes():
+        if not Config.RATE_LIMIT_ENABLED or request.method not in Config.RATE_LIMITED_METHODS:
+            return None
+        limit = Config.RATE_LIMITS.get(request.blueprint)
+        if limit is None:
+            return None
+        # Retries of a submission we already have are replayed by @idempotent;
+        # they must not spend a token or wait for a write slot
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        if idempotency_key and len(idempotency_key) <= 255 and is_known_key(request.endpoint, idempotency_key):
+            return None
+
+        try:
+            _maybe_purge()
+            allowed, retry_after = take_token(f'{request.endpoint}|{client_ip()}', *limit)
+        except sqlite3.Error as e:
+            # Never turn customers away because the limiter is unavailable
+            print(f"Rate limiter error: {e}")
+            allowed = True
+        if not allowed:
+            return _too_many('Too many submissions - please wait a moment and try again.', retry_after)
+
+        if not _admission.acquire(timeout=Config.WRITE_ADMISSION_WAIT_MS / 1000):
+            return _too_many('We are very busy right now - please try again in a moment.', 1)
+        g.write_admitted = True
+        return None
+
+    @app.teardown_request
+    def release_write_slot_on_teardown(_exc):
+        release_write_slot()
@@ -0,0 +1,60 @@
+"""
+Typed row records for InJoy Beauty.
+Slotted dataclasses generated from the table definitions in database.SCHEMA,
+plus the explicit column lists the model queries select to build them.
+Rows cost a few pointers each instead of a dict, callers get attribute
+access, and orjson serializes the records directly when a response is built.
+"""
+from dataclasses import make_dataclass
+from database import column_names
+
+
+def _to_dict(self):
+    """Plain dict copy of the record."""
+    return {name: getattr(self, name) for name in self.__slots__}
+
+
+def make_record(name, columns):
+    """Build a slotted dataclass with one field per column."""
+    return make_dataclass(name, columns, slots=True, namespace={'to_dict': _to_dict})
+
+
+def select_columns(table, alias=None):
+    """Explicit SELECT list for a table, optionally qualified by an alias."""
+    prefix = f'{alias}.' if alias else ''
+    return ', '.join(prefix + name for name in column_names(table))
+
+
+def record_cursor(conn, record):
+    """Cursor on conn whose rows come back as `record` instances."""
+    cursor = conn.cursor()
+    cursor.row_factory = lambda _cursor, row: record(*row)
+    return cursor
+
+
+# Columns a booking row is joined with from its service
+BOOKING_SERVICE_COLUMNS = [('service_name', 's.name'), ('duration', 's.duration'), ('price', 's.price')]
+
+ServiceRecord = make_record('ServiceRecord', column_names('services'))
+BookingRecord = make_record(
+    'BookingRecord',
+    column_names('bookings') + [name for name, _ in BOOKING_SERVICE_COLUMNS]
+)
+ContactMessageRecord = make_record('ContactMessageRecord', column_names('contact_messages'))
+GalleryImageRecord = make_record('GalleryImageRecord', column_names('gallery_images'))
+IntakeFormRecord = make_record('IntakeFormRecord', column_names('intake_forms'))
+ClientRecord = make_record('ClientRecord', column_names('clients'))
+InquiryRecord = make_record('InquiryRecord', column_names('inquiries'))
+
+SERVICE_COLUMNS = select_columns('services')
+# Bookings are always read joined with their service as `b` and `s`
+BOOKING_COLUMNS = select_columns('bookings', 'b') + ', ' + ', '.join(
+    f'{expression} AS {name}' for name, expression in BOOKING_SERVICE_COLUMNS
+)
+# Unqualified bookings columns, for INSERT ... RETURNING
+BOOKING_INSERT_COLUMNS = select_columns('bookings')
+CONTACT_MESSAGE_COLUMNS = select_columns('contact_messages')
+GALLERY_IMAGE_COLUMNS = select_columns('gallery_images')
+INTAKE_FORM_COLUMNS = select_columns('intake_forms')
+CLIENT_COLUMNS = select_columns('clients')
+INQUIRY_COLUMNS = select_columns('inquiries')
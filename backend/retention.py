@@ -0,0 +1,163 @@
+"""
+Retention and archival for InJoy Beauty.
+Moves old contact messages and intake forms out of the salon database
+into an attached archive database, a small batch per transaction, then
+hands the freed pages back with incremental vacuum. Admin lists and
+scans only pay for the rows Jaymie still works with, and the database
+file on Render's disk stays compact. SQLite only: on PostgreSQL the
+thread doesn't start.
+
+Runs on a background thread in each worker (one worker per interval
+actually does the work), or by hand:
+
+    python backend/retention.py
+"""
+import random
+import threading
+import time
+from config import Config
+from database import (
+    get_db_connection, create_table_sql, add_missing_columns, column_names, enable_incremental_vacuum, claim_run
+)
+from storage import get_backend
+from change_log import log_changes, DELETED
+
+ARCHIVE = 'archive'
+ARCHIVE_COLUMNS = [('archived_at', 'DATETIME DEFAULT CURRENT_TIMESTAMP')]
+
+# How often the background thread checks whether a run is due
+CHECK_INTERVAL_SECONDS = 3600
+
+
+def retention_rules():
+    """table -> (WHERE clause picking the rows to archive, parameters)."""
+    statuses = Config.INTAKE_TERMINAL_STATUSES
+    return {
+        'contact_messages': (
+            "is_read = 1 AND created_at < datetime('now', ?)",
+            [f'-{Config.MESSAGE_RETENTION_DAYS} days'],
+        ),
+        'intake_forms': (
+            f"created_at < datetime('now', ?) OR (status IN ({', '.join('?' * len(statuses))})"
+            " AND updated_at < datetime('now', ?))",
+            [f'-{Config.INTAKE_RETENTION_DAYS} days', *statuses, f'-{Config.INTAKE_TERMINAL_GRACE_DAYS} days'],
+        ),
+    }
+
+
+def attach_archive(conn):
+    """Attach the archive database to conn and make sure its tables exist."""
+    conn.execute(f'ATTACH DATABASE ? AS {ARCHIVE}', (Config.ARCHIVE_DATABASE_PATH,))
+    enable_incremental_vacuum(conn, ARCHIVE)
+    cursor = conn.cursor()
+    for table in retention_rules():
+        cursor.execute(create_table_sql(table, ARCHIVE, ARCHIVE_COLUMNS))
+        add_missing_columns(cursor, table, ARCHIVE, ARCHIVE_COLUMNS)
+    conn.commit()
+
+
+def archive_batch(conn, table, where, params, limit):
+    """Move up to limit matching rows of table into the archive; returns the count.
+
+    Copy and delete share one transaction, so a row is never in both
+    databases or in neither. Archived rows keep their share of the
+    dashboard stats: the stats_paused row stops the DELETE triggers from
+    counting them out, and is gone again before the commit.
+    """
+    columns = ', '.join(column_names(table))
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute("INSERT INTO main.stats_paused (reason) VALUES ('retention')")
+    ids = [row[0] for row in conn.execute(
+        f'SELECT id FROM main.{table} WHERE {where} ORDER BY id LIMIT ?', (*params, limit)
+    )]
+    if ids:
+        placeholders = ', '.join('?' * len(ids))
+        conn.execute(f'''
+            INSERT OR REPLACE INTO {ARCHIVE}.{table} ({columns})
+            SELECT {columns} FROM main.{table} WHERE id IN ({placeholders})
+        ''', ids)
+        conn.execute(f'DELETE FROM main.{table} WHERE id IN ({placeholders})', ids)
+        # Synced admin clients drop archived rows from their lists
+        log_changes(conn, table, ids, DELETED)
+    conn.execute("DELETE FROM main.stats_paused WHERE reason = 'retention'")
+    conn.commit()
+    return len(ids)
+
+
+def vacuum_free_pages(conn, schema='main'):
+    """Return free pages to the filesystem in small steps; returns pages freed."""
+    freed = 0
+    pause = Config.RETENTION_BATCH_PAUSE_MS / 1000
+    while True:
+        free = conn.execute(f'PRAGMA {schema}.freelist_count').fetchone()[0]
+        if not free:
+            return freed
+        step = min(free, Config.VACUUM_PAGES_PER_STEP)
+        # execute() would stop after the first freed page; a script runs the pragma to completion
+        conn.executescript(f'PRAGMA {schema}.incremental_vacuum({step})')
+        freed += step
+        time.sleep(pause)
+
+
+def run_retention(force=False):
+    """Archive everything the retention rules select and vacuum.
+
+    Returns {table: rows archived, 'pages_freed': n}, or None when another
+    worker ran within RETENTION_INTERVAL_HOURS (unless force).
+    """
+    if not get_backend().supports('attach'):
+        raise RuntimeError('Retention archives into an attached SQLite database; it is not available on '
+                           f'{get_backend().name}')
+    conn = get_db_connection()
+    try:
+        if not force and not claim_run(conn, 'retention', Config.RETENTION_INTERVAL_HOURS * 3600):
+            return None
+
+        attach_archive(conn)
+        pause = Config.RETENTION_BATCH_PAUSE_MS / 1000
+        summary = {}
+        for table, (where, params) in retention_rules().items():
+            summary[table] = 0
+            while True:
+                moved = archive_batch(conn, table, where, params, Config.RETENTION_BATCH_SIZE)
+                summary[table] += moved
+                if moved < Config.RETENTION_BATCH_SIZE:
+                    break
+                time.sleep(pause)
+
+        summary['pages_freed'] = vacuum_free_pages(conn)
+        print(f"Retention run: {summary}")
+        return summary
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        # Pooled connections must go back without the archive attached
+        if any(row[1] == ARCHIVE for row in conn.execute('PRAGMA database_list')):
+            conn.execute(f'DETACH DATABASE {ARCHIVE}')
+        conn.close()
+
+
+def _retention_loop():
+    # Spread workers out so they don't all check at once after a deploy
+    time.sleep(random.uniform(60, 300))
+    while True:
+        try:
+            run_retention()
+        except Exception as e:
+            print(f"Retention error: {e}")
+        time.sleep(CHECK_INTERVAL_SECONDS)
+
+
+def start_retention_thread():
+    """Run retention in the background for the life of this worker."""
+    if not Config.RETENTION_ENABLED or not get_backend().supports('attach'):
+        return None
+    thread = threading.Thread(target=_retention_loop, name='retention', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    from warmup import ensure_database
+    ensure_database()
+    print(run_retention(force=True))
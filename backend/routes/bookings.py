@@ -2,10 +2,13 @@
 Booking routes for Jamie's Beauty Studio.
 """
 from flask import Blueprint, request, jsonify
-from models import Booking, Service
+from models import Booking, BookingConflict, BookingError, SeriesConflict, Service, Inquiry
 from email_helper import send_inquiry_notification
-from datetime import datetime, timedelta
-from config import Config
+from availability import available_slots, expand_recurrence
+from idempotency import idempotent
+from singleflight import coalesce
+from shared_cache import cached_response, AVAILABILITY
+from datetime import date, datetime
 import re
 
 bookings_bp = Blueprint('bookings', __name__)
@@ -17,7 +20,62 @@ def is_valid_email(email):
     return re.match(pattern, email) is not None
 
 
+def get_pagination(default_per_page=50, max_per_page=200):
+    """Read page/per_page query args -> (page, per_page, offset)."""
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', default_per_page)), 1), max_per_page)
+    except ValueError:
+        page, per_page = 1, default_per_page
+    return page, per_page, (page - 1) * per_page
+
+
+def paginated(bookings, page, per_page):
+    """Response body for a page fetched with one extra row to detect more pages."""
+    return {
+        'bookings': bookings[:per_page],
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(bookings) > per_page
+    }
+
+
+@bookings_bp.route('/api/bookings', methods=['GET'])
+def list_bookings():
+    """List bookings in a date range (admin schedule view)."""
+    start = request.args.get('start')
+    end = request.args.get('end', start)
+    status = request.args.get('status')
+    
+    if not start:
+        return jsonify({'error': 'start date is required'}), 400
+    try:
+        datetime.strptime(start, '%Y-%m-%d')
+        datetime.strptime(end, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    page, per_page, offset = get_pagination()
+    bookings = Booking.get_range(start, end, status=status, limit=per_page + 1, offset=offset)
+    
+    return jsonify(paginated(bookings, page, per_page))
+
+
+@bookings_bp.route('/api/bookings/client', methods=['GET'])
+def list_client_bookings():
+    """List a client's booking history by email (admin)."""
+    email = request.args.get('email', '').strip()
+    if not email:
+        return jsonify({'error': 'email is required'}), 400
+    
+    page, per_page, offset = get_pagination()
+    bookings = Booking.get_by_client(email, limit=per_page + 1, offset=offset)
+    
+    return jsonify(paginated(bookings, page, per_page))
+
+
 @bookings_bp.route('/api/bookings', methods=['POST'])
+@idempotent
 def create_booking():
     """Create a new booking."""
     data = request.get_json()
@@ -28,35 +86,96 @@ def create_booking():
         if field not in data or not data[field]:
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
-    # Validate service exists
-    service = Service.get_by_id(data['service_id'])
-    if not service:
-        return jsonify({'error': 'Invalid service selected'}), 400
+    # Validate date and time format
+    try:
+        booking_date = datetime.strptime(data['booking_date'], '%Y-%m-%d').date()
+        # Stored and compared as text, so '9:00' must become '09:00'
+        booking_time = datetime.strptime(data['booking_time'], '%H:%M').strftime('%H:%M')
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid date or time format. Use YYYY-MM-DD and HH:MM'}), 400
     
     # Validate date is not in the past
-    booking_date = datetime.strptime(data['booking_date'], '%Y-%m-%d').date()
     if booking_date < datetime.now().date():
         return jsonify({'error': 'Cannot book appointments in the past'}), 400
     
-    # Create booking
+    # Create booking - service check, slot check and insert share one transaction
     try:
-        booking_id = Booking.create(
+        booking = Booking.create_checked(
             service_id=data['service_id'],
             client_name=data['client_name'],
             client_email=data['client_email'],
             client_phone=data.get('client_phone', ''),
-            booking_date=data['booking_date'],
-            booking_time=data['booking_time'],
+            booking_date=booking_date.isoformat(),
+            booking_time=booking_time,
             notes=data.get('notes', '')
         )
         
-        booking = Booking.get_by_id(booking_id)
-        
         return jsonify({
             'message': 'Booking created successfully',
             'booking': booking
         }), 201
         
+    except BookingConflict as e:
+        return jsonify({'error': str(e), 'reason': e.reason}), 409
+    except BookingError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bookings_bp.route('/api/bookings/series', methods=['POST'])
+@idempotent
+def create_booking_series():
+    """Create a recurring series of bookings (e.g. weekly for 12 weeks)."""
+    data = request.get_json()
+    
+    # Validate required fields
+    required_fields = ['service_id', 'client_name', 'client_email', 'start_date', 'booking_time', 'rule']
+    for field in required_fields:
+        if field not in data or not data[field]:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    
+    rule = data['rule']
+    if not isinstance(rule, dict):
+        return jsonify({'error': 'rule must be an object, e.g. {"frequency": "weekly", "count": 12}'}), 400
+    
+    try:
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+        booking_time = datetime.strptime(data['booking_time'], '%H:%M').strftime('%H:%M')
+        dates = expand_recurrence(
+            start_date,
+            rule.get('frequency', 'weekly'),
+            int(rule.get('count', 0)),
+            int(rule.get('interval', 1))
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid series: {e}'}), 400
+    
+    if start_date < datetime.now().date():
+        return jsonify({'error': 'Cannot book appointments in the past'}), 400
+    
+    try:
+        bookings, conflicts = Booking.create_series(
+            service_id=data['service_id'],
+            client_name=data['client_name'],
+            client_email=data['client_email'],
+            client_phone=data.get('client_phone', ''),
+            booking_time=booking_time,
+            dates=[d.isoformat() for d in dates],
+            notes=data.get('notes', ''),
+            skip_conflicts=bool(data.get('skip_conflicts'))
+        )
+        
+        return jsonify({
+            'message': f'{len(bookings)} bookings created successfully',
+            'bookings': bookings,
+            'conflicts': conflicts
+        }), 201
+        
+    except SeriesConflict as e:
+        return jsonify({'error': str(e), 'conflicts': e.conflicts}), 409
+    except BookingError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -94,6 +213,8 @@ def update_booking_status(booking_id):
 
 
 @bookings_bp.route('/api/available-times', methods=['GET'])
+@coalesce
+@cached_response(AVAILABILITY)
 def get_available_times():
     """Get available time slots for a specific date and service."""
     date_str = request.args.get('date')
@@ -103,7 +224,8 @@ def get_available_times():
         return jsonify({'error': 'Date is required'}), 400
     
     try:
-        booking_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        # fromisoformat() takes other ISO forms too; the queries below use the canonical one
+        date_str = date.fromisoformat(date_str).isoformat()
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
@@ -112,50 +234,19 @@ def get_available_times():
     if service_id:
         service = Service.get_by_id(int(service_id))
         if service:
-            duration = service['duration']
+            duration = service.duration
     
-    # Generate all possible time slots
-    all_slots = []
-    current_time = datetime.strptime(f"{Config.BOOKING_START_HOUR}:00", "%H:%M")
-    end_time = datetime.strptime(f"{Config.BOOKING_END_HOUR}:00", "%H:%M")
-    
-    while current_time < end_time:
-        all_slots.append(current_time.strftime("%H:%M"))
-        current_time += timedelta(minutes=Config.TIME_SLOT_DURATION)
-    
-    # Get booked times
+    # Get booked times and filter the day's slots against them
     booked = Booking.get_booked_times(date_str)
     
-    # Filter out unavailable slots
-    available_slots = []
-    for slot in all_slots:
-        slot_time = datetime.strptime(slot, "%H:%M")
-        slot_end = slot_time + timedelta(minutes=duration)
-        
-        is_available = True
-        for booked_time, booked_duration in booked:
-            booked_start = datetime.strptime(booked_time, "%H:%M")
-            booked_end = booked_start + timedelta(minutes=booked_duration)
-            
-            # Check for overlap
-            if not (slot_end <= booked_start or slot_time >= booked_end):
-                is_available = False
-                break
-        
-        # Check if slot doesn't exceed end time
-        if slot_end.strftime("%H:%M") > f"{Config.BOOKING_END_HOUR}:00":
-            is_available = False
-        
-        if is_available:
-            available_slots.append(slot)
-    
     return jsonify({
         'date': date_str,
-        'available_times': available_slots
+        'available_times': available_slots(date_str, duration, booked)
     })
 
 
 @bookings_bp.route('/api/inquiry', methods=['POST'])
+@idempotent
 def submit_inquiry():
     """Submit a recurring client inquiry."""
     data = request.get_json()
@@ -171,7 +262,8 @@ def submit_inquiry():
         return jsonify({'error': 'Invalid email format'}), 400
     
     try:
-        # Send email notification via Resend
+        # Keep a record linked to the client, then notify Jaymie via Resend
+        Inquiry.create(data)
         email_sent = send_inquiry_notification(data)
         
         return jsonify({
@@ -0,0 +1,29 @@
+"""
+Calendar feed routes for InJoy Beauty.
+"""
+import hmac
+from flask import Blueprint, request, jsonify, current_app
+from config import Config
+from calendar_feed import feed
+
+calendar_bp = Blueprint('calendar', __name__)
+
+
+@calendar_bp.route('/api/calendar/<token>.ics', methods=['GET'])
+def get_calendar(token):
+    """Pending and confirmed bookings as an iCalendar feed.
+    
+    Subscribe to the URL from a calendar app; the token in it is the only
+    protection, so keep it long and random (CALENDAR_FEED_TOKEN).
+    """
+    expected = Config.CALENDAR_FEED_TOKEN
+    if not expected or not hmac.compare_digest(token.encode(), expected.encode()):
+        return jsonify({'error': 'Not found'}), 404
+    
+    body, etag = feed.document()
+    response = current_app.response_class(body, mimetype='text/calendar')
+    response.set_etag(etag)
+    # Revalidate every poll; unchanged feeds cost a 304
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['Content-Disposition'] = 'inline; filename="injoy-bookings.ics"'
+    return response.make_conditional(request)
@@ -0,0 +1,32 @@
+"""
+Delta sync routes for InJoy Beauty admin clients.
+"""
+from flask import Blueprint, request, jsonify
+from models import Changes
+
+changes_bp = Blueprint('changes', __name__)
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+
+@changes_bp.route('/api/changes', methods=['GET'])
+def get_changes():
+    """Rows changed since a change-log cursor (admin).
+    
+    Clients keep the returned `next` and pass it as `since` on the next
+    call (0 for a first full sync); while has_more is true there are more
+    changes to fetch right away. On reset, reload the lists and continue
+    from `next`.
+    """
+    # In production, this should be protected with authentication
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    
+    if since < 0 or not 1 <= limit <= MAX_LIMIT:
+        return jsonify({'error': f'since must be 0 or more and limit between 1 and {MAX_LIMIT}'}), 400
+    
+    return jsonify(Changes.since(since, limit))
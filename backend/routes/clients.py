@@ -0,0 +1,22 @@
+"""
+Client routes for InJoy Beauty.
+"""
+from flask import Blueprint, request, jsonify
+from models import Client
+
+clients_bp = Blueprint('clients', __name__)
+
+
+@clients_bp.route('/api/clients', methods=['GET'])
+def get_client_overview():
+    """Get a client's intake forms, bookings, messages and inquiries (admin)."""
+    # In production, this should be protected with authentication
+    email = request.args.get('email', '').strip()
+    if not email:
+        return jsonify({'error': 'email is required'}), 400
+    
+    overview = Client.get_overview(email)
+    if not overview:
+        return jsonify({'error': 'Client not found'}), 404
+    
+    return jsonify(overview)
@@ -4,6 +4,7 @@ Contact routes for Jamie's Beauty Studio.
 from flask import Blueprint, request, jsonify
 from models import ContactMessage
 from email_helper import send_contact_notification
+from idempotency import idempotent
 import re
 
 contact_bp = Blueprint('contact', __name__)
@@ -16,6 +17,7 @@ def is_valid_email(email):
 
 
 @contact_bp.route('/api/contact', methods=['POST'])
+@idempotent
 def submit_contact():
     """Submit a contact message."""
     data = request.get_json()
@@ -57,7 +59,7 @@ def get_messages():
     """Get all contact messages (admin endpoint)."""
     # In production, this should be protected with authentication
     unread_only = request.args.get('unread', 'false').lower() == 'true'
-    messages = ContactMessage.get_all(unread_only=unread_only)
+    messages = ContactMessage.get_all_json(unread_only=unread_only)
     return jsonify(messages)
 
 
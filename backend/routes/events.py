@@ -0,0 +1,93 @@
+"""
+Live admin updates for InJoy Beauty, as Server-Sent Events.
+
+Each response sends the change-log entries after the client's last event
+id and then ends with a `retry:` hint; the browser's EventSource
+reconnects after it with Last-Event-ID set, so an idle listener costs one
+primary-key query per SSE_RETRY_MS instead of holding a gthread worker
+thread open. SSE_HOLD_SECONDS lets a few listeners wait briefly for the
+next event for lower latency.
+
+    const events = new EventSource('/api/events');
+    events.addEventListener('intake_forms.created', e => addForm(JSON.parse(e.data)));
+"""
+import threading
+import time
+from flask import Blueprint, Response, request, current_app
+from config import Config
+from change_log import changes_since, log_bounds, maybe_purge
+import deadline
+
+events_bp = Blueprint('events', __name__)
+
+# Listeners currently waiting for an event in this worker
+_waiting = threading.BoundedSemaphore(Config.SSE_MAX_WAITING)
+
+
+def _last_event_id():
+    """The client's resume point: Last-Event-ID, or ?last_event_id= on the first connect."""
+    value = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _event(name, seq, data):
+    return f'event: {name}\nid: {seq}\ndata: {current_app.json.dumps(data)}\n\n'
+
+
+def _wait_for_changes(since):
+    """Poll for entries after since until SSE_HOLD_SECONDS (or the deadline) runs out."""
+    if Config.SSE_HOLD_SECONDS <= 0 or not _waiting.acquire(blocking=False):
+        return []
+    try:
+        # Leave a second of the request budget for writing the response
+        hold = min(Config.SSE_HOLD_SECONDS, max(0.0, deadline.timeout_for(Config.SSE_HOLD_SECONDS) - 1))
+        give_up_at = time.monotonic() + hold
+        while time.monotonic() < give_up_at:
+            time.sleep(min(Config.SSE_POLL_MS / 1000, max(0.0, give_up_at - time.monotonic())))
+            changes = changes_since(since, Config.SSE_BATCH_LIMIT)
+            if changes:
+                return changes
+        return []
+    finally:
+        _waiting.release()
+
+
+@events_bp.route('/api/events', methods=['GET'])
+def stream_events():
+    """Change events for every table in the change log (admin).
+    
+    Event names are '<table>.<action>' (e.g. 'bookings.status_changed')
+    with {seq, table, id, action, status, at} as data. A new listener gets
+    a 'ready' event carrying the current position; one whose position was
+    purged from the log gets 'reset' and should reload its lists.
+    """
+    # In production, this should be protected with authentication
+    maybe_purge()
+    since = _last_event_id()
+    lines = [f'retry: {Config.SSE_RETRY_MS}\n\n']
+    oldest, newest = log_bounds()
+    
+    if since is None:
+        lines.append(_event('ready', newest, {'seq': newest}))
+    elif since > newest or (oldest is not None and since < oldest - 1):
+        # Entries after since were purged (or the log was recreated)
+        lines.append(_event('reset', newest, {'seq': newest}))
+    else:
+        changes = changes_since(since, Config.SSE_BATCH_LIMIT) if since < newest else []
+        if not changes:
+            changes = _wait_for_changes(since)
+        if len(changes) == Config.SSE_BATCH_LIMIT:
+            # More are waiting: come straight back for them
+            lines[0] = 'retry: 0\n\n'
+        for change in changes:
+            lines.append(_event(f"{change['table']}.{change['action']}", change['seq'], change))
+        if not changes:
+            lines.append(': no changes\n\n')
+    
+    response = Response(''.join(lines), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
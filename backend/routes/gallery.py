@@ -2,12 +2,20 @@
 Gallery routes for Jamie's Beauty Studio.
 """
 from flask import Blueprint, jsonify, request
+from compression import cache_by_etag
+from singleflight import coalesce
+from shared_cache import cached_response, CATALOGUE
 from models import GalleryImage
 
 gallery_bp = Blueprint('gallery', __name__)
 
+# Catalogue responses revalidate by ETag and stay compressed in memory
+gallery_bp.after_request(cache_by_etag)
+
 
 @gallery_bp.route('/api/gallery', methods=['GET'])
+@coalesce
+@cached_response(CATALOGUE)
 def get_gallery():
     """Get all gallery images."""
     category = request.args.get('category')
@@ -21,6 +29,8 @@ def get_gallery():
 
 
 @gallery_bp.route('/api/gallery/featured', methods=['GET'])
+@coalesce
+@cached_response(CATALOGUE)
 def get_featured():
     """Get featured gallery images for homepage."""
     images = GalleryImage.get_featured()
@@ -31,5 +41,5 @@ def get_featured():
 def get_categories():
     """Get list of gallery categories."""
     images = GalleryImage.get_all()
-    categories = list(set(img['category'] for img in images if img['category']))
+    categories = list(set(img.category for img in images if img.category))
     return jsonify(sorted(categories))
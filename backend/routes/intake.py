@@ -2,15 +2,17 @@
 Intake form routes for InJoy Beauty.
 """
 from flask import Blueprint, request, jsonify
-import sys
-sys.path.insert(0, '..')
 from models import IntakeForm
 from email_helper import send_intake_notification
+from idempotency import idempotent
+from datetime import date
+import flags
 
 intake_bp = Blueprint('intake', __name__)
 
 
 @intake_bp.route('/api/intake', methods=['POST'])
+@idempotent
 def submit_intake_form():
     """Submit a new client intake form."""
     try:
@@ -50,12 +52,12 @@ def get_intake_forms():
     """Get all intake forms (admin)."""
     try:
         status = request.args.get('status')
-        forms = IntakeForm.get_all(status=status)
+        forms = IntakeForm.get_all_json(status=status)
         
         return jsonify({
             'success': True,
             'forms': forms,
-            'count': len(forms)
+            'count': forms.row_count
         })
     
     except Exception as e:
@@ -65,6 +67,42 @@ def get_intake_forms():
         }), 500
 
 
+@intake_bp.route('/api/intake/support-needs', methods=['GET'])
+def filter_by_support_needs():
+    """Find intake forms by sensory/mobility flags (admin).
+    
+    ?any=flag,flag matches forms with at least one of the flags, ?all= forms
+    with every one; ?upcoming=true keeps clients with an upcoming booking.
+    """
+    def flag_list(arg):
+        return [name.strip() for name in request.args.get(arg, '').split(',') if name.strip()]
+    
+    try:
+        any_mask = flags.mask_for(flag_list('any'))
+        all_mask = flags.mask_for(flag_list('all'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'{e}. Must be one of: {", ".join(flags.FLAG_COLUMNS)}'
+        }), 400
+    
+    if not any_mask and not all_mask:
+        return jsonify({'success': False, 'error': 'Give at least one flag in any= or all='}), 400
+    
+    upcoming = request.args.get('upcoming', '').lower() in ('1', 'true', 'yes')
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+    except ValueError:
+        limit = 100
+    
+    forms = IntakeForm.filter_by_flags(any_mask, all_mask, upcoming_from=date.today() if upcoming else None, limit=limit)
+    return jsonify({
+        'success': True,
+        'forms': forms,
+        'count': len(forms)
+    })
+
+
 @intake_bp.route('/api/intake/<int:form_id>', methods=['GET'])
 def get_intake_form(form_id):
     """Get a single intake form by ID."""
@@ -0,0 +1,32 @@
+"""
+Worker metrics routes for InJoy Beauty.
+"""
+import os
+from flask import Blueprint, jsonify
+import compression
+import singleflight
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request coalescing and compression counters for the worker that answers (admin).
+    
+    Counters are per worker process and reset when it restarts; `pid`
+    tells the workers apart.
+    """
+    # In production, this should be protected with authentication
+    coalescing = singleflight.snapshot()
+    executed = sum(counts['executed'] for counts in coalescing.values())
+    coalesced = sum(counts['coalesced'] for counts in coalescing.values())
+    
+    return jsonify({
+        'pid': os.getpid(),
+        'coalescing': {
+            'executed': executed,
+            'coalesced': coalesced,
+            'endpoints': coalescing
+        },
+        'compression': dict(compression.stats)
+    })
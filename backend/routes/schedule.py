@@ -0,0 +1,142 @@
+"""
+Business hours, blackout dates and schedule blocks routes for InJoy Beauty.
+"""
+import hmac
+from functools import wraps
+from flask import Blueprint, request, jsonify
+from config import Config
+from models import Schedule
+from availability import to_minutes
+from datetime import date, datetime
+
+schedule_bp = Blueprint('schedule', __name__)
+
+# Allowed spacing of offered start times, in minutes
+MIN_SLOT_MINUTES = 5
+MAX_SLOT_MINUTES = 240
+
+
+def require_admin_token(view):
+    """Only run view for requests with Authorization: Bearer <SCHEDULE_ADMIN_TOKEN>.
+    
+    Closing weekdays or blacking out dates turns every customer away, so
+    unlike the read-only admin endpoints these refuse to run at all until
+    the token is configured.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = Config.SCHEDULE_ADMIN_TOKEN
+        if not expected:
+            return jsonify({'error': 'Schedule changes are disabled; set SCHEDULE_ADMIN_TOKEN'}), 403
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), expected.encode()):
+            response = jsonify({'error': 'Unauthorized'})
+            response.status_code = 401
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def parse_time(value):
+    """'HH:MM' -> minutes since midnight; raises ValueError."""
+    datetime.strptime(value, '%H:%M')
+    return to_minutes(value)
+
+
+def parse_date(value):
+    """'YYYY-MM-DD' -> the same string, checked; raises ValueError."""
+    return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+
+
+@schedule_bp.route('/api/schedule', methods=['GET'])
+def get_schedule():
+    """Weekly hours and upcoming blackouts and blocks (admin)."""
+    # In production, this should be protected with authentication
+    return jsonify(Schedule.get_overview(date.today().isoformat()))
+
+
+@schedule_bp.route('/api/schedule/hours', methods=['PUT'])
+@require_admin_token
+def set_hours():
+    """Replace the weekly hours (admin, bearer token).
+    
+    Body: {"hours": [{"weekday": 0, "open": "15:00", "close": "20:00",
+    "slot_minutes": 30}, ...]} with weekday 0 = Monday; weekdays left out
+    are closed.
+    """
+    data = request.get_json() or {}
+    hours = data.get('hours')
+    if not isinstance(hours, list):
+        return jsonify({'error': 'hours must be a list'}), 400
+    
+    rows = {}
+    try:
+        for entry in hours:
+            weekday = int(entry['weekday'])
+            open_minute, close_minute = parse_time(entry['open']), parse_time(entry['close'])
+            slot_minutes = int(entry.get('slot_minutes', 30))
+            if not 0 <= weekday <= 6 or weekday in rows:
+                raise ValueError('each weekday (0-6) may appear once')
+            if open_minute >= close_minute:
+                raise ValueError('open must be before close')
+            if not MIN_SLOT_MINUTES <= slot_minutes <= MAX_SLOT_MINUTES:
+                raise ValueError(f'slot_minutes must be between {MIN_SLOT_MINUTES} and {MAX_SLOT_MINUTES}')
+            rows[weekday] = (weekday, open_minute, close_minute, slot_minutes)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid hours: {e}'}), 400
+    
+    Schedule.set_hours(list(rows.values()))
+    return jsonify({'message': 'Business hours updated successfully'})
+
+
+@schedule_bp.route('/api/schedule/blackouts', methods=['POST'])
+@require_admin_token
+def add_blackout():
+    """Close the salon for a date or range of dates (admin, bearer token)."""
+    data = request.get_json() or {}
+    try:
+        start = parse_date(data['start_date'])
+        end = parse_date(data.get('end_date') or data['start_date'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'start_date (and optional end_date) must be YYYY-MM-DD'}), 400
+    if end < start:
+        return jsonify({'error': 'end_date must be on or after start_date'}), 400
+    
+    blackout_id = Schedule.add_blackout(start, end, data.get('reason'))
+    return jsonify({'message': 'Blackout added successfully', 'id': blackout_id}), 201
+
+
+@schedule_bp.route('/api/schedule/blackouts/<int:blackout_id>', methods=['DELETE'])
+@require_admin_token
+def delete_blackout(blackout_id):
+    """Reopen the dates of a blackout (admin, bearer token)."""
+    if not Schedule.delete('blackout_dates', blackout_id):
+        return jsonify({'error': 'Blackout not found'}), 404
+    return jsonify({'message': 'Blackout removed successfully'})
+
+
+@schedule_bp.route('/api/schedule/blocks', methods=['POST'])
+@require_admin_token
+def add_block():
+    """Take part of a day out of the bookable hours, e.g. for a mobile visit (admin, bearer token)."""
+    data = request.get_json() or {}
+    try:
+        block_date = parse_date(data['date'])
+        start, end = parse_time(data['start']), parse_time(data['end'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'date must be YYYY-MM-DD and start/end HH:MM'}), 400
+    if start >= end:
+        return jsonify({'error': 'start must be before end'}), 400
+    
+    block_id = Schedule.add_block(block_date, start, end, data.get('kind') or 'mobile', data.get('notes'))
+    return jsonify({'message': 'Block added successfully', 'id': block_id}), 201
+
+
+@schedule_bp.route('/api/schedule/blocks/<int:block_id>', methods=['DELETE'])
+@require_admin_token
+def delete_block(block_id):
+    """Give a blocked time back to bookings (admin, bearer token)."""
+    if not Schedule.delete('schedule_blocks', block_id):
+        return jsonify({'error': 'Block not found'}), 404
+    return jsonify({'message': 'Block removed successfully'})
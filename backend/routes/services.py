@@ -2,12 +2,20 @@
 Services routes for Jamie's Beauty Studio.
 """
 from flask import Blueprint, jsonify, request
+from compression import cache_by_etag
+from singleflight import coalesce
+from shared_cache import cached_response, CATALOGUE
 from models import Service
 
 services_bp = Blueprint('services', __name__)
 
+# Catalogue responses revalidate by ETag and stay compressed in memory
+services_bp.after_request(cache_by_etag)
+
 
 @services_bp.route('/api/services', methods=['GET'])
+@coalesce
+@cached_response(CATALOGUE)
 def get_services():
     """Get all services, optionally filtered by category."""
     category = request.args.get('category')
@@ -32,6 +40,8 @@ def get_service(service_id):
 
 
 @services_bp.route('/api/services/categories', methods=['GET'])
+@coalesce
+@cached_response(CATALOGUE)
 def get_categories():
     """Get list of service categories."""
     categories = Service.get_categories()
@@ -0,0 +1,33 @@
+"""
+Dashboard stats routes for InJoy Beauty.
+"""
+from flask import Blueprint, request, jsonify
+from models import Stats
+from datetime import date, datetime, timedelta
+
+stats_bp = Blueprint('stats', __name__)
+
+# Default window either side of today, and the widest window allowed
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+@stats_bp.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Get dashboard counts: intake forms by status, unread messages, bookings and revenue (admin)."""
+    # In production, this should be protected with authentication
+    today = date.today()
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else today - timedelta(days=DEFAULT_RANGE_DAYS)
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else today + timedelta(days=DEFAULT_RANGE_DAYS)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    if end < start or (end - start).days > MAX_RANGE_DAYS:
+        return jsonify({'error': f'end must be on or after start and at most {MAX_RANGE_DAYS} days later'}), 400
+    
+    stats = Stats.get_summary(start, end)
+    stats['range'] = {'start': start.isoformat(), 'end': end.isoformat()}
+    return jsonify(stats)
@@ -0,0 +1,221 @@
+"""
+Cache shared by every gunicorn worker on an instance.
+Entries live in a small SQLite file under /dev/shm (a RAM-backed
+filesystem on Linux; next to the salon database elsewhere), read through
+SQLite's memory-mapped I/O, so a response one worker built is warm for
+the others. Entries expire after their TTL, and the least recently used
+ones are evicted once the file holds more than SHARED_CACHE_MAX_BYTES.
+
+Invalidation uses generation counters: keys are stored under their
+namespace's current generation, and bump(namespace) moves every worker
+to a new generation in one atomic statement, so the old entries are
+never read again and age out. Bump after the write commits, and read the
+generation before computing a value to store: a bump that lands while it
+is being computed then leaves it under the old generation, unread.
+
+Like the rate-limit buckets the file is per instance; with the PostgreSQL
+backend and several instances, another instance's writes only show once
+entries expire.
+"""
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+from flask import request, current_app
+from config import Config
+
+# Namespaces bumped by the write paths
+CATALOGUE = 'catalogue'        # services and gallery images
+AVAILABILITY = 'availability'  # bookings and the schedule
+SCHEDULE = 'schedule'          # business hours, blackout dates, schedule blocks
+
+# One connection per thread, tagged with the owning pid
+_local = threading.local()
+
+# Access times are only refreshed when older than this, so hits stay read-only
+ACCESS_RESOLUTION_SECONDS = 10
+# Check the size limit every this many stores
+EVICT_EVERY = 32
+_stores = 0
+
+
+def _db():
+    """This thread's connection to the shared cache file."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+
+    path = Path(Config.SHARED_CACHE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit; every operation is a single statement
+    conn = sqlite3.connect(str(path), timeout=1, isolation_level=None, check_same_thread=False)
+    # Everything here can be rebuilt - trade durability for speed
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute(f'PRAGMA mmap_size={Config.SHARED_CACHE_MMAP_BYTES}')
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at);
+        CREATE TABLE IF NOT EXISTS generations (
+            namespace TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    ''')
+    _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def generation(namespace):
+    """namespace's current generation.
+
+    Counters start from the clock in milliseconds, so they keep increasing
+    even if the cache file is lost (e.g. /dev/shm is cleared on reboot)
+    and never repeat an ETag built from an older generation.
+    """
+    conn = _db()
+    row = conn.execute('SELECT value FROM generations WHERE namespace = ?', (namespace,)).fetchone()
+    if row is not None:
+        return row[0]
+    conn.execute('INSERT OR IGNORE INTO generations (namespace, value) VALUES (?, ?)',
+                 (namespace, int(time.time() * 1000)))
+    return conn.execute('SELECT value FROM generations WHERE namespace = ?', (namespace,)).fetchone()[0]
+
+
+def bump(namespace):
+    """Invalidate everything cached under namespace, in every worker. Returns the new generation."""
+    try:
+        return _db().execute('''
+            INSERT INTO generations (namespace, value) VALUES (?, ?)
+            ON CONFLICT (namespace) DO UPDATE SET value = value + 1
+            RETURNING value
+        ''', (namespace, int(time.time() * 1000))).fetchone()[0]
+    except sqlite3.OperationalError as e:
+        # The write itself has committed; entries expire within their TTL anyway
+        print(f"Shared cache: could not invalidate {namespace}: {e}")
+        return None
+
+
+def _full_key(namespace, key, gen):
+    return f'{namespace}:{generation(namespace) if gen is None else gen}:{key}'
+
+
+def get(namespace, key, gen=None):
+    """The bytes cached for key under generation gen of namespace (default: the current one), or None."""
+    if not Config.SHARED_CACHE_ENABLED:
+        return None
+    full_key = _full_key(namespace, key, gen)
+    conn = _db()
+    row = conn.execute('SELECT value, expires_at, accessed_at FROM entries WHERE key = ?', (full_key,)).fetchone()
+    if row is None:
+        return None
+    value, expires_at, accessed_at = row
+    now = time.time()
+    if expires_at <= now:
+        return None
+    if now - accessed_at > ACCESS_RESOLUTION_SECONDS:
+        conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, full_key))
+    return value
+
+
+def put(namespace, key, value, ttl=None, gen=None):
+    """Cache value (bytes) for key under generation gen of namespace.
+
+    Pass the generation read before value was computed; the default, the
+    current one, is only safe for values computed from nothing that bump()
+    invalidates.
+    """
+    global _stores
+    if not Config.SHARED_CACHE_ENABLED or len(value) > Config.SHARED_CACHE_MAX_BYTES // 8:
+        return
+    if ttl is None:
+        ttl = Config.SHARED_CACHE_TTL_SECONDS.get(namespace, Config.SHARED_CACHE_DEFAULT_TTL_SECONDS)
+    now = time.time()
+    try:
+        _db().execute(
+            'INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+            (_full_key(namespace, key, gen), value, len(value), now + ttl, now)
+        )
+    except sqlite3.OperationalError:
+        # Busy with another worker's store; the next request caches it instead
+        return
+    _stores += 1
+    if _stores % EVICT_EVERY == 0:
+        evict()
+
+
+def evict():
+    """Drop expired entries, then least recently used ones until under SHARED_CACHE_MAX_BYTES."""
+    conn = _db()
+    conn.execute('DELETE FROM entries WHERE expires_at <= ?', (time.time(),))
+    excess = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0] - Config.SHARED_CACHE_MAX_BYTES
+    if excess <= 0:
+        return
+    freed = 0
+    doomed = []
+    for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed_at'):
+        doomed.append((key,))
+        freed += size
+        if freed >= excess:
+            break
+    conn.executemany('DELETE FROM entries WHERE key = ?', doomed)
+
+
+def clear():
+    """Drop every entry (generations are kept)."""
+    _db().execute('DELETE FROM entries')
+
+
+def invalidate_all():
+    """Drop every entry and bump every namespace, e.g. after a database restore."""
+    clear()
+    for namespace in (CATALOGUE, AVAILABILITY, SCHEDULE):
+        bump(namespace)
+
+
+def get_or_set(namespace, key, compute, ttl=None, gen=None):
+    """Cached bytes for key, or compute() stored for the other workers.
+
+    gen defaults to the generation current before compute() runs.
+    """
+    if not Config.SHARED_CACHE_ENABLED:
+        return compute()
+    if gen is None:
+        gen = generation(namespace)
+    value = get(namespace, key, gen)
+    if value is None:
+        value = compute()
+        put(namespace, key, value, ttl, gen)
+    return value
+
+
+def cached_response(namespace, ttl=None):
+    """Decorator for GET views: successful responses are shared across workers.
+
+    Keyed by endpoint, view args and the full query string; a bump of
+    namespace invalidates them.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not Config.SHARED_CACHE_ENABLED:
+                return view(*args, **kwargs)
+            key = f'{request.endpoint}:{sorted(kwargs.items())}:{request.query_string.decode()}'
+            gen = generation(namespace)
+            cached = get(namespace, key, gen)
+            if cached is not None:
+                mimetype, _, body = cached.partition(b'\n')
+                return current_app.response_class(body, mimetype=mimetype.decode())
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                put(namespace, key, response.mimetype.encode() + b'\n' + response.get_data(), ttl, gen)
+            return response
+        return wrapper
+    return decorator
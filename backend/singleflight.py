@@ -0,0 +1,92 @@
+"""
+Single-flight request coalescing for InJoy Beauty.
+When a shared link sends a burst of visitors to the same page, identical
+concurrent GETs (same endpoint, same normalized query args) wait for the
+request already running and reuse its serialized response instead of each
+running the same queries and JSON encoding. Nothing is kept once that
+request finishes, so answers are never staler than the request itself.
+
+Coalescing happens per worker process, across its request threads.
+/api/metrics reports how many requests ran and how many were coalesced.
+"""
+import threading
+from functools import wraps
+from flask import request, current_app
+import deadline
+
+# key -> _Call for computations currently running
+_inflight = {}
+_lock = threading.Lock()
+
+# endpoint -> {'executed': n, 'coalesced': n}
+stats = {}
+
+
+class _Call:
+    """One in-flight computation that identical requests wait on."""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def run_once(key, fn):
+    """fn()'s result, shared with callers passing the same key while it runs.
+
+    key[0] names the counter in stats. Errors raised by fn are raised in
+    every waiting caller too.
+    """
+    with _lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+        counts = stats.setdefault(key[0], {'executed': 0, 'coalesced': 0})
+        counts['executed' if leader else 'coalesced'] += 1
+
+    if not leader:
+        if not call.done.wait(deadline.remaining()):
+            raise TimeoutError(f'Gave up waiting for in-flight {key[0]}')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = fn()
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            del _inflight[key]
+        call.done.set()
+
+
+def _normalized_args():
+    """Query args sorted, without empty values (the views treat those as absent)."""
+    return tuple(sorted((k, v) for k, v in request.args.items(multi=True) if v))
+
+
+def _serialize(rv):
+    response = current_app.make_response(rv)
+    return response.get_data(), response.status_code, list(response.headers.items())
+
+
+def coalesce(view):
+    """Decorator for GET views: identical concurrent requests share one response."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, tuple(sorted(kwargs.items())), _normalized_args())
+        body, status, headers = run_once(key, lambda: _serialize(view(*args, **kwargs)))
+        # A fresh response per request; after_request hooks then apply to each
+        return current_app.response_class(body, status=status, headers=headers)
+    return wrapper
+
+
+def snapshot():
+    """A copy of the per-endpoint counters."""
+    with _lock:
+        return {endpoint: dict(counts) for endpoint, counts in stats.items()}
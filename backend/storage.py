@@ -0,0 +1,540 @@
+"""
+Storage backends for InJoy Beauty.
+The models talk to the database through get_db_connection() and the
+sqlite3 connection API (execute, cursor, row_factory, commit, close). This
+module supplies that connection from one of two backends:
+
+- SQLiteBackend (default): a small per-process pool of sqlite3
+  connections on DATABASE_PATH.
+- PostgresBackend (when DATABASE_URL is a postgres:// URL; experimental,
+  so POSTGRES_EXPERIMENTAL must also be set): a thread-safe
+  psycopg_pool pool shared by the worker's threads, with server-side
+  prepared statements, behind an adapter that speaks the same sqlite3-style
+  API and translates '?' / ':name' placeholders. Several instances can
+  then share one database.
+
+SQLite-only features (triggers, PRAGMAs, ATTACH, the online backup API)
+check backend.supports() and step aside on PostgreSQL.
+"""
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from config import Config, DATABASE_PATH
+import deadline
+
+# SQLite VM instructions between deadline checks on a bounded connection
+PROGRESS_HANDLER_STEPS = 1000
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that goes back to its pool when closed."""
+
+    pool = None
+    # Carries a request deadline (see ConnectionPool.acquire)
+    bounded = False
+
+    def close(self):
+        """Return the connection to the pool instead of closing it."""
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+
+class ConnectionPool:
+    """Small per-process pool of SQLite connections.
+
+    Callers keep using get_db_connection() / conn.close(); close() hands the
+    connection back here so the next request skips connect and schema load.
+    """
+
+    def __init__(self, path, size):
+        self.path = str(path)
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _connect(self):
+        # Ensure the database directory exists
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, factory=PooledConnection, check_same_thread=False,
+                               timeout=Config.DB_BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row  # Enable column access by name
+        conn.pool = self
+        return conn
+
+    def _check_fork(self):
+        # Connections inherited from a parent process (gunicorn --preload)
+        # must not be shared with it, so a forked worker starts empty.
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._idle = []
+                    self._pid = os.getpid()
+
+    def acquire(self):
+        """Take an idle connection, or open a new one."""
+        self._check_fork()
+        conn = None
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+        if conn is None:
+            conn = self._connect()
+        if deadline.remaining() is not None:
+            self._bound_to_deadline(conn)
+        return conn
+
+    def _bound_to_deadline(self, conn):
+        """Stop conn's queries and lock waits at the request's deadline."""
+        conn.bounded = True
+        busy_ms = int(deadline.timeout_for(Config.DB_BUSY_TIMEOUT_MS / 1000) * 1000)
+        conn.execute(f'PRAGMA busy_timeout = {busy_ms}')
+        # Returning True from the handler interrupts the running statement
+        conn.set_progress_handler(deadline.expired, PROGRESS_HANDLER_STEPS)
+
+    def release(self, conn):
+        """Give a connection back; surplus connections are really closed."""
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+        if conn.bounded:
+            conn.bounded = False
+            conn.set_progress_handler(None, 0)
+            conn.execute(f'PRAGMA busy_timeout = {Config.DB_BUSY_TIMEOUT_MS}')
+        with self._lock:
+            if os.getpid() == self._pid and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        sqlite3.Connection.close(conn)
+
+    def prime(self):
+        """Open connections up to the pool size and load the schema on each."""
+        self._check_fork()
+        conns = [self.acquire() for _ in range(self.size)]
+        for conn in conns:
+            conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        for conn in conns:
+            conn.close()
+        return len(conns)
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            sqlite3.Connection.close(conn)
+
+
+class SQLiteBackend:
+    """The default backend: pooled sqlite3 connections on one database file."""
+
+    name = 'sqlite'
+    features = frozenset({'pragmas', 'triggers', 'attach', 'online_backup', 'json_object'})
+    Error = sqlite3.Error
+    OperationalError = sqlite3.OperationalError
+    IntegrityError = sqlite3.IntegrityError
+
+    def __init__(self, path, pool_size):
+        self.pool = ConnectionPool(path, pool_size)
+
+    def supports(self, feature):
+        """True if this backend has `feature` (see `features`)."""
+        return feature in self.features
+
+    def connect(self):
+        return self.pool.acquire()
+
+    def prime(self):
+        return self.pool.prime()
+
+    def close_all(self):
+        self.pool.close_all()
+
+    def column_declaration(self, declaration):
+        """SCHEMA declarations are written in SQLite's dialect."""
+        return declaration
+
+    def existing_columns(self, conn, table, schema=None):
+        """Names of the columns a table has in the database."""
+        pragma = f'{schema}.table_info' if schema else 'table_info'
+        return {row[1] for row in conn.execute(f'PRAGMA {pragma}({table})').fetchall()}
+
+    def get_version(self, conn):
+        """Schema version recorded by run_migrations()."""
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def set_version(self, conn, version):
+        conn.execute(f'PRAGMA user_version = {int(version)}')
+
+    def serialize_writes(self, conn):
+        """Make conn's transaction commit in order with other writers.
+
+        SQLite has a single writer already, so this is a no-op.
+        """
+
+
+# Values DATETIME DEFAULT CURRENT_TIMESTAMP produce in SQLite, so both
+# backends store the same 'YYYY-MM-DD HH:MM:SS' UTC text
+PG_CURRENT_TIMESTAMP = "to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')"
+
+# SQLite column types -> PostgreSQL. Dates and times stay TEXT so queries
+# compare and return the same ISO strings on both backends.
+PG_TYPES = [
+    (re.compile(r'\bINTEGER PRIMARY KEY( AUTOINCREMENT)?', re.I), 'SERIAL PRIMARY KEY'),
+    (re.compile(r'\bREAL\b', re.I), 'DOUBLE PRECISION'),
+    (re.compile(r'\bBLOB\b', re.I), 'BYTEA'),
+    (re.compile(r'\bBOOLEAN\b', re.I), 'INTEGER'),  # Queries compare flags with 0/1
+    (re.compile(r'\b(DATETIME|DATE|TIME)\b', re.I), 'TEXT'),
+]
+
+# Quoted strings and identifiers, '::' casts, placeholders and bare '%'
+_SQL_TOKENS = re.compile(r"""('(?:[^']|'')*'|"[^"]*"|::|\?|:[A-Za-z_]\w*|%|\bCURRENT_TIMESTAMP\b)""", re.I)
+
+# Statements after which legacy sqlite3 would have opened a transaction
+_DML = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.I)
+
+# Key of the advisory lock standing in for SQLite's database write lock
+WRITE_LOCK_KEY = zlib.crc32(b'injoy-beauty-write-lock')
+
+
+def translate_sql(sql):
+    """Rewrite a statement in the models' SQLite dialect for psycopg.
+
+    '?' becomes %s, ':name' becomes %(name)s, a literal '%' is doubled and
+    CURRENT_TIMESTAMP yields SQLite's text timestamp. Quoted strings and
+    '::' casts are left alone.
+    """
+    def replace(match):
+        token = match.group(0)
+        if token[0] in '\'"' or token == '::':
+            return token
+        if token == '?':
+            return '%s'
+        if token == '%':
+            return '%%'
+        if token.upper() == 'CURRENT_TIMESTAMP':
+            return PG_CURRENT_TIMESTAMP
+        return f'%({token[1:]})s'
+    return _SQL_TOKENS.sub(replace, sql)
+
+
+def _param(value):
+    # TEXT date columns compare with ISO strings, as sqlite3's adapter stored them
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _params(params):
+    if isinstance(params, dict):
+        return {key: _param(value) for key, value in params.items()}
+    return [_param(value) for value in params]
+
+
+class PostgresRow:
+    """Row supporting row[0] and row['name'], like sqlite3.Row."""
+
+    __slots__ = ('_values', '_index')
+
+    def __init__(self, values, index):
+        self._values = values
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._values[self._index[key]]
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def keys(self):
+        return list(self._index)
+
+
+class PostgresCursor:
+    """sqlite3-style cursor over a psycopg cursor."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.row_factory = connection.row_factory
+        self._cursor = connection.raw.cursor()
+        self._index = None
+
+    def _begin_for(self, sql):
+        # Legacy sqlite3 opens a transaction before DML and leaves SELECTs
+        # in autocommit; the caller's commit() ends it.
+        if not self.connection.in_transaction and _DML.match(sql):
+            self._cursor.execute('BEGIN')
+
+    def execute(self, sql, params=()):
+        statement = self.connection.translate(sql)
+        if statement is BEGIN_WRITE:
+            self.connection.begin_write()
+            return self
+        self._begin_for(sql)
+        self._cursor.execute(statement, _params(params) if params else None)
+        self._index = None
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._begin_for(sql)
+        self._cursor.executemany(self.connection.translate(sql), [_params(params) for params in seq_of_params])
+        self._index = None
+        return self
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _make_row(self, values):
+        factory = self.row_factory
+        if factory is None:
+            return values
+        if factory is sqlite3.Row:
+            if self._index is None:
+                self._index = {column.name: i for i, column in enumerate(self._cursor.description)}
+            return PostgresRow(values, self._index)
+        return factory(self, values)
+
+    def fetchone(self):
+        values = self._cursor.fetchone()
+        return None if values is None else self._make_row(values)
+
+    def fetchall(self):
+        return [self._make_row(values) for values in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for values in self._cursor:
+            yield self._make_row(values)
+
+    def close(self):
+        self._cursor.close()
+
+
+# Marker returned by PostgresConnection.translate() for BEGIN IMMEDIATE
+BEGIN_WRITE = object()
+
+
+class PostgresConnection:
+    """sqlite3-style connection over a pooled psycopg connection.
+
+    The psycopg connection is in autocommit mode; like legacy sqlite3, a
+    transaction is opened before the first INSERT/UPDATE/DELETE and ended by
+    commit() or rollback(). BEGIN IMMEDIATE opens a transaction holding an
+    advisory lock, so code relying on SQLite's single writer (booking
+    overlap checks, migrations, idempotency claims) is serialized the same
+    way across every instance.
+    """
+
+    def __init__(self, backend, raw):
+        self.backend = backend
+        self.raw = raw
+        self.row_factory = sqlite3.Row
+        self.bounded = False
+
+    def translate(self, sql):
+        cache = self.backend.statements
+        statement = cache.get(sql)
+        if statement is None:
+            statement = BEGIN_WRITE if sql.strip().upper() == 'BEGIN IMMEDIATE' else translate_sql(sql)
+            cache[sql] = statement
+        return statement
+
+    @property
+    def in_transaction(self):
+        return self.raw.info.transaction_status != self.backend.IDLE
+
+    def begin_write(self):
+        if self.in_transaction:
+            raise self.backend.OperationalError('cannot start a transaction within a transaction')
+        self.raw.execute('BEGIN')
+        self.raw.execute('SELECT pg_advisory_xact_lock(%s)', (WRITE_LOCK_KEY,))
+
+    def cursor(self):
+        return PostgresCursor(self)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def executescript(self, script):
+        self.raw.execute(script, prepare=False)
+
+    def commit(self):
+        if self.in_transaction:
+            self.raw.execute('COMMIT')
+
+    def rollback(self):
+        if self.in_transaction:
+            self.raw.execute('ROLLBACK')
+
+    def close(self):
+        """Return the connection to the pool."""
+        self.backend.release(self)
+
+
+class PostgresBackend:
+    """PostgreSQL through a psycopg_pool pool (psycopg 3)."""
+
+    name = 'postgresql'
+    features = frozenset()
+
+    def __init__(self, url):
+        import psycopg
+        from psycopg.pq import TransactionStatus
+
+        self.url = url
+        self.psycopg = psycopg
+        self.IDLE = TransactionStatus.IDLE
+        self.Error = psycopg.Error
+        self.OperationalError = psycopg.OperationalError
+        self.IntegrityError = psycopg.IntegrityError
+        # SQL text -> translated statement, shared by every connection
+        self.statements = {}
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def supports(self, feature):
+        return feature in self.features
+
+    def _configure(self, raw):
+        # Lock waits are bounded like SQLite's busy_timeout
+        raw.execute("SELECT set_config('lock_timeout', %s, false)", (f'{Config.DB_BUSY_TIMEOUT_MS}ms',))
+
+    def _get_pool(self):
+        # Like the SQLite pool, a forked worker (gunicorn --preload) must not
+        # share the parent's sockets, so each process opens its own pool.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    from psycopg_pool import ConnectionPool as PsycopgPool
+                    self._pool = PsycopgPool(
+                        self.url,
+                        min_size=Config.PG_POOL_MIN_SIZE,
+                        max_size=Config.PG_POOL_MAX_SIZE,
+                        kwargs={
+                            'autocommit': True,
+                            # Server-side prepared statements after this many runs of a query
+                            'prepare_threshold': None if Config.PG_PREPARE_THRESHOLD < 0 else Config.PG_PREPARE_THRESHOLD,
+                        },
+                        configure=self._configure,
+                        name='injoy',
+                        open=True,
+                    )
+                    self._pid = os.getpid()
+        return self._pool
+
+    def connect(self):
+        raw = self._get_pool().getconn(timeout=deadline.timeout_for(Config.PG_POOL_TIMEOUT_SECONDS))
+        conn = PostgresConnection(self, raw)
+        if deadline.remaining() is not None:
+            self._bound_to_deadline(conn)
+        return conn
+
+    def _bound_to_deadline(self, conn):
+        """Cancel conn's statements and lock waits at the request's deadline."""
+        conn.bounded = True
+        left_ms = max(1, int(deadline.remaining() * 1000))
+        busy_ms = min(left_ms, Config.DB_BUSY_TIMEOUT_MS)
+        conn.raw.execute(
+            "SELECT set_config('statement_timeout', %s, false), set_config('lock_timeout', %s, false)",
+            (f'{left_ms}ms', f'{busy_ms}ms')
+        )
+
+    def release(self, conn):
+        raw = conn.raw
+        try:
+            if conn.in_transaction:
+                raw.execute('ROLLBACK')
+            if conn.bounded:
+                raw.execute(
+                    "SELECT set_config('statement_timeout', '0', false), set_config('lock_timeout', %s, false)",
+                    (f'{Config.DB_BUSY_TIMEOUT_MS}ms',)
+                )
+        except self.Error:
+            pass  # A broken connection is discarded by putconn()
+        self._pool.putconn(raw)
+
+    def prime(self):
+        """Open the pool's minimum connections before traffic arrives."""
+        pool = self._get_pool()
+        pool.wait()
+        return pool.get_stats().get('pool_size', 0)
+
+    def close_all(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.close()
+            self._pool = None
+            self._pid = None
+
+    def column_declaration(self, declaration):
+        """Translate a SQLite SCHEMA declaration to PostgreSQL."""
+        for pattern, replacement in PG_TYPES:
+            declaration = pattern.sub(replacement, declaration)
+        return re.sub(r'\bCURRENT_TIMESTAMP\b', PG_CURRENT_TIMESTAMP, declaration)
+
+    def existing_columns(self, conn, table, schema=None):
+        return {row[0] for row in conn.execute(
+            'SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = ?',
+            (table,)
+        )}
+
+    def get_version(self, conn):
+        conn.execute('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)')
+        row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+        return row[0] or 0
+
+    def set_version(self, conn, version):
+        conn.execute('DELETE FROM schema_version')
+        conn.execute('INSERT INTO schema_version (version) VALUES (?)', (int(version),))
+
+    def serialize_writes(self, conn):
+        """Hold the write advisory lock until conn's transaction ends.
+
+        Sequence values are handed out before commit, so without it a
+        reader could see seq 11 committed while 10 is still in flight.
+        """
+        conn.raw.execute('SELECT pg_advisory_xact_lock(%s)', (WRITE_LOCK_KEY,))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def is_postgres_url(url):
+    return bool(url) and url.split('://', 1)[0] in ('postgres', 'postgresql')
+
+
+def get_backend():
+    """Return the process-wide storage backend chosen by Config.DATABASE_URL."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if is_postgres_url(Config.DATABASE_URL):
+                    if not Config.POSTGRES_EXPERIMENTAL:
+                        raise RuntimeError(
+                            'The PostgreSQL backend is experimental and has not been run in production; '
+                            'set POSTGRES_EXPERIMENTAL=true to use it (tests/test_postgres.py checks it '
+                            'against PG_TEST_URL)'
+                        )
+                    _backend = PostgresBackend(Config.DATABASE_URL)
+                else:
+                    _backend = SQLiteBackend(DATABASE_PATH, Config.DB_POOL_SIZE)
+    return _backend
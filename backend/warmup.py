@@ -0,0 +1,104 @@
+"""
+Cold-start warmup for InJoy Beauty.
+Primes the database, connection pool and lazy imports before a worker
+takes real traffic, and tracks whether the worker is ready.
+"""
+import threading
+import time
+from datetime import date
+
+from config import Config
+from database import init_db, seed_services, seed_gallery
+from storage import get_backend
+
+_lock = threading.Lock()
+_state = {
+    'db_initialized': False,
+    'ready': False,
+    'warming': False,
+    'duration_ms': None,
+    'error': None,
+}
+
+
+def ensure_database():
+    """Run table creation and seeding once per process."""
+    if _state['db_initialized']:
+        return
+    with _lock:
+        if _state['db_initialized']:
+            return
+        init_db()
+        seed_services()
+        seed_gallery()
+        _state['db_initialized'] = True
+
+
+def warm_up(app=None):
+    """Prepare this worker for traffic.
+
+    Safe to call from gunicorn's post_worker_init hook, from the dev server
+    or from a background thread; repeat calls are no-ops once ready.
+    """
+    if _state['ready']:
+        return True
+
+    started = time.perf_counter()
+    _state['warming'] = True
+    try:
+        ensure_database()
+
+        # Open the pooled connections so no request pays for connect + schema load
+        get_backend().prime()
+
+        # Load the catalogue and run the hot read paths once to fill the page cache
+        from models import Service, GalleryImage, Booking
+        Service.get_all()
+        Service.get_categories()
+        GalleryImage.get_all()
+        GalleryImage.get_featured()
+        Booking.get_booked_times(date.today().isoformat())
+
+        # Pay the Resend SDK's import cost now rather than on the first form post
+        from email_helper import load_resend
+        if Config.RESEND_API_KEY:
+            load_resend()
+
+        # Archive old messages and forms off the request path
+        from retention import start_retention_thread
+        start_retention_thread()
+
+        # Scheduled online snapshots of the database
+        from backup import start_backup_thread
+        start_backup_thread()
+
+        _state['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        _state['error'] = None
+        _state['ready'] = True
+        print(f"Worker warmed up in {_state['duration_ms']} ms.")
+    except Exception as e:
+        _state['error'] = str(e)
+        print(f"Warmup error: {e}")
+    finally:
+        _state['warming'] = False
+
+    return _state['ready']
+
+
+def warm_up_in_background(app=None):
+    """Start warmup on a daemon thread unless it is already running or done."""
+    with _lock:
+        if _state['ready'] or _state['warming']:
+            return
+        _state['warming'] = True
+    threading.Thread(target=warm_up, args=(app,), daemon=True).start()
+
+
+def is_ready():
+    """True once warm_up() has completed successfully."""
+    return _state['ready']
+
+
+def get_status():
+    """Snapshot of the warmup state for the readiness endpoint."""
+    return dict(_state)
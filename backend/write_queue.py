@@ -0,0 +1,141 @@
+"""
+Group-commit write queue for InJoy Beauty.
+One writer thread per worker drains pending inserts and runs them in a
+single transaction, so a burst of form posts costs one commit (one fsync)
+instead of one each and request threads never fight over the write lock.
+Enable with WRITE_QUEUE_ENABLED; otherwise writes run directly as before.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from config import Config
+from database import get_db_connection
+import deadline
+
+
+class WriteQueue:
+    """Single-writer queue that batches jobs into one transaction.
+
+    A job is a function taking a connection; its return value (or
+    exception) resolves the Future returned by submit(). Each job runs
+    under its own SAVEPOINT, so one failing insert doesn't roll back the
+    rest of the batch. Jobs whose Future was cancelled before their batch
+    reached them are skipped.
+    """
+
+    def __init__(self, max_batch, window_ms):
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._jobs = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pid = None
+        # Counters for benchmarks and debugging
+        self.batches = 0
+        self.jobs_done = 0
+
+    def _ensure_writer(self):
+        # The writer thread doesn't survive a fork (gunicorn --preload), so a
+        # worker starts its own with a fresh queue on first use.
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None:
+                self._jobs = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                self._thread.start()
+
+    def submit(self, job):
+        """Queue job(conn) for the next batch; returns a Future."""
+        self._ensure_writer()
+        future = Future()
+        self._jobs.put((job, future))
+        return future
+
+    def _collect(self, jobs):
+        """Block for one job, then gather more until the window closes."""
+        batch = [jobs.get()]
+        closes_at = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = closes_at - time.monotonic()
+            try:
+                batch.append(jobs.get(timeout=remaining) if remaining > 0 else jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        jobs = self._jobs
+        while True:
+            batch = self._collect(jobs)
+            try:
+                self._write(batch)
+            except Exception as e:
+                # The whole transaction failed (e.g. commit error); fail every
+                # job that hasn't been resolved yet.
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _write(self, batch):
+        results = []
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for job, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT job')
+                try:
+                    results.append((future, job(conn)))
+                    conn.execute('RELEASE job')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    future.set_exception(e)
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.batches += 1
+        self.jobs_done += len(batch)
+        # Only report success once the batch is durable
+        for future, result in results:
+            future.set_result(result)
+
+
+_queue = WriteQueue(Config.WRITE_QUEUE_MAX_BATCH, Config.WRITE_QUEUE_WINDOW_MS)
+
+
+def get_write_queue():
+    """Return the process-wide write queue."""
+    return _queue
+
+
+def run_write(job):
+    """Run job(conn) in a committed transaction and return its result.
+
+    Goes through the group-commit queue when WRITE_QUEUE_ENABLED is set,
+    otherwise on a pooled connection of its own.
+    """
+    if Config.WRITE_QUEUE_ENABLED:
+        future = _queue.submit(job)
+        try:
+            return future.result(timeout=deadline.timeout_for(Config.WRITE_QUEUE_TIMEOUT_SECONDS))
+        except TimeoutError:
+            # Withdraw the job so a retry can't write it twice; once the
+            # writer has started it, its outcome is the answer.
+            if future.cancel():
+                raise
+            return future.result()
+
+    conn = get_db_connection()
+    try:
+        result = job(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return result
@@ -0,0 +1,133 @@
+"""
+Online backup benchmark for InJoy Beauty.
+
+Runs a steady mix of catalogue reads and contact-form writes against a
+seeded database and measures their latency with no backup running, while
+backup.create_snapshot() copies the database in page-limited steps, and
+while a single-step copy (the whole database under one read lock, like
+copying the live file) runs, reporting percentiles and the worst stall.
+
+Usage:
+    python benchmarks/bench_backup.py [--rows 20000] [--seconds 5]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+def seed(rows):
+    """Fill the benchmark database with contact messages and intake forms."""
+    from database import get_db_connection
+
+    conn = get_db_connection()
+    conn.executemany(
+        'INSERT INTO contact_messages (name, email, subject, message) VALUES (?, ?, ?, ?)',
+        [(f'Client {i}', f'client{i}@example.com', 'Booking question',
+          'Hi Jaymie, do you have any openings next week for a trim? ' * 8) for i in range(rows)]
+    )
+    conn.executemany(
+        'INSERT INTO intake_forms (client_name, email, service_requested, additional_notes) VALUES (?, ?, ?, ?)',
+        [(f'Client {i}', f'client{i}@example.com', 'Haircut and style',
+          'Best contacted by text message. ' * 10) for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_phase(seconds, backup_fn=None):
+    """Run the read/write mix for `seconds`, with backup_fn looping alongside."""
+    from models import Service, ContactMessage
+
+    stop = threading.Event()
+    reads, writes, backups = [], [], []
+
+    def reader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            Service.get_all()
+            reads.append(time.perf_counter() - started)
+            time.sleep(0.002)
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            ContactMessage.create('Bench', f'bench{n}@example.com', 'Hi', 'Any openings?')
+            writes.append(time.perf_counter() - started)
+            n += 1
+            time.sleep(0.02)
+
+    def backer():
+        while not stop.is_set():
+            backups.append(backup_fn())
+
+    threads = [threading.Thread(target=reader), threading.Thread(target=reader), threading.Thread(target=writer)]
+    if backup_fn:
+        threads.append(threading.Thread(target=backer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return reads, writes, backups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_PATH'] = str(Path(tmp.name) / 'bench.db')
+    os.environ['BACKUP_DIR'] = str(Path(tmp.name) / 'backups')
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from config import Config, DATABASE_PATH
+    from database import init_db, seed_services
+    from backup import create_snapshot
+
+    init_db()
+    seed_services()
+    seed(args.rows)
+    Config.BACKUP_KEEP = 2
+
+    def single_step_copy():
+        # The whole database in one backup step: writers wait for all of it
+        started = time.perf_counter()
+        source = sqlite3.connect(str(DATABASE_PATH))
+        dest = sqlite3.connect(str(Path(tmp.name) / 'single-step.db'))
+        source.backup(dest, pages=-1)
+        dest.close()
+        source.close()
+        return {'seconds': time.perf_counter() - started, 'restarts': 0}
+
+    size_mb = os.path.getsize(DATABASE_PATH) / 1024 / 1024
+    print(f"{size_mb:.1f} MB database, {args.seconds:g} s per phase, "
+          f"{Config.BACKUP_PAGES_PER_STEP} pages per backup step\n")
+    print(f"{'phase':<18} {'read p50/p99/max (ms)':>24} {'write p50/p99/max (ms)':>24} {'backups':>8} {'avg s':>6} {'restarts':>8}")
+    for name, fn in (('no backup', None), ('stepped backup', create_snapshot), ('single-step copy', single_step_copy)):
+        reads, writes, backups = run_phase(args.seconds, fn)
+        fmt = lambda v: f"{percentile(v, 50) * 1000:.1f}/{percentile(v, 99) * 1000:.1f}/{max(v, default=0) * 1000:.0f}"
+        avg = sum(b['seconds'] for b in backups) / len(backups) if backups else 0
+        print(f"{name:<18} {fmt(reads):>24} {fmt(writes):>24} {len(backups):>8} {avg:>6.2f} "
+              f"{sum(b['restarts'] for b in backups):>8}")
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Calendar feed benchmark for InJoy Beauty.
+
+Seeds a database with bookings and times the iCalendar feed through the
+Flask test client: the first full build, an unchanged poll answered with
+304, a poll after one booking changed (incremental refresh), and a full
+rebuild from scratch for comparison.
+
+Usage:
+    python benchmarks/bench_calendar.py [--rows 5000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+TOKEN = 'bench-token'
+
+
+def seed(rows):
+    """Fill the benchmark database with upcoming pending bookings."""
+    from database import get_db_connection
+
+    today = date.today()
+    conn = get_db_connection()
+    conn.executemany(
+        '''INSERT INTO bookings (service_id, client_name, client_email, client_phone, booking_date, booking_time, notes)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        [(1 + i % 10, f'Client {i}', f'client{i}@example.com', '6135550100',
+          (today + timedelta(days=i // 10)).isoformat(), f'{15 + i % 5:02d}:00', 'Prefers quiet, no music')
+         for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def best_of(fn, repeat):
+    """(best seconds, last result) of fn()."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_PATH'] = str(Path(tmp.name) / 'bench.db')
+    os.environ['RATE_LIMIT_DB_PATH'] = str(Path(tmp.name) / 'ratelimit.db')
+    os.environ['ARCHIVE_DATABASE_PATH'] = str(Path(tmp.name) / 'archive.db')
+    os.environ['BACKUP_DIR'] = str(Path(tmp.name) / 'backups')
+    os.environ['SHARED_CACHE_PATH'] = str(Path(tmp.name) / 'shared-cache.db')
+    os.environ['CALENDAR_FEED_TOKEN'] = TOKEN
+    for flag in ('RATE_LIMIT_ENABLED', 'RETENTION_ENABLED', 'BACKUP_ENABLED', 'COMPRESSION_ENABLED'):
+        os.environ[flag] = 'false'
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from app import app
+    from database import init_db, seed_services
+    from models import Booking
+    import calendar_feed
+
+    init_db()
+    seed_services()
+    seed(args.rows)
+    client = app.test_client()
+    url = f'/api/calendar/{TOKEN}.ics'
+
+    first, response = best_of(lambda: client.get(url), 1)
+    etag = response.headers['ETag']
+    print(f"{args.rows} bookings, {len(response.data) / 1024:.0f} KB feed, best of {args.repeat}\n")
+    print(f"{'case':<26} {'time (ms)':>10} {'status':>7}")
+    print(f"{'first build':<26} {first * 1000:>10.2f} {response.status_code:>7}")
+
+    elapsed, response = best_of(lambda: client.get(url, headers={'If-None-Match': etag}), args.repeat)
+    print(f"{'unchanged poll':<26} {elapsed * 1000:>10.2f} {response.status_code:>7}")
+
+    statuses = iter(['confirmed', 'pending'] * args.repeat)
+
+    def changed_poll():
+        Booking.update_status(1, next(statuses))
+        started = time.perf_counter()
+        client.get(url, headers={'If-None-Match': etag})
+        return time.perf_counter() - started
+
+    elapsed = min(changed_poll() for _ in range(args.repeat))
+    print(f"{'poll after one change':<26} {elapsed * 1000:>10.2f} {200:>7}")
+
+    def rebuild():
+        calendar_feed.feed = calendar_feed.CalendarFeed()
+        return calendar_feed.feed.document()
+
+    elapsed, _ = best_of(rebuild, args.repeat)
+    print(f"{'full rebuild (no cache)':<26} {elapsed * 1000:>10.2f} {'-':>7}")
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Response compression benchmark for InJoy Beauty.
+
+Requests the homepage, the services catalogue, the stylesheet, the intake
+email preview and a large intake list through the Flask test client and
+reports body size and time per request uncompressed, compressed on every
+request, and (for responses with an ETag) served from the compressed-body
+cache.
+
+Usage:
+    python benchmarks/bench_compression.py [--rows 2000] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+
+def seed(rows):
+    """Fill the benchmark database with intake forms."""
+    from database import get_db_connection
+
+    conn = get_db_connection()
+    conn.executemany(
+        '''INSERT INTO intake_forms (client_name, phone, email, service_requested,
+           hair_length, desired_style, hair_type, other_sensory_needs, additional_notes)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        [(f'Client {i}', '613-555-0100', f'client{i}@example.com', 'Haircut and style',
+          'medium', 'trim', 'wavy', 'Prefers soft music', 'Best contacted by text message.')
+         for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(client, url, headers, repeat, before=None):
+    """(best seconds per request, body bytes, Content-Encoding) for GET url."""
+    best = float('inf')
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        best = min(best, time.perf_counter() - started)
+    return best, len(response.data), response.headers.get('Content-Encoding') or '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_PATH'] = str(Path(tmp.name) / 'bench.db')
+    os.environ['RATE_LIMIT_DB_PATH'] = str(Path(tmp.name) / 'ratelimit.db')
+    os.environ['ARCHIVE_DATABASE_PATH'] = str(Path(tmp.name) / 'archive.db')
+    os.environ['BACKUP_DIR'] = str(Path(tmp.name) / 'backups')
+    os.environ['SHARED_CACHE_PATH'] = str(Path(tmp.name) / 'shared-cache.db')
+    for flag in ('RATE_LIMIT_ENABLED', 'RETENTION_ENABLED', 'BACKUP_ENABLED'):
+        os.environ[flag] = 'false'
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from app import app
+    from config import Config
+    from database import init_db, seed_services
+    import compression
+
+    init_db()
+    seed_services()
+    seed(args.rows)
+    client = app.test_client()
+    urls = ('/', '/api/services', '/css/styles.css', '/api/intake/preview-email', '/api/intake')
+    encoding = compression.ENCODINGS[0]
+    accept = {'Accept-Encoding': encoding}
+
+    print(f"best of {args.repeat}, {encoding} (gzip level {Config.GZIP_LEVEL}, brotli quality {Config.BROTLI_QUALITY})\n")
+    print(f"{'url':<28} {'identity':>18} {'compress each time':>22} {'cached':>18}")
+    for url in urls:
+        row = [timed(client, url, {'Accept-Encoding': 'identity'}, args.repeat)]
+        row.append(timed(client, url, accept, args.repeat, before=compression.clear_cache))
+        if client.get(url).headers.get('ETag'):
+            row.append(timed(client, url, accept, args.repeat))
+        cells = [f"{size / 1024:.1f} KB {seconds * 1000:.2f} ms" for seconds, size, _ in row]
+        print(f"{url:<28} {cells[0]:>18} {cells[1]:>22} {cells[2] if len(cells) > 2 else '-':>18}")
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
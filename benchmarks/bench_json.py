@@ -0,0 +1,137 @@
+"""
+JSON list serialization benchmark for InJoy Beauty.
+
+Compares the old list path (fetch rows -> dict per row -> Flask's stdlib
+JSON provider) with the typed-record path (slotted records serialized by
+the orjson provider) and the JSON path (SQLite json_object() rows embedded
+as RawJSON) on large intake and contact lists, reporting latency and peak
+Python allocations.
+
+Runs on a scratch SQLite file, or on PostgreSQL when DATABASE_URL is set
+(the contact_messages and intake_forms tables there are emptied first; the
+json rows path then uses json_agg()).
+
+Usage:
+    python benchmarks/bench_json.py [--rows 5000] [--repeat 5]
+    DATABASE_URL=postgresql://localhost/injoy_bench python benchmarks/bench_json.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+
+def measure(fn, repeat):
+    """Return (best seconds, peak traced bytes) for fn()."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def dict_rows(sql):
+    """The original model-layer list path: SELECT * and a dict per row."""
+    from database import get_db_connection
+
+    conn = get_db_connection()
+    rows = [dict(row) for row in conn.execute(sql).fetchall()]
+    conn.close()
+    return rows
+
+
+def seed(rows):
+    """Fill the benchmark database with intake forms and contact messages."""
+    from database import get_db_connection
+
+    conn = get_db_connection()
+    conn.execute('DELETE FROM contact_messages')
+    conn.execute('DELETE FROM intake_forms')
+    conn.executemany(
+        'INSERT INTO contact_messages (name, email, subject, message) VALUES (?, ?, ?, ?)',
+        [(f'Client {i}', f'client{i}@example.com', 'Booking question',
+          'Hi Jaymie, do you have any openings next week for a trim? ' * 3) for i in range(rows)]
+    )
+    conn.executemany(
+        '''INSERT INTO intake_forms (client_name, phone, email, service_requested,
+           hair_length, desired_style, hair_type, sensitive_to_noise, nervous_anxious,
+           other_sensory_needs, additional_notes)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        [(f'Client {i}', '613-555-0100', f'client{i}@example.com', 'Haircut and style',
+          'medium', 'trim', 'wavy', i % 2, int(i % 3 == 0), 'Prefers soft music',
+          'Best contacted by text message.') for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_PATH'] = str(Path(tmp.name) / 'bench.db')
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from database import init_db
+    from json_provider import FastJSONProvider, orjson
+    from models import ContactMessage, IntakeForm
+    from storage import get_backend
+
+    init_db()
+    seed(args.rows)
+
+    app = Flask(__name__)
+    app.debug = False
+    default_json = DefaultJSONProvider(app)
+    fast_json = FastJSONProvider(app)
+
+    intake_sql = 'SELECT * FROM intake_forms ORDER BY created_at DESC'
+    contact_sql = 'SELECT * FROM contact_messages ORDER BY created_at DESC'
+    cases = {
+        'intake list': {
+            'dict rows': lambda: default_json.response(
+                {'success': True, 'forms': (forms := dict_rows(intake_sql)), 'count': len(forms)}),
+            'record rows': lambda: fast_json.response(
+                {'success': True, 'forms': (forms := IntakeForm.get_all()), 'count': len(forms)}),
+            'json rows': lambda: fast_json.response(
+                {'success': True, 'forms': (forms := IntakeForm.get_all_json()), 'count': forms.row_count}),
+        },
+        'contact list': {
+            'dict rows': lambda: default_json.response(dict_rows(contact_sql)),
+            'record rows': lambda: fast_json.response(ContactMessage.get_all()),
+            'json rows': lambda: fast_json.response(ContactMessage.get_all_json()),
+        },
+    }
+
+    print(f"{get_backend().name}: {args.rows} rows per table, best of {args.repeat}, orjson {'available' if orjson else 'not installed'}\n")
+    print(f"{'case':<14} {'path':<12} {'time (ms)':>10} {'peak alloc (KB)':>16} {'vs dict rows':>13}")
+    for name, paths in cases.items():
+        baseline = None
+        for path, fn in paths.items():
+            elapsed, peak = measure(fn, args.repeat)
+            baseline = baseline or (elapsed, peak)
+            ratio = f"{baseline[0] / elapsed:.1f}x / {baseline[1] / max(peak, 1):.1f}x"
+            print(f"{name:<14} {path:<12} {elapsed * 1000:>10.1f} {peak / 1024:>16.0f} {ratio:>13}")
+        print()
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Request coalescing benchmark for InJoy Beauty.
+
+Sends bursts of identical concurrent GETs for /api/services, /api/gallery
+and /api/available-times through the Flask test client, first with the
+single-flight layer bypassed and then with it on, and reports wall time
+per burst and how many requests were coalesced.
+
+Usage:
+    python benchmarks/bench_singleflight.py [--threads 16] [--bursts 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+
+def burst(app, url, threads):
+    """Seconds for `threads` simultaneous GETs of url to all finish."""
+    start = threading.Barrier(threads + 1)
+
+    def hit():
+        client = app.test_client()
+        start.wait()
+        client.get(url)
+
+    workers = [threading.Thread(target=hit) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    start.wait()
+    started = time.perf_counter()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--bursts', type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_PATH'] = str(Path(tmp.name) / 'bench.db')
+    os.environ['RATE_LIMIT_DB_PATH'] = str(Path(tmp.name) / 'ratelimit.db')
+    os.environ['ARCHIVE_DATABASE_PATH'] = str(Path(tmp.name) / 'archive.db')
+    os.environ['BACKUP_DIR'] = str(Path(tmp.name) / 'backups')
+    os.environ['SHARED_CACHE_PATH'] = str(Path(tmp.name) / 'shared-cache.db')
+    for flag in ('RATE_LIMIT_ENABLED', 'RETENTION_ENABLED', 'BACKUP_ENABLED'):
+        os.environ[flag] = 'false'
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from app import app
+    from database import init_db, seed_services
+    import singleflight
+
+    init_db()
+    seed_services()
+    urls = ('/api/services', '/api/gallery', '/api/available-times?date=2030-06-03&service_id=1')
+    shared = singleflight.run_once
+
+    print(f"{args.bursts} bursts of {args.threads} concurrent requests\n")
+    print(f"{'url':<52} {'separate (ms)':>14} {'coalesced (ms)':>15} {'coalesced':>10}")
+    for url in urls:
+        singleflight.run_once = lambda key, fn: fn()
+        separate = sum(burst(app, url, args.threads) for _ in range(args.bursts)) / args.bursts
+        singleflight.run_once = shared
+        singleflight.stats.clear()
+        together = sum(burst(app, url, args.threads) for _ in range(args.bursts)) / args.bursts
+        coalesced = sum(counts['coalesced'] for counts in singleflight.stats.values())
+        total = args.threads * args.bursts
+        print(f"{url:<52} {separate * 1000:>14.2f} {together * 1000:>15.2f} {coalesced / total:>10.0%}")
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Startup import-time benchmark for InJoy Beauty.
+
+Runs `python -X importtime -c "import app"` from backend/ a few times and
+fails (exit code 1) if the best run goes over the import budget, or if a
+module that should load lazily shows up at import.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 250]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+# Budget for the cumulative import of the app module (Flask included)
+DEFAULT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', '250'))
+
+# Modules that must not be imported until they are actually needed
+LAZY_MODULES = ('resend', 'requests', 'urllib3', 'psycopg', 'psycopg_pool')
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_importtime():
+    """Import the app in a fresh interpreter and parse the importtime report."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit('Importing the app failed.')
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    runs = [run_importtime() for _ in range(args.runs)]
+    best = min(runs, key=lambda modules: modules['app'][1])
+    total_ms = best['app'][1] / 1000
+
+    print(f"import app: best {total_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print('\nSlowest top-level imports (cumulative):')
+    top_level = [(name, data) for name, data in best.items() if data[2] <= 3]
+    for name, (self_us, cumulative_us, _) in sorted(top_level, key=lambda item: -item[1][1])[:10]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    eager = [name for name in LAZY_MODULES if name in best]
+    if eager:
+        failures.append(f"lazy modules imported at startup: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+
+    if failures:
+        print('\nFAIL: ' + '; '.join(failures))
+        return 1
+    print('\nOK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
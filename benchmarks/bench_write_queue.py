@@ -0,0 +1,103 @@
+"""
+Write queue benchmark for InJoy Beauty.
+
+Fires a burst of concurrent contact and intake submissions at the model
+layer, first with one connection + commit per submission (the default)
+and then through the group-commit write queue, reporting throughput,
+latency percentiles, commits and "database is locked" failures.
+
+Runs on a scratch SQLite file, or on PostgreSQL when DATABASE_URL is set
+(the contact_messages and intake_forms tables there are emptied first).
+
+Usage:
+    python benchmarks/bench_write_queue.py [--threads 16] [--per-thread 50]
+    DATABASE_URL=postgresql://localhost/injoy_bench python benchmarks/bench_write_queue.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+INTAKE = {
+    'client_name': 'Burst Client', 'phone': '613-555-0100', 'service_requested': 'Haircut',
+    'hair_length': 'medium', 'sensitive_to_noise': True, 'additional_notes': 'Prefers texts.',
+}
+
+
+def burst(threads, per_thread):
+    """Run threads x per_thread submissions; return (elapsed, latencies, errors)."""
+    from models import ContactMessage, IntakeForm
+    from storage import get_backend
+
+    latencies, errors = [], []
+    start_gate = threading.Barrier(threads)
+
+    def worker(n):
+        start_gate.wait()
+        for i in range(per_thread):
+            started = time.perf_counter()
+            try:
+                if i % 2:
+                    ContactMessage.create(f'Client {n}', f'client{n}@example.com', 'Hi', 'Any openings?')
+                else:
+                    IntakeForm.create(dict(INTAKE, email=f'client{n}@example.com'))
+            except get_backend().OperationalError as e:
+                errors.append(str(e))
+            latencies.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - started, sorted(latencies), errors
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--per-thread', type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_PATH'] = str(Path(tmp.name) / 'bench.db')
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from config import Config
+    from database import init_db, get_db_connection
+    from storage import get_backend
+    from write_queue import get_write_queue
+
+    init_db()
+    conn = get_db_connection()
+    conn.execute('DELETE FROM contact_messages')
+    conn.execute('DELETE FROM intake_forms')
+    conn.commit()
+    conn.close()
+    total = args.threads * args.per_thread
+    print(f"{get_backend().name}: {args.threads} threads x {args.per_thread} submissions ({total} rows per run)\n")
+    print(f"{'mode':<14} {'rows/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'commits':>8} {'locked':>7}")
+
+    for mode, enabled in (('direct', False), ('write queue', True)):
+        Config.WRITE_QUEUE_ENABLED = enabled
+        batches_before = get_write_queue().batches
+        elapsed, latencies, errors = burst(args.threads, args.per_thread)
+        commits = get_write_queue().batches - batches_before if enabled else total - len(errors)
+        print(f"{mode:<14} {total / elapsed:>8.0f} {percentile(latencies, 50) * 1000:>9.1f} "
+              f"{percentile(latencies, 99) * 1000:>9.1f} {commits:>8} {len(errors):>7}")
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
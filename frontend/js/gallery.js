@@ -38,8 +38,8 @@ document.addEventListener('DOMContentLoaded', () => {
         ];
 
         try {
-            // Try to load from API first
-            const apiImages = await api.get('/api/gallery');
+            // Embedded by the server when available, otherwise from the API
+            const apiImages = pageData('gallery') || await api.get('/api/gallery');
             
             // Merge API data with placeholder URLs
             allImages = apiImages.map((img, index) => ({
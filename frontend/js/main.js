@@ -6,6 +6,69 @@
 // API Base URL
 const API_BASE = '';
 
+/**
+ * A fresh Idempotency-Key for one form submission.
+ */
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    // randomUUID needs a secure context; getRandomValues doesn't
+    const bytes = new Uint8Array(16);
+    if (window.crypto && crypto.getRandomValues) {
+        crypto.getRandomValues(bytes);
+    } else {
+        for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256);
+    }
+    return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// Tries per submission, and the wait before each retry (ms)
+const POST_ATTEMPTS = 3;
+const POST_RETRY_DELAY = 1000;
+
+/**
+ * POST a JSON body for one user submission and return the Response.
+ * The submission gets one Idempotency-Key, reused only when the same
+ * request is retried after a network error or a 409 "still being
+ * processed" answer, so the server replays its stored response instead
+ * of saving the form twice. Submitting the form again is a new key.
+ */
+async function postJson(endpoint, data) {
+    const body = JSON.stringify(data);
+    const headers = { 'Content-Type': 'application/json', 'Idempotency-Key': newIdempotencyKey() };
+    for (let attempt = 1; ; attempt++) {
+        try {
+            const response = await fetch(`${API_BASE}${endpoint}`, { method: 'POST', headers, body });
+            // 409 + Retry-After: the first try with this key is still running
+            const inProgress = response.status === 409 && response.headers.has('Retry-After');
+            if (!inProgress || attempt >= POST_ATTEMPTS) {
+                return response;
+            }
+        } catch (error) {
+            if (attempt >= POST_ATTEMPTS) throw error;
+        }
+        await new Promise(resolve => setTimeout(resolve, POST_RETRY_DELAY * attempt));
+    }
+}
+
+/**
+ * Catalogue data the server embedded in the page (see backend/pages.py),
+ * or undefined if it wasn't; callers then fetch it from the API.
+ */
+let embeddedData;
+function pageData(key) {
+    if (embeddedData === undefined) {
+        const element = document.getElementById('page-data');
+        try {
+            embeddedData = element ? JSON.parse(element.textContent) : {};
+        } catch (error) {
+            embeddedData = {};
+        }
+    }
+    return embeddedData[key];
+}
+
 /**
  * API Helper Functions
  */
@@ -23,13 +86,7 @@ const api = {
 
     async post(endpoint, data) {
         try {
-            const response = await fetch(`${API_BASE}${endpoint}`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(data),
-            });
+            const response = await postJson(endpoint, data);
             const result = await response.json();
             if (!response.ok) throw new Error(result.error || 'Request failed');
             return result;
@@ -225,7 +282,7 @@ async function loadServicesPreview() {
     if (!container) return;
 
     try {
-        const categories = await api.get('/api/services/categories');
+        const categories = pageData('service_categories') || await api.get('/api/services/categories');
         
         const icons = {
             'Hair': '✂',
@@ -264,7 +321,7 @@ async function loadGalleryPreview() {
     if (!container) return;
 
     try {
-        const images = await api.get('/api/gallery/featured');
+        const images = pageData('gallery_featured') || await api.get('/api/gallery/featured');
         
         // Use placeholder images for now
         const placeholderImages = [
@@ -323,3 +380,4 @@ document.addEventListener('DOMContentLoaded', () => {
 // Export for use in other modules
 window.api = api;
 window.utils = utils;
+window.pageData = pageData;
@@ -26,10 +26,14 @@ document.addEventListener('DOMContentLoaded', () => {
     async function loadServices() {
         if (!servicesContainer) return;
 
-        servicesContainer.innerHTML = '<div class="loading"><div class="spinner"></div><p>Loading services...</p></div>';
+        // Embedded by the server when available; otherwise fetch it
+        allServices = pageData('services');
+        if (!allServices) {
+            servicesContainer.innerHTML = '<div class="loading"><div class="spinner"></div><p>Loading services...</p></div>';
+        }
 
         try {
-            allServices = await api.get('/api/services');
+            allServices = allServices || await api.get('/api/services');
             
             if (currentCategory !== 'all') {
                 // Set active tab for URL param
@@ -0,0 +1,25 @@
+"""
+Gunicorn hooks for InJoy Beauty.
+Picked up automatically from the working directory by `gunicorn backend.app:app`.
+"""
+import sys
+from pathlib import Path
+
+# Same import layout as backend/app.py
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+
+def when_ready(server):
+    """Run migrations once in the master so workers don't race on them."""
+    from warmup import ensure_database
+    from storage import get_backend
+    ensure_database()
+    get_backend().close_all()
+
+
+def post_worker_init(worker):
+    """Warm each worker before it starts accepting connections."""
+    from warmup import warm_up
+    from rate_limit import size_admission
+    size_admission(worker.cfg.threads)
+    warm_up(worker.wsgi)
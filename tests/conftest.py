@@ -0,0 +1,40 @@
+"""
+Shared pytest setup: backend modules import flat, as under gunicorn, and
+every file the app writes goes to a throwaway directory.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+_tmp = tempfile.mkdtemp(prefix='injoy-tests-')
+os.environ.setdefault('DATABASE_PATH', str(Path(_tmp) / 'salon.db'))
+os.environ.setdefault('RATE_LIMIT_DB_PATH', str(Path(_tmp) / 'ratelimit.db'))
+os.environ.setdefault('ARCHIVE_DATABASE_PATH', str(Path(_tmp) / 'archive.db'))
+os.environ.setdefault('BACKUP_DIR', str(Path(_tmp) / 'backups'))
+os.environ.setdefault('SHARED_CACHE_PATH', str(Path(_tmp) / 'shared-cache.db'))
+for flag in ('RATE_LIMIT_ENABLED', 'RETENTION_ENABLED', 'BACKUP_ENABLED'):
+    os.environ.setdefault(flag, 'false')
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture(scope='session')
+def db():
+    """The throwaway salon database, created and seeded once."""
+    from database import init_db, seed_services
+    init_db()
+    seed_services()
+
+
+@pytest.fixture
+def app(db):
+    from app import app
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
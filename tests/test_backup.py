@@ -0,0 +1,29 @@
+"""
+Snapshot restore tests.
+"""
+import backup
+import shared_cache
+from change_log import log_bounds
+from models import Booking, Changes
+
+
+def test_restore_invalidates_caches_and_resets_change_feeds(db):
+    Booking.create_checked(1, 'Jo', 'jo@example.com', None, '2031-04-07', '15:00')
+    snapshot = backup.create_snapshot()['path']
+    Booking.create_checked(1, 'Kim', 'kim@example.com', None, '2031-04-07', '17:00')
+
+    _, cursor = log_bounds()
+    generations = {ns: shared_cache.generation(ns) for ns in
+                   (shared_cache.CATALOGUE, shared_cache.AVAILABILITY, shared_cache.SCHEDULE)}
+    shared_cache.put(shared_cache.CATALOGUE, 'test:restore', b'before', gen=generations[shared_cache.CATALOGUE])
+
+    backup.restore_snapshot(snapshot)
+
+    assert [b.client_name for b in Booking.get_by_date('2031-04-07')] == ['Jo']
+    for namespace, before in generations.items():
+        assert shared_cache.generation(namespace) > before
+    assert shared_cache.get(shared_cache.CATALOGUE, 'test:restore', gen=generations[shared_cache.CATALOGUE]) is None
+    # Anyone holding a pre-restore cursor is told to reload
+    oldest, _ = log_bounds()
+    assert cursor < oldest - 1
+    assert Changes.since(cursor)['reset'] is True
@@ -0,0 +1,36 @@
+"""
+Booking route tests.
+"""
+
+
+def test_booking_time_is_stored_canonical(client):
+    first = client.post('/api/bookings', json={
+        'service_id': 1, 'client_name': 'Robin', 'client_email': 'robin@example.com',
+        'booking_date': '2031-02-03', 'booking_time': '16:00',
+    })
+    assert first.status_code == 201
+
+    # Same slot written without the leading zero / with a short minute
+    for time in ('16:0', '15:30'):
+        response = client.post('/api/bookings', json={
+            'service_id': 1, 'client_name': 'Sam', 'client_email': 'sam@example.com',
+            'booking_date': '2031-02-03', 'booking_time': time,
+        })
+        assert response.status_code == 409
+
+    response = client.post('/api/bookings', json={
+        'service_id': 1, 'client_name': 'Sam', 'client_email': 'sam@example.com',
+        'booking_date': '2031-02-04', 'booking_time': '17:0',
+    })
+    assert response.status_code == 201
+    assert response.get_json()['booking']['booking_time'] == '17:00'
+
+
+def test_series_time_is_stored_canonical(client):
+    response = client.post('/api/bookings/series', json={
+        'service_id': 1, 'client_name': 'Alex', 'client_email': 'alex@example.com',
+        'start_date': '2031-03-03', 'booking_time': '18:0',
+        'rule': {'frequency': 'weekly', 'count': 3},
+    })
+    assert response.status_code == 201
+    assert {b['booking_time'] for b in response.get_json()['bookings']} == {'18:00'}
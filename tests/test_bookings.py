@@ -0,0 +1,35 @@
+"""
+Booking model tests.
+"""
+from database import get_db_connection
+from models import Booking
+
+
+def test_client_history_matches_any_email_casing(db):
+    booking_id = Booking.create_checked(1, 'Casey', 'Casey.History@Example.com', None, '2031-01-06', '15:00').id
+
+    for email in ('casey.history@example.com', ' CASEY.HISTORY@EXAMPLE.COM '):
+        assert [b.id for b in Booking.get_by_client(email)] == [booking_id]
+
+
+def test_client_history_uses_client_id_index(db):
+    conn = get_db_connection()
+    plan = ' '.join(row[-1] for row in conn.execute('''
+        EXPLAIN QUERY PLAN
+        SELECT b.id FROM bookings b JOIN clients c ON b.client_id = c.id
+        WHERE c.email = ? ORDER BY b.booking_date DESC, b.booking_time DESC
+    ''', ('casey.history@example.com',)))
+    conn.close()
+    assert 'idx_bookings_client_id' in plan
+
+
+def test_series_returns_only_its_own_bookings(db):
+    other = Booking.create_checked(1, 'Lee', 'lee@example.com', None, '2031-05-12', '15:00')
+    bookings, conflicts = Booking.create_series(
+        1, 'Morgan', 'morgan@example.com', None, '16:00', ['2031-05-19', '2031-05-12', '2031-05-26']
+    )
+
+    assert conflicts == []
+    assert [b.booking_date for b in bookings] == ['2031-05-12', '2031-05-19', '2031-05-26']
+    assert other.id not in [b.id for b in bookings]
+    assert {b.client_name for b in bookings} == {'Morgan'}
@@ -0,0 +1,53 @@
+"""
+Calendar feed tests.
+"""
+import pytest
+from config import Config
+from calendar_feed import CalendarFeed
+from models import Booking
+
+
+@pytest.fixture
+def feed_url(monkeypatch):
+    monkeypatch.setattr(Config, 'CALENDAR_FEED_TOKEN', 'calendar-test-token')
+    return '/api/calendar/calendar-test-token.ics'
+
+
+def test_status_change_refreshes_only_that_event(db, monkeypatch):
+    feed = CalendarFeed()
+    booking = Booking.create_checked(1, 'Ari', 'ari@example.com', None, '2031-06-02', '15:00')
+    body, etag = feed.document()
+    assert f'UID:booking-{booking.id}@injoy-beauty' in body.decode()
+    assert feed.document() == (body, etag)
+
+    def no_rebuild(*args):
+        raise AssertionError('full rebuild')
+
+    monkeypatch.setattr(feed, '_rebuild', no_rebuild)
+    Booking.update_status(booking.id, 'confirmed')
+    body, new_etag = feed.document()
+    assert new_etag != etag
+    event = body.decode().split(f'UID:booking-{booking.id}@injoy-beauty')[1].split('END:VEVENT')[0]
+    assert 'STATUS:CONFIRMED' in event
+
+    Booking.update_status(booking.id, 'cancelled')
+    assert f'booking-{booking.id}@' not in feed.document()[0].decode()
+
+
+def test_route_answers_304_until_bookings_change(client, feed_url):
+    first = client.get(feed_url)
+    assert first.status_code == 200
+    assert first.mimetype == 'text/calendar'
+    etag = first.headers['ETag']
+    assert client.get(feed_url, headers={'If-None-Match': etag}).status_code == 304
+
+    Booking.create_checked(1, 'Bo', 'bo@example.com', None, '2031-06-02', '17:00')
+    changed = client.get(feed_url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_wrong_or_unset_token_is_not_found(client, feed_url, monkeypatch):
+    assert client.get('/api/calendar/wrong-token.ics').status_code == 404
+    monkeypatch.setattr(Config, 'CALENDAR_FEED_TOKEN', None)
+    assert client.get(feed_url).status_code == 404
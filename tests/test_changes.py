@@ -0,0 +1,58 @@
+"""
+Delta sync tests.
+"""
+from change_log import DELETED, log_bounds, log_change
+from database import get_db_connection
+from models import Changes, IntakeForm
+
+
+def new_form(name):
+    return IntakeForm.create({'client_name': name, 'email': 'sync@example.com'})
+
+
+def test_pages_with_has_more_and_dedupes_rows(db):
+    _, cursor = log_bounds()
+    first = new_form('Sync one')
+    IntakeForm.update_status(first, 'reviewed')
+    second = new_form('Sync two')
+
+    page = Changes.since(cursor, limit=2)
+    assert page['has_more'] and not page['reset']
+    assert [form.id for form in page['changes']['intake_forms']['upserted']] == [first]
+    assert page['changes']['intake_forms']['upserted'][0].status == 'reviewed'
+
+    page = Changes.since(page['next'], limit=2)
+    assert not page['has_more']
+    assert [form.id for form in page['changes']['intake_forms']['upserted']] == [second]
+    assert Changes.since(page['next'])['changes'] == {}
+
+
+def test_deleted_rows_come_back_as_ids(client):
+    _, cursor = log_bounds()
+    form_id = new_form('Sync deleted')
+    # Retention archiving removes rows this way
+    conn = get_db_connection()
+    conn.execute('DELETE FROM intake_forms WHERE id = ?', (form_id,))
+    log_change(conn, 'intake_forms', form_id, DELETED)
+    conn.commit()
+    conn.close()
+
+    changes = client.get(f'/api/changes?since={cursor}').get_json()['changes']
+    assert changes['intake_forms'] == {'upserted': [], 'deleted': [form_id]}
+
+
+def test_reset_when_cursor_is_ahead_or_purged(db):
+    _, newest = log_bounds()
+    assert Changes.since(newest + 5) == {'next': newest, 'has_more': False, 'reset': True, 'changes': {}}
+
+    new_form('Sync purge one')
+    new_form('Sync purge two')
+    oldest, newest = log_bounds()
+    conn = get_db_connection()
+    conn.execute('DELETE FROM change_log WHERE seq < ?', (newest,))
+    conn.commit()
+    conn.close()
+
+    # Entries after newest - 2 are gone, so that cursor can't be caught up
+    assert Changes.since(newest - 2)['reset']
+    assert not Changes.since(newest - 1)['reset']
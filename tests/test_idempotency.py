@@ -0,0 +1,110 @@
+"""
+Idempotency-Key tests.
+"""
+import threading
+import uuid
+import pytest
+from flask import Flask, jsonify, request
+from database import get_db_connection
+from idempotency import idempotent
+
+
+def count_messages(email):
+    conn = get_db_connection()
+    try:
+        return conn.execute('SELECT COUNT(*) FROM contact_messages WHERE email = ?', (email,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def stub(db):
+    """A bare app with one @idempotent view whose behaviour each test sets."""
+    app = Flask(__name__)
+    calls = []
+    behaviour = {'view': lambda: (jsonify({'call': len(calls)}), 201)}
+
+    @app.route('/stub', methods=['POST'])
+    @idempotent
+    def stub_view():
+        calls.append(request.get_json())
+        return behaviour['view']()
+
+    return app, calls, behaviour
+
+
+def test_retry_with_same_key_replays_stored_response(client):
+    key, email = str(uuid.uuid4()), 'replay@example.com'
+    body = {'name': 'Pat', 'email': email, 'message': 'Hello'}
+
+    first = client.post('/api/contact', json=body, headers={'Idempotency-Key': key})
+    retry = client.post('/api/contact', json=body, headers={'Idempotency-Key': key})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json()['id'] == first.get_json()['id']
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert count_messages(email) == 1
+
+
+def test_new_key_is_a_new_submission(client):
+    email = 'twice@example.com'
+    body = {'name': 'Pat', 'email': email, 'message': 'Same words'}
+
+    for _ in range(2):
+        assert client.post('/api/contact', json=body, headers={'Idempotency-Key': str(uuid.uuid4())}).status_code == 201
+    assert count_messages(email) == 2
+
+
+def test_same_key_with_different_body_is_rejected(client):
+    key = str(uuid.uuid4())
+    client.post('/api/contact', json={'name': 'Pat', 'email': 'a@example.com', 'message': 'One'},
+                headers={'Idempotency-Key': key})
+    response = client.post('/api/contact', json={'name': 'Pat', 'email': 'a@example.com', 'message': 'Two'},
+                           headers={'Idempotency-Key': key})
+    assert response.status_code == 422
+
+
+def test_server_error_releases_key(stub):
+    app, calls, behaviour = stub
+    client, key = app.test_client(), str(uuid.uuid4())
+
+    behaviour['view'] = lambda: (jsonify({'error': 'boom'}), 500)
+    assert client.post('/stub', json={}, headers={'Idempotency-Key': key}).status_code == 500
+    behaviour['view'] = lambda: (jsonify({'ok': True}), 201)
+    response = client.post('/stub', json={}, headers={'Idempotency-Key': key})
+
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+    assert len(calls) == 2
+
+
+def test_concurrent_duplicate_waits_for_original(stub):
+    app, calls, behaviour = stub
+    key = str(uuid.uuid4())
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return jsonify({'ok': True}), 201
+
+    behaviour['view'] = slow
+    responses = {}
+
+    def post(name):
+        responses[name] = app.test_client().post('/stub', json={}, headers={'Idempotency-Key': key})
+
+    original = threading.Thread(target=post, args=('original',))
+    original.start()
+    assert started.wait(5)
+    duplicate = threading.Thread(target=post, args=('duplicate',))
+    duplicate.start()
+    duplicate.join(0.2)
+    assert duplicate.is_alive()  # Waiting, not running the view a second time
+    release.set()
+    original.join(5)
+    duplicate.join(5)
+
+    assert len(calls) == 1
+    assert responses['original'].status_code == responses['duplicate'].status_code == 201
+    assert responses['duplicate'].headers['Idempotent-Replayed'] == 'true'
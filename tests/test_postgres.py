@@ -0,0 +1,85 @@
+"""
+PostgreSQL backend tests.
+
+The model layer runs against the database at PG_TEST_URL, in a subprocess
+so the rest of the suite keeps its SQLite backend. Point it at a scratch
+database: its public schema is dropped first. Skipped when PG_TEST_URL
+is not set.
+"""
+import os
+import subprocess
+import sys
+import textwrap
+import pytest
+from conftest import BACKEND_DIR
+
+PG_TEST_URL = os.environ.get('PG_TEST_URL')
+
+MODEL_CHECKS = '''
+import psycopg
+from datetime import date
+from database import init_db, seed_services
+from models import Booking, BookingConflict, Client, ContactMessage, Changes, Stats
+from storage import get_backend
+
+with psycopg.connect(os.environ['DATABASE_URL'], autocommit=True) as raw:
+    raw.execute('DROP SCHEMA public CASCADE')
+    raw.execute('CREATE SCHEMA public')
+
+assert get_backend().name == 'postgresql'
+init_db()
+init_db()  # Migrations and index creation are idempotent
+seed_services()
+
+booking = Booking.create_checked(1, 'Robin', 'Robin@Example.com', None, '2031-02-03', '16:00')
+assert booking.id and booking.service_name
+try:
+    Booking.create_checked(1, 'Sam', 'sam@example.com', None, '2031-02-03', '16:00')
+    raise AssertionError('overlapping booking was accepted')
+except BookingConflict as e:
+    assert e.reason == 'overlap'
+
+bookings, conflicts = Booking.create_series(1, 'Alex', 'alex@example.com', None, '17:00',
+                                            ['2031-02-03', '2031-02-10'])
+assert len(bookings) == 2 and not conflicts
+assert [b.id for b in Booking.get_by_client('robin@example.com')] == [booking.id]
+assert len(Booking.get_range('2031-02-01', '2031-02-28')) == 3
+assert '16:00' in [t for t, _ in Booking.get_booked_times('2031-02-03')]
+Booking.update_status(booking.id, 'confirmed')
+
+ContactMessage.create('Robin', 'robin@example.com', 'Hello', 'Question about lashes')
+overview = Client.get_overview('ROBIN@example.com')
+assert len(overview['bookings']) == 1 and len(overview['messages']) == 1
+
+summary = Stats.get_summary(date(2031, 2, 1), date(2031, 2, 28))
+assert summary['bookings']['by_status'] == {'confirmed': 1, 'pending': 2}
+assert summary['unread_messages'] == 1
+
+changes = Changes.since(0)
+assert booking.id in [b.id for b in changes['changes']['bookings']['upserted']]
+print('ok')
+'''
+
+
+def run(script, **env):
+    return subprocess.run(
+        [sys.executable, '-c', 'import os\n' + textwrap.dedent(script)],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, capture_output=True, text=True, timeout=120,
+    )
+
+
+def test_postgres_requires_opt_in():
+    result = run('''
+        from storage import get_backend
+        try:
+            get_backend()
+        except RuntimeError as e:
+            print('refused' if 'POSTGRES_EXPERIMENTAL' in str(e) else e)
+    ''', DATABASE_URL='postgresql://localhost/unused', POSTGRES_EXPERIMENTAL='false')
+    assert result.stdout.strip() == 'refused', result.stderr
+
+
+@pytest.mark.skipif(not PG_TEST_URL, reason='PG_TEST_URL not set')
+def test_model_layer_on_postgres():
+    result = run(MODEL_CHECKS, DATABASE_URL=PG_TEST_URL, POSTGRES_EXPERIMENTAL='true')
+    assert result.stdout.strip().endswith('ok'), result.stderr
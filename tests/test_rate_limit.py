@@ -0,0 +1,119 @@
+"""
+Rate limiting and admission control tests.
+"""
+import threading
+import uuid
+from types import SimpleNamespace
+import pytest
+from config import Config
+import email_helper
+import rate_limit
+
+
+@pytest.fixture
+def limited(app, monkeypatch):
+    """Rate limiting on, with small per-blueprint limits and one write slot."""
+    monkeypatch.setattr(Config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(Config, 'TRUSTED_PROXY_COUNT', 0)
+    monkeypatch.setattr(Config, 'RATE_LIMITS', {'contact': (2, 600), 'intake': (2, 600)})
+    monkeypatch.setattr(rate_limit, '_admission', threading.BoundedSemaphore(1))
+    # A fresh client address, so buckets from other tests don't count
+    ip = f'10.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}'
+    return app.test_client(), {'REMOTE_ADDR': ip}
+
+
+def contact(client, environ, **headers):
+    return client.post('/api/contact', json={'name': 'Pat', 'email': 'pat@example.com', 'message': 'Hi'},
+                       environ_base=environ, headers=headers)
+
+
+def test_bucket_spends_then_refills(monkeypatch):
+    key, now = f'test|{uuid.uuid4()}', [1000.0]
+    monkeypatch.setattr(rate_limit.time, 'time', lambda: now[0])
+
+    assert rate_limit.take_token(key, 2, 10) == (True, 0)
+    assert rate_limit.take_token(key, 2, 10) == (True, 0)
+    allowed, retry_after = rate_limit.take_token(key, 2, 10)
+    assert not allowed and retry_after == 5  # One token every 5 seconds
+
+    now[0] += 5
+    assert rate_limit.take_token(key, 2, 10) == (True, 0)
+    assert not rate_limit.take_token(key, 2, 10)[0]
+    now[0] += 3600  # Refills to capacity, no further
+    assert [rate_limit.take_token(key, 2, 10)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_limits_apply_per_blueprint(limited):
+    client, environ = limited
+    assert [contact(client, environ).status_code for _ in range(3)] == [201, 201, 429]
+    response = contact(client, environ)
+    assert int(response.headers['Retry-After']) >= 1
+
+    # Another blueprint has its own bucket; reads are never limited
+    intake = client.post('/api/intake', json={'client_name': 'Pat', 'email': 'pat@example.com'},
+                         environ_base=environ)
+    assert intake.status_code == 201
+    assert client.get('/api/services', environ_base=environ).status_code == 200
+
+
+@pytest.mark.parametrize('proxies, expected', [
+    (0, '10.0.0.9'),         # No proxy: the socket address, header ignored
+    (1, '203.0.113.7'),      # Entry appended by our one proxy
+    (2, '198.51.100.2'),     # Two proxies: one further back
+    (9, '198.51.100.2'),     # More proxies than entries: the oldest entry
+])
+def test_client_ip_trusts_only_proxy_entries(app, monkeypatch, proxies, expected):
+    monkeypatch.setattr(Config, 'TRUSTED_PROXY_COUNT', proxies)
+    with app.test_request_context('/', environ_base={'REMOTE_ADDR': '10.0.0.9'},
+                                  headers={'X-Forwarded-For': '198.51.100.2, 203.0.113.7'}):
+        assert rate_limit.client_ip() == expected
+
+
+def test_busy_worker_sheds_writes(limited):
+    client, environ = limited
+    assert rate_limit._admission.acquire(blocking=False)  # Another post holds the only slot
+    try:
+        response = contact(client, environ)
+    finally:
+        rate_limit._admission.release()
+    assert response.status_code == 429
+    assert contact(client, environ).status_code == 201
+
+
+def test_write_slot_is_free_while_email_sends(limited, monkeypatch):
+    client, environ = limited
+    slot_free = []
+
+    def send(params):
+        slot_free.append(rate_limit._admission.acquire(blocking=False))
+        if slot_free[-1]:
+            rate_limit._admission.release()
+        return {'id': 'test'}
+
+    monkeypatch.setattr(Config, 'RESEND_API_KEY', 'test-key')
+    monkeypatch.setattr(email_helper, '_resend', SimpleNamespace(Emails=SimpleNamespace(send=send)))
+    assert contact(client, environ).status_code == 201
+    assert slot_free == [True]
+    # Released exactly once: the slot is back and the semaphore isn't over-released
+    assert rate_limit._admission.acquire(blocking=False)
+    rate_limit._admission.release()
+    with pytest.raises(ValueError):
+        rate_limit._admission.release()
+
+
+def test_size_admission_leaves_a_thread_for_reads(monkeypatch):
+    monkeypatch.setattr(Config, 'MAX_CONCURRENT_WRITES', None)
+    monkeypatch.setattr(rate_limit, '_admission', rate_limit._admission)
+    rate_limit.size_admission(4)
+    assert [rate_limit._admission.acquire(blocking=False) for _ in range(4)] == [True, True, True, False]
+
+
+def test_idempotent_retry_is_not_rate_limited(limited):
+    client, environ = limited
+    key = str(uuid.uuid4())
+    first = contact(client, environ, **{'Idempotency-Key': key})
+    contact(client, environ)  # Uses up the burst
+
+    retries = [contact(client, environ, **{'Idempotency-Key': key}) for _ in range(3)]
+    assert {r.status_code for r in retries} == {201}
+    assert {r.get_json()['id'] for r in retries} == {first.get_json()['id']}
@@ -0,0 +1,43 @@
+"""
+Retention tests.
+"""
+from database import get_db_connection
+from retention import run_retention
+
+
+def intake_count(conn, status):
+    row = conn.execute("SELECT count FROM stat_counters WHERE metric = 'intake_status' AND bucket = ?",
+                       (status,)).fetchone()
+    return row[0] if row else 0
+
+
+def test_archiving_keeps_stats_and_deleting_does_not(db):
+    conn = get_db_connection()
+    old_id = conn.execute('''
+        INSERT INTO intake_forms (client_name, email, status, created_at, updated_at)
+        VALUES ('Old', 'old@example.com', 'completed', '2001-01-01 00:00:00', '2001-01-01 00:00:00')
+        RETURNING id
+    ''').fetchone()[0]
+    conn.commit()
+    before = intake_count(conn, 'completed')
+    conn.close()
+
+    summary = run_retention(force=True)
+
+    conn = get_db_connection()
+    try:
+        assert summary['intake_forms'] >= 1
+        assert conn.execute('SELECT 1 FROM intake_forms WHERE id = ?', (old_id,)).fetchone() is None
+        assert intake_count(conn, 'completed') == before
+        assert conn.execute('SELECT COUNT(*) FROM stats_paused').fetchone()[0] == 0
+
+        # An ordinary delete still takes the form out of the counts
+        new_id = conn.execute(
+            "INSERT INTO intake_forms (client_name, email, status) VALUES ('New', 'new@example.com', 'completed') RETURNING id"
+        ).fetchone()[0]
+        conn.commit()
+        conn.execute('DELETE FROM intake_forms WHERE id = ?', (new_id,))
+        conn.commit()
+        assert intake_count(conn, 'completed') == before
+    finally:
+        conn.close()
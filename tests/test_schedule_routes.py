@@ -0,0 +1,40 @@
+"""
+Schedule route tests.
+"""
+import pytest
+from config import Config
+
+BLACKOUT = {'start_date': '2035-06-04', 'reason': 'Test'}
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(Config, 'SCHEDULE_ADMIN_TOKEN', 'schedule-test-token')
+    return {'Authorization': 'Bearer schedule-test-token'}
+
+
+def test_changes_refused_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(Config, 'SCHEDULE_ADMIN_TOKEN', None)
+    assert client.post('/api/schedule/blackouts', json=BLACKOUT,
+                       headers={'Authorization': 'Bearer anything'}).status_code == 403
+    assert client.put('/api/schedule/hours', json={'hours': []}).status_code == 403
+
+
+@pytest.mark.parametrize('headers', [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'schedule-test-token'}])
+def test_changes_need_the_token(client, token, headers):
+    response = client.post('/api/schedule/blackouts', json=BLACKOUT, headers=headers)
+    assert response.status_code == 401
+    assert response.headers['WWW-Authenticate'] == 'Bearer'
+    assert client.delete('/api/schedule/blocks/1', headers=headers).status_code == 401
+
+
+def test_blackout_with_token_closes_the_day(client, token):
+    created = client.post('/api/schedule/blackouts', json=BLACKOUT, headers=token)
+    assert created.status_code == 201
+    try:
+        times = client.get('/api/available-times?date=2035-06-04&service_id=1').get_json()
+        assert times['available_times'] == []
+    finally:
+        assert client.delete(f"/api/schedule/blackouts/{created.get_json()['id']}", headers=token).status_code == 200
+    # Reading the schedule stays open, like the other read-only admin views
+    assert client.get('/api/schedule').status_code == 200
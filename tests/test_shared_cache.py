@@ -0,0 +1,43 @@
+"""
+Shared cache invalidation tests.
+"""
+import shared_cache
+
+
+def test_bump_during_compute_is_not_cached_under_new_generation():
+    namespace, key = shared_cache.AVAILABILITY, 'test:bump-during-compute'
+
+    def compute():
+        # A booking commits while the value is being built
+        shared_cache.bump(namespace)
+        return b'stale'
+
+    assert shared_cache.get_or_set(namespace, key, compute) == b'stale'
+    assert shared_cache.get(namespace, key) is None
+
+
+def test_value_cached_when_nothing_changed():
+    namespace, key = shared_cache.CATALOGUE, 'test:unchanged'
+
+    assert shared_cache.get_or_set(namespace, key, lambda: b'fresh') == b'fresh'
+    assert shared_cache.get(namespace, key) == b'fresh'
+    shared_cache.bump(namespace)
+    assert shared_cache.get(namespace, key) is None
+
+
+def test_cached_response_skips_store_after_bump():
+    from app import app
+
+    calls = []
+
+    @shared_cache.cached_response(shared_cache.AVAILABILITY)
+    def view():
+        calls.append(1)
+        shared_cache.bump(shared_cache.AVAILABILITY)
+        return app.response_class(b'stale', mimetype='text/plain')
+
+    with app.test_request_context('/test-cached-response'):
+        view()
+    with app.test_request_context('/test-cached-response'):
+        view()
+    assert len(calls) == 2
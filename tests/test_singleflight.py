@@ -0,0 +1,89 @@
+"""
+Single-flight coalescing tests.
+"""
+import threading
+import time
+import singleflight
+
+
+def run_concurrently(key, fn, callers):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(singleflight.run_once(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_run():
+    key = ('test.shared', (), ())
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return b'body'
+
+    leader, results, _ = run_concurrently(key, compute, 1)
+    assert started.wait(5)
+    followers, follower_results, _ = run_concurrently(key, compute, 4)
+    # Let every follower register before the leader finishes
+    while singleflight.snapshot()[key[0]]['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert results + follower_results == [b'body'] * 5
+    assert singleflight.snapshot()[key[0]] == {'executed': 1, 'coalesced': 4}
+
+
+def test_errors_reach_waiters_and_nothing_is_kept():
+    key = ('test.error', (), ())
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    leader, _, leader_errors = run_concurrently(key, fail, 1)
+    assert started.wait(5)
+    followers, _, follower_errors = run_concurrently(key, fail, 2)
+    while singleflight.snapshot()[key[0]]['coalesced'] < 2:
+        time.sleep(0.01)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert [str(e) for e in leader_errors + follower_errors] == ['boom'] * 3
+    # The next call runs again instead of reusing the failure
+    assert singleflight.run_once(key, lambda: b'ok') == b'ok'
+
+
+def test_coalesced_view_keys_on_normalized_args():
+    from app import app
+
+    calls = []
+
+    @singleflight.coalesce
+    def view():
+        calls.append(1)
+        return app.response_class(b'page', mimetype='text/plain')
+
+    with app.test_request_context('/test-coalesce?b=2&a=1&empty='):
+        first = singleflight._normalized_args()
+    with app.test_request_context('/test-coalesce?a=1&b=2'):
+        assert singleflight._normalized_args() == first
+        response = view()
+    assert response.get_data() == b'page' and response.mimetype == 'text/plain'
+    assert calls == [1]
@@ -0,0 +1,93 @@
+"""
+Dashboard stat counter tests: the triggers must keep stat_counters equal
+to a full recompute of the tables.
+"""
+import random
+from database import get_db_connection, _rebuild_stats
+
+
+def read_counters(conn):
+    return {(metric, bucket): (count, round(amount, 2))
+            for metric, bucket, count, amount in conn.execute('SELECT metric, bucket, count, amount FROM stat_counters')}
+
+
+def counters_and_recompute():
+    """(stat_counters as maintained, stat_counters rebuilt from the tables)."""
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        maintained = read_counters(conn)
+        _rebuild_stats(conn)
+        recomputed = read_counters(conn)
+        conn.rollback()
+    finally:
+        conn.close()
+    return maintained, recomputed
+
+
+def delta(after, before):
+    """Per-key change in (count, amount), leaving out keys that didn't move."""
+    changes = {}
+    for key in set(after) | set(before):
+        count = after.get(key, (0, 0))[0] - before.get(key, (0, 0))[0]
+        amount = round(after.get(key, (0, 0))[1] - before.get(key, (0, 0))[1], 2)
+        if count or amount:
+            changes[key] = (count, amount)
+    return changes
+
+
+def test_triggers_match_full_recompute(db):
+    rng = random.Random(38)
+    maintained_before, recomputed_before = counters_and_recompute()
+
+    conn = get_db_connection()
+    statuses = ['pending', 'confirmed', 'cancelled', None]
+    dates = [f'2032-0{month}-{day:02d}' for month in (1, 2) for day in (3, 4, 10, 28)]
+    bookings, forms, messages = [], [], []
+    for step in range(300):
+        action = rng.random()
+        if action < 0.3 or not bookings:
+            bookings.append(conn.execute(
+                'INSERT INTO bookings (service_id, client_name, client_email, booking_date, booking_time, status) '
+                'VALUES (?, ?, ?, ?, ?, ?) RETURNING id',
+                (rng.randint(1, 5), 'Stat', 'stat@example.com', rng.choice(dates), '15:00',
+                 rng.choice(statuses[:3]))
+            ).fetchone()[0])
+        elif action < 0.45:
+            conn.execute('UPDATE bookings SET status = ?, booking_date = ?, service_id = ? WHERE id = ?',
+                         (rng.choice(statuses), rng.choice(dates), rng.randint(1, 5), rng.choice(bookings)))
+        elif action < 0.5:
+            conn.execute('DELETE FROM bookings WHERE id = ?', (bookings.pop(rng.randrange(len(bookings))),))
+        elif action < 0.65:
+            forms.append(conn.execute(
+                "INSERT INTO intake_forms (client_name, email, status) VALUES ('Stat', 'stat@example.com', ?) "
+                'RETURNING id', (rng.choice(['new', 'reviewed', None]),)
+            ).fetchone()[0])
+        elif action < 0.75 and forms:
+            conn.execute('UPDATE intake_forms SET status = ? WHERE id = ?',
+                         (rng.choice(['new', 'reviewed', 'archived', None]), rng.choice(forms)))
+        elif action < 0.8 and forms:
+            conn.execute('DELETE FROM intake_forms WHERE id = ?', (forms.pop(rng.randrange(len(forms))),))
+        elif action < 0.9:
+            messages.append(conn.execute(
+                "INSERT INTO contact_messages (name, email, message, is_read) VALUES ('Stat', 'stat@example.com', 'Hi', ?) "
+                'RETURNING id', (rng.choice([0, 1, None]),)
+            ).fetchone()[0])
+        elif action < 0.95 and messages:
+            conn.execute('UPDATE contact_messages SET is_read = ? WHERE id = ?', (rng.choice([0, 1]), rng.choice(messages)))
+        elif messages:
+            conn.execute('DELETE FROM contact_messages WHERE id = ?', (messages.pop(rng.randrange(len(messages))),))
+        if step % 50 == 0:
+            conn.commit()
+    # Re-pricing a service moves the revenue of its uncancelled bookings
+    price = conn.execute('SELECT price FROM services WHERE id = 2').fetchone()[0]
+    conn.execute('UPDATE services SET price = ? WHERE id = 2', (price + 12.5,))
+    conn.commit()
+    conn.execute('UPDATE services SET price = ? WHERE id = 2', (price,))
+    conn.commit()
+    conn.close()
+
+    maintained_after, recomputed_after = counters_and_recompute()
+    assert delta(maintained_after, maintained_before) == delta(recomputed_after, recomputed_before)
+    assert {metric for metric, _ in delta(maintained_after, maintained_before)} == {
+        'booking_status', 'bookings_day', 'bookings_week', 'intake_status', 'unread_messages'}
@@ -0,0 +1,39 @@
+"""
+Support-flags bitmask tests.
+"""
+import flags
+from models import IntakeForm
+
+
+def make_form(**flag_values):
+    return IntakeForm.create({'client_name': 'Flags', 'email': 'flags@example.com', **flag_values})
+
+
+def test_encode_and_columns_agree():
+    mask = flags.encode({'sensitive_to_noise': True, 'uses_wheelchair': 'on', 'limited_mobility': False})
+    assert mask == flags.FLAG_BITS['sensitive_to_noise'] | flags.FLAG_BITS['uses_wheelchair']
+    values = flags.column_values(mask)
+    assert [column for column, value in zip(flags.FLAG_COLUMNS, values) if value] == ['sensitive_to_noise', 'uses_wheelchair']
+    assert flags.labels(mask, 'mobility') == ['Uses wheelchair']
+
+
+def test_filter_matches_any_and_all(db):
+    noise = make_form(sensitive_to_noise=True)
+    both = make_form(sensitive_to_noise=True, uses_wheelchair=True)
+    wheelchair = make_form(uses_wheelchair=True)
+    plain = make_form()
+    ours = {noise, both, wheelchair, plain}
+
+    def ids(**masks):
+        return {form.id for form in IntakeForm.filter_by_flags(limit=500, **masks)} & ours
+
+    assert ids(any_mask=flags.mask_for(['sensitive_to_noise', 'uses_wheelchair'])) == {noise, both, wheelchair}
+    assert ids(all_mask=flags.mask_for(['sensitive_to_noise', 'uses_wheelchair'])) == {both}
+    assert ids(any_mask=flags.mask_for(['uses_wheelchair']), all_mask=flags.mask_for(['sensitive_to_noise'])) == {both}
+
+
+def test_route_rejects_unknown_and_empty_flags(client):
+    response = client.get('/api/intake/support-needs?any=sensitive_to_noise,not_a_flag')
+    assert response.status_code == 400
+    assert 'not_a_flag' in response.get_json()['error']
+    assert client.get('/api/intake/support-needs').status_code == 400
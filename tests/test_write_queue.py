@@ -0,0 +1,49 @@
+"""
+Group-commit write queue tests.
+"""
+import threading
+import pytest
+from config import Config
+import write_queue
+from write_queue import WriteQueue
+
+
+def test_cancelled_job_is_not_written():
+    wq = WriteQueue(max_batch=1, window_ms=0)
+    release = threading.Event()
+    ran = []
+
+    first = wq.submit(lambda conn: release.wait(5))
+    second = wq.submit(lambda conn: ran.append('second'))
+    assert second.cancel()
+    release.set()
+
+    assert first.result(timeout=5) is True
+    wq.submit(lambda conn: None).result(timeout=5)
+    assert ran == []
+
+
+def test_run_write_withdraws_job_on_timeout(monkeypatch):
+    wq = WriteQueue(max_batch=1, window_ms=0)
+    monkeypatch.setattr(write_queue, '_queue', wq)
+    monkeypatch.setattr(Config, 'WRITE_QUEUE_ENABLED', True)
+    monkeypatch.setattr(Config, 'WRITE_QUEUE_TIMEOUT_SECONDS', 0.05)
+    release = threading.Event()
+    ran = []
+
+    blocker = wq.submit(lambda conn: release.wait(5))
+    with pytest.raises(TimeoutError):
+        write_queue.run_write(lambda conn: ran.append('timed out'))
+    release.set()
+    blocker.result(timeout=5)
+    wq.submit(lambda conn: None).result(timeout=5)
+    assert ran == []
+
+
+def test_run_write_waits_for_started_job(monkeypatch):
+    wq = WriteQueue(max_batch=1, window_ms=0)
+    monkeypatch.setattr(write_queue, '_queue', wq)
+    monkeypatch.setattr(Config, 'WRITE_QUEUE_ENABLED', True)
+    monkeypatch.setattr(Config, 'WRITE_QUEUE_TIMEOUT_SECONDS', 0.05)
+
+    assert write_queue.run_write(lambda conn: threading.Event().wait(0.2) or 'written') == 'written'